@@ -6,8 +6,11 @@ import re
 from typing import Tuple, Optional
 import pandas as pd
 
+import availability
 import config
+import conflict_store
 import ops
+import planner
 import sheets_sync
 
 def _df_to_markdown(df: pd.DataFrame, max_rows: int = 20) -> str:
@@ -23,6 +26,35 @@ def _list_to_bullets(items: list) -> str:
         return "_None._"
     return "\n".join(f"- {x}" for x in items)
 
+def _crew_line(crew: dict) -> str:
+    return f"{crew['project_id']}: {crew['name']} ({crew['pilot_id']}) with {crew['model']} ({crew['drone_id']})"
+
+def _age_text(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "not loaded yet"
+    if seconds < 60:
+        return "just now" if seconds < 5 else f"{int(seconds)} s ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    return f"{seconds / 3600:.1f} h ago"
+
+def _freshness_note(snap: sheets_sync.Snapshot) -> str:
+    """
+    A footnote when a table used this turn could not be refreshed, so the reply may be out of
+    date, or when queued updates to any table have failed to save.
+    """
+    status = sheets_sync.freshness()
+    notes = []
+    stale = [t for t in snap.loaded() if status[t]["last_error"]]
+    if stale:
+        parts = [f"{t} fetched {_age_text(status[t]['age'])} ({status[t]['source']})" for t in stale]
+        notes.append(f"_Data may be out of date: {'; '.join(parts)}. Last refresh failed: {status[stale[0]]['last_error']}_")
+    unsaved = [t for t, st in status.items() if st["write_error"]]
+    if unsaved:
+        parts = [f"{t} ({status[t]['pending_writes']} update(s))" for t in unsaved]
+        notes.append(f"_Changes not saved yet: {'; '.join(parts)}. Last save failed: {status[unsaved[0]]['write_error']}; retrying._")
+    return "".join(f"\n\n{note}" for note in notes)
+
 def handle_message(user_text: str) -> str:
     """Process one user message and return agent reply. Handles errors gracefully."""
     text = (user_text or "").strip().lower()
@@ -30,24 +62,61 @@ def handle_message(user_text: str) -> str:
         return "You can ask me about pilot roster, assignments, drones, conflicts, or urgent reassignments. What do you need?"
 
     try:
-        return _handle_message_impl(text)
+        # One snapshot per turn: every table is read at most once, and only if the intent needs it
+        snap = sheets_sync.Snapshot()
+        return _handle_message_impl(text, snap) + _freshness_note(snap)
     except Exception as e:
         return f"Something went wrong while processing your request. Please try again or rephrase. (Details: {e})"
 
-def _handle_message_impl(text: str) -> str:
+def _handle_message_impl(text: str, snap: sheets_sync.Snapshot) -> str:
     """Inner implementation; raises on unexpected errors."""
+    # --- Data freshness ---
+    if re.search(r"how (fresh|old|stale)|data (freshness|age|status)|last (sync|synced|refresh)", text):
+        rows = [
+            {"table": t, "fetched": _age_text(st["age"]), "source": st["source"] or "–",
+             "last error": f"{st['last_error']} ({_age_text(st['error_age'])})" if st["last_error"] else "–",
+             "unsaved updates": st["pending_writes"] or "–",
+             "save error": st["write_error"] or "–"}
+            for t, st in sheets_sync.freshness().items()
+        ]
+        return f"**Data freshness:**\n\n{_df_to_markdown(pd.DataFrame(rows))}"
+
     # --- Roster ---
     if re.search(r"show (all )?pilots|list (all )?pilots|(all )?pilots roster", text):
-        df = sheets_sync.read_pilot_roster()
+        df = snap.pilots
         return f"**Pilot roster:**\n\n{_df_to_markdown(df)}"
 
+    # Ranked matches: "top 3 pilots for PRJ002", "best pilots for PRJ001"
+    ranked = re.search(r"\b(?:top|best)\s*(\d+)?\s*pilots?\s+for\s+(prj\d+)", text)
+    if ranked:
+        k, prj = int(ranked.group(1) or 3), ranked.group(2).upper()
+        best = ops.match_pilots_to_project(prj, snap, top_k=k)
+        if not best:
+            return f"No available pilots match project **{prj}** (location, skills, certs)."
+        return f"**Ranked pilots for {prj}:**\n\n" + _list_to_bullets([f"{s['name']} ({s['pilot_id']}), score {s['score']}" for s in best])
+
+    # Calendar: "is P001 free between 2026-02-06 and 2026-02-08", "next free 3 day slot for D001"
+    date_pat = r"(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})"
+    window = re.search(rf"\b([pd]\d+) free (?:between|from) {date_pat} (?:and|to) {date_pat}", text)
+    if window:
+        rid, table = window.group(1).upper(), "pilots" if window.group(1)[0] == "p" else "drones"
+        free = availability.is_free(rid, window.group(2), window.group(3), table, snap)
+        return f"**{rid}** is {'free' if free else 'busy'} between {window.group(2)} and {window.group(3)}."
+    slot = re.search(r"next free (\d+)[- ]?days? slot for ([pd]\d+)", text)
+    if slot:
+        days, rid = int(slot.group(1)), slot.group(2).upper()
+        first = availability.next_free_slot(rid, days, table="pilots" if rid[0] == "P" else "drones", snap=snap)
+        if first is None:
+            return f"**{rid}** has no free {days}-day slot."
+        return f"**{rid}** is next free for {days} days from **{first}**."
+
     if re.search(r"who (is|are) (available|on leave|unavailable)", text) or "pilot availability" in text:
         status = "Available"
         if "on leave" in text:
             status = "On Leave"
         elif "unavailable" in text:
             status = "Unavailable"
-        df = ops.get_pilots(status=status)
+        df = ops.get_pilots(status=status, snap=snap)
         return f"**Pilots ({status}):**\n\n{_df_to_markdown(df)}"
 
     if re.search(r"pilots? (with )?skill", text) or "certification" in text or "cert" in text:
@@ -63,12 +132,15 @@ def _handle_message_impl(text: str) -> str:
                 cert = "Night Ops"
         if "bangalore" in text or "mumbai" in text:
             loc = "Bangalore" if "bangalore" in text else "Mumbai"
-        df = ops.get_pilots(skill=skill, certification=cert, location=loc)
+        df = ops.get_pilots(skill=skill, certification=cert, location=loc, snap=snap)
         return f"**Matching pilots:**\n\n{_df_to_markdown(df)}"
 
-    if re.search(r"current assignment|who('s| is) assigned|assignments?", text):
-        df = ops.get_current_assignments()
-        return f"**Current assignments:**\n\n{_df_to_markdown(df)}"
+    if re.search(r"current assignment|who('s| is) assigned|\bassignments?\b", text):
+        df = ops.get_current_assignments(snap)
+        reply = f"**Current assignments:**\n\n{_df_to_markdown(df)}"
+        if not snap.assignments.empty:
+            reply += f"\n\n**Bookings:**\n\n{_df_to_markdown(snap.assignments)}"
+        return reply
 
     # Status update: "set P001 status to On Leave" or "set P001 to on leave" or "mark P002 on leave" etc.
     is_status_cmd = (
@@ -100,18 +172,54 @@ def _handle_message_impl(text: str) -> str:
 
     # --- Missions / projects ---
     if "project" in text or "mission" in text:
+        if "plan" in text or "staff" in text:
+            plan = planner.plan_assignments(snap=snap)
+            if not plan["assignments"] and not plan["unstaffed"]:
+                return "No open missions to staff."
+            parts = ["**Proposed staffing for open missions:**"]
+            if plan["assignments"]:
+                parts.append(_list_to_bullets([f"{a['project_id']} ({a['priority']}): {a['name']} ({a['pilot_id']})" for a in plan["assignments"]]))
+            if plan["unstaffed"]:
+                parts.append("**No eligible pilot:** " + ", ".join(str(p) for p in plan["unstaffed"]))
+            return "\n\n".join(parts)
         if "list" in text or "show" in text or "all" in text or "missions" in text:
-            df = ops.get_missions()
+            df = ops.get_missions(snap)
             return f"**Missions:**\n\n{_df_to_markdown(df)}"
         if "match" in text or "suggest" in text or "who can" in text:
             for pid in ["prj001", "prj002", "prj003"]:
                 if pid in text:
-                    suggestions = ops.match_pilots_to_project(pid.upper())
+                    suggestions = ops.match_pilots_to_project(pid.upper(), snap)
                     if not suggestions:
                         return f"No available pilots match project **{pid.upper()}** (location, skills, certs)."
                     return f"**Pilots matching {pid.upper()}:**\n\n" + _list_to_bullets([f"{s['name']} ({s['pilot_id']})" for s in suggestions])
             return "Specify a project ID (e.g. PRJ001) to get pilot suggestions."
+        if "unassign" in text:
+            # "unassign P001" releases everything; "unassign P001 from PRJ001" just that project
+            pid = None
+            for x in ["p001", "p002", "p003", "p004"]:
+                if x in text:
+                    pid = x.upper()
+                    break
+            if not pid:
+                return "Specify a pilot ID (e.g. P001) to unassign."
+            prj = re.search(r"\b(prj\d+)\b", text)
+            try:
+                if prj:
+                    ops.unassign_pilot(pid, project_id=prj.group(1).upper())
+                    return f"Unassigned **{pid}** from **{prj.group(1).upper()}** and synced."
+                ops.unassign_pilot(pid)
+                return f"Unassigned **{pid}**. Status set to Available and synced."
+            except Exception as e:
+                return f"Unassign failed: {e}"
         if "assign" in text:
+            # "assign P001 to PRJ001, P002 to PRJ002": several pairs go through in one write
+            pairs = [(p.upper(), j.upper()) for p, j in re.findall(r"\b(p\d+)\s+to\s+(prj\d+)\b", text)]
+            if len(pairs) > 1:
+                try:
+                    ops.assign_pilots_to_projects(pairs, snap)
+                    return "Assigned " + ", ".join(f"**{p}** to **{j}**" for p, j in pairs) + ". Bookings added and synced."
+                except Exception as e:
+                    return f"Assignment failed: {e}"
             # "assign P001 to PRJ001"
             pid = None
             prj = None
@@ -127,27 +235,14 @@ def _handle_message_impl(text: str) -> str:
                 return "Say e.g. 'Assign P001 to PRJ001' with pilot and project IDs."
             try:
                 ops.assign_pilot_to_project(pid, prj)
-                return f"Assigned **{pid}** to **{prj}**. Roster updated and synced."
+                return f"Assigned **{pid}** to **{prj}**. Booking added and synced."
             except Exception as e:
                 return f"Assignment failed: {e}"
-        if "unassign" in text:
-            pid = None
-            for x in ["p001", "p002", "p003", "p004"]:
-                if x in text:
-                    pid = x.upper()
-                    break
-            if not pid:
-                return "Specify a pilot ID (e.g. P001) to unassign."
-            try:
-                ops.unassign_pilot(pid)
-                return f"Unassigned **{pid}**. Status set to Available and synced."
-            except Exception as e:
-                return f"Unassign failed: {e}"
 
     # --- Drones ---
     if "drone" in text or "fleet" in text or "inventory" in text:
         if "maintenance" in text or "due" in text:
-            df = ops.get_maintenance_due()
+            df = ops.get_maintenance_due(snap)
             return f"**Drones due for maintenance:**\n\n{_df_to_markdown(df)}"
         if "available" in text or "status" in text:
             cap = loc = None
@@ -157,7 +252,7 @@ def _handle_message_impl(text: str) -> str:
                 cap = "RGB" if "rgb" in text else "LiDAR"
             if "bangalore" in text or "mumbai" in text:
                 loc = "Bangalore" if "bangalore" in text else "Mumbai"
-            df = ops.get_drones(capability=cap, location=loc, status="Available")
+            df = ops.get_drones(capability=cap, location=loc, status="Available", snap=snap)
             return f"**Available drones:**\n\n{_df_to_markdown(df)}"
         if "update" in text or "set" in text or "mark" in text:
             did = None
@@ -179,12 +274,13 @@ def _handle_message_impl(text: str) -> str:
                 return f"Updated drone **{did}** to **{new_status}** (saved locally). Add Sheet IDs and credentials to sync to Google Sheet.)"
             except Exception as e:
                 return f"Update failed: {e}"
-        df = sheets_sync.read_drone_fleet()
+        df = snap.drones
         return f"**Drone fleet:**\n\n{_df_to_markdown(df)}"
 
     # --- Conflicts ---
     if "conflict" in text or "double" in text or "mismatch" in text or "issue" in text or "problem" in text:
-        all_c = ops.run_all_conflicts()
+        # Kept current from write events, so repeated checks don't recompute from scratch
+        all_c = conflict_store.current_conflicts()
         parts = []
         if all_c["double_booking"]:
             parts.append("**Double booking:**\n" + _list_to_bullets([str(x) for x in all_c["double_booking"]]))
@@ -208,13 +304,24 @@ def _handle_message_impl(text: str) -> str:
                 prj = x.upper()
                 break
         if not prj:
-            return "Specify a project ID (e.g. PRJ002) for urgent reassignment suggestions."
-        result = ops.suggest_urgent_reassignment(prj, reason="Urgent reassignment requested")
+            # No project named: crew every open Urgent mission in one solve, no asset used twice
+            missions = snap.missions
+            urgent = missions.loc[missions["priority"].astype(str).str.strip().str.lower() == "urgent", "project_id"].tolist()
+            plan = planner.plan_crews(urgent, snap=snap)
+            if not plan["crews"] and not plan["uncrewed"]:
+                return "No urgent missions need a crew. Name a project (e.g. PRJ002) for reassignment suggestions."
+            parts = ["**Proposed crews for urgent missions:**", _list_to_bullets([_crew_line(c) for c in plan["crews"]])]
+            if plan["uncrewed"]:
+                parts.append("**No pilot + drone available:** " + ", ".join(str(p) for p in plan["uncrewed"]))
+            return "\n\n".join(parts)
+        result = ops.suggest_urgent_reassignment(prj, reason="Urgent reassignment requested", snap=snap)
         if "error" in result:
             return result["error"]
+        crews = planner.plan_crews([prj], snap=snap)["crews"]
         lines = [
             f"**Urgent reassignment for {prj}**",
             "",
+            "**Proposed crew:** " + (_crew_line(crews[0]) if crews else "None"),
             "**Suggested pilots:** " + (", ".join(f"{p['name']} ({p['pilot_id']})" for p in result["suggested_pilots"]) or "None"),
             "**Suggested drones:** " + (", ".join(d.get("drone_id", d.get("drone_id", "")) for d in result["suggested_drones"]) or "None"),
             "",
@@ -228,11 +335,11 @@ def _handle_message_impl(text: str) -> str:
             "**Skylark Operations Coordinator**\n\n"
             "I can help with:\n"
             "- **Roster:** Who's available, on leave; filter by skill/cert/location; update pilot status (syncs to Google Sheet)\n"
-            "- **Assignments:** List assignments, match pilots to projects, assign or unassign\n"
+            "- **Assignments:** List assignments, match pilots to projects, plan staffing for open missions, assign or unassign\n"
             "- **Drones:** List fleet, filter by capability/location, maintenance due, update drone status (syncs to sheet)\n"
             "- **Conflicts:** Double-booking, skill/cert mismatch, drone in maintenance, location mismatch\n"
             "- **Urgent reassignment:** Suggest pilots and drones for a project and show conflicts\n\n"
-            "Try: *Who is available?* | *Pilots with Mapping skill in Bangalore* | *Current assignments* | *Drones due for maintenance* | *Conflicts?* | *Urgent reassignment for PRJ002*"
+            "Try: *Who is available?* | *Pilots with Mapping skill in Bangalore* | *Current assignments* | *Drones due for maintenance* | *Top 3 pilots for PRJ002* | *Conflicts?* | *Urgent reassignment for PRJ002*"
         )
 
     return (
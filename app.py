@@ -16,8 +16,12 @@ except Exception:
     pass
 
 import config
+import sheets_sync
 from agent import handle_message
 
+# Keep every table fresh in the background so chat replies never wait on Google Sheets
+sheets_sync.start_refresher()
+
 st.set_page_config(
     page_title="Skylark Ops Coordinator",
     page_icon="🛸",
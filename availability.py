@@ -0,0 +1,164 @@
+"""
+Availability calendars: per pilot / drone, the days it is busy, as a sorted list of
+merged, inclusive day intervals. Built once per snapshot from the roster, fleet,
+missions and assignments table, so "free between D1 and D2?" is one binary search instead of a mission scan.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import ops
+import sheets_sync
+
+# Bounds for open-ended busy time (before available_from, after maintenance is due)
+DAWN = np.datetime64("1900-01-01", "D")
+NEVER = np.datetime64("9999-12-31", "D")
+ONE_DAY = np.timedelta64(1, "D")
+
+DayLike = Union[str, date, datetime, np.datetime64]
+
+def _day(d: DayLike) -> np.datetime64:
+    """Day from a sheet string (same formats as ops), date/datetime or datetime64."""
+    if isinstance(d, str):
+        parsed = ops.parse_date(d)
+        if parsed is None:
+            raise ValueError(f"Unrecognized date: {d}")
+        d = parsed
+    if isinstance(d, datetime):
+        d = d.date()
+    return np.datetime64(d, "D")
+
+class Calendar:
+    """
+    Busy days of one resource: sorted, non-overlapping, non-adjacent inclusive intervals
+    held as two parallel datetime64[D] arrays. book() merges, release() splits.
+    """
+
+    def __init__(self, starts: Optional[np.ndarray] = None, ends: Optional[np.ndarray] = None):
+        self.starts = np.asarray(starts if starts is not None else [], dtype="datetime64[D]")
+        self.ends = np.asarray(ends if ends is not None else [], dtype="datetime64[D]")
+
+    def __repr__(self) -> str:
+        return f"Calendar({self.busy()})"
+
+    def busy(self) -> List[Tuple[np.datetime64, np.datetime64]]:
+        return list(zip(self.starts, self.ends))
+
+    def is_free(self, start: DayLike, end: DayLike) -> bool:
+        """No busy day in [start, end]."""
+        start, end = _day(start), _day(end)
+        i = np.searchsorted(self.ends, start, side="left")  # first interval ending on/after start
+        return i == len(self.starts) or self.starts[i] > end
+
+    def next_free(self, days: int, after: DayLike) -> Optional[np.datetime64]:
+        """First day on/after `after` starting `days` consecutive free days; None if there is none."""
+        need = np.timedelta64(max(int(days), 1), "D")
+        candidate = _day(after)
+        i = np.searchsorted(self.ends, candidate, side="left")
+        while i < len(self.starts):
+            if self.starts[i] - candidate >= need:
+                return candidate
+            if self.ends[i] >= NEVER:
+                return None
+            candidate = max(candidate, self.ends[i] + ONE_DAY)
+            i += 1
+        return candidate if NEVER - candidate >= need else None
+
+    def book(self, start: DayLike, end: DayLike) -> None:
+        """Mark [start, end] busy, merging with overlapping or adjacent intervals."""
+        start, end = _day(start), _day(end)
+        lo = np.searchsorted(self.ends, start - ONE_DAY, side="left")
+        hi = np.searchsorted(self.starts, end + ONE_DAY, side="right")
+        if lo < hi:
+            start, end = min(start, self.starts[lo]), max(end, self.ends[hi - 1])
+        self.starts = np.concatenate([self.starts[:lo], [start], self.starts[hi:]])
+        self.ends = np.concatenate([self.ends[:lo], [end], self.ends[hi:]])
+
+    def release(self, start: DayLike, end: DayLike) -> None:
+        """Mark [start, end] free, splitting any interval that straddles it."""
+        start, end = _day(start), _day(end)
+        lo = np.searchsorted(self.ends, start, side="left")
+        hi = np.searchsorted(self.starts, end, side="right")
+        if lo >= hi:
+            return
+        keep_s, keep_e = [], []
+        if self.starts[lo] < start:
+            keep_s.append(self.starts[lo])
+            keep_e.append(start - ONE_DAY)
+        if self.ends[hi - 1] > end:
+            keep_s.append(end + ONE_DAY)
+            keep_e.append(self.ends[hi - 1])
+        self.starts = np.concatenate([self.starts[:lo], np.array(keep_s, dtype="datetime64[D]"), self.starts[hi:]])
+        self.ends = np.concatenate([self.ends[:lo], np.array(keep_e, dtype="datetime64[D]"), self.ends[hi:]])
+
+def _bookings(snap: sheets_sync.Snapshot, table: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Busy time of `table` as parallel (resource_id, start, end) arrays: its dated bookings
+    (ops.bookings: current assignment and assignments table); for pilots the days before
+    available_from; for drones every day from maintenance_due on (the same rule as
+    ops.eligible_drone_rows).
+    """
+    ids = ops.column_strings(snap, table, ops.ID_COLUMNS[table])
+    booked = ops.bookings(snap, table)
+    dated = ~np.isnat(booked["start"]) & ~np.isnat(booked["end"])
+    parts = [(
+        ids[booked["row"][dated]],
+        booked["start"][dated].astype("datetime64[D]"),
+        booked["end"][dated].astype("datetime64[D]"),
+    )]
+    if table == "pilots":
+        avail = ops.column_dates(snap, "pilots", "available_from").astype("datetime64[D]")
+        known = ~np.isnat(avail)
+        parts.append((ids[known], np.full(known.sum(), DAWN), avail[known] - ONE_DAY))
+    else:
+        due = ops.column_dates(snap, "drones", "maintenance_due").astype("datetime64[D]")
+        known = ~np.isnat(due)
+        parts.append((ids[known], due[known], np.full(known.sum(), NEVER)))
+    return tuple(np.concatenate(cols) for cols in zip(*parts))
+
+def _merge(ids: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Dict[str, Calendar]:
+    """Sort by (resource, start) and merge overlapping/adjacent intervals, vectorized."""
+    starts, ends = np.minimum(starts, ends).astype("int64"), np.maximum(starts, ends).astype("int64")
+    order = np.lexsort((starts, pd.factorize(ids)[0]))
+    ids, starts, ends = ids[order], starts[order], ends[order]
+    if not len(ids):
+        return {}
+    # A block starts where the resource changes or the interval begins more than a day
+    # after everything before it (running max of ends) has finished
+    reach = pd.Series(ends).groupby(ids).cummax().to_numpy()
+    heads = np.flatnonzero(np.r_[True, (ids[1:] != ids[:-1]) | (starts[1:] > reach[:-1] + 1)])
+    block_starts = starts[heads].astype("datetime64[D]")
+    block_ends = np.maximum.reduceat(ends, heads).astype("datetime64[D]")
+    owners = ids[heads]
+    firsts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    lasts = np.r_[firsts[1:], len(heads)]
+    return {owners[lo]: Calendar(block_starts[lo:hi], block_ends[lo:hi]) for lo, hi in zip(firsts, lasts)}
+
+def calendars(table: str = "pilots", snap: Optional[sheets_sync.Snapshot] = None) -> Dict[str, Calendar]:
+    """Calendar per resource id of `table` ("pilots" or "drones"), built once per snapshot."""
+    if table not in ("pilots", "drones"):
+        raise ValueError(f"No calendars for table: {table}")
+    snap = ops.snapshot(snap)
+    return ops.derived(snap, ("calendars", (table, "missions", "assignments")), lambda: _merge(*_bookings(snap, table)))
+
+def calendar_for(resource_id: str, table: str = "pilots", snap: Optional[sheets_sync.Snapshot] = None) -> Calendar:
+    """The resource's calendar; an empty one (always free) for ids with no busy time."""
+    return calendars(table, snap).get(str(resource_id).strip(), Calendar())
+
+def is_free(resource_id: str, start: DayLike, end: DayLike, table: str = "pilots", snap: Optional[sheets_sync.Snapshot] = None) -> bool:
+    return calendar_for(resource_id, table, snap).is_free(start, end)
+
+def next_free_slot(
+    resource_id: str, days: int, after: Optional[DayLike] = None, table: str = "pilots", snap: Optional[sheets_sync.Snapshot] = None
+) -> Optional[np.datetime64]:
+    """First start day (on/after `after`, default today) of `days` free days in a row."""
+    return calendar_for(resource_id, table, snap).next_free(days, after if after is not None else date.today())
+
+def free_between(start: DayLike, end: DayLike, table: str = "pilots", snap: Optional[sheets_sync.Snapshot] = None) -> List[str]:
+    """Ids of `table` with no busy day in [start, end], in roster order."""
+    snap = ops.snapshot(snap)
+    cals = calendars(table, snap)
+    ids = dict.fromkeys(ops.column_strings(snap, table, ops.ID_COLUMNS[table]))
+    return [rid for rid in ids if rid not in cals or cals[rid].is_free(start, end)]
@@ -0,0 +1,595 @@
+"""
+Storage backends for sheets_sync: one small protocol (read a table, write it, append rows,
+report a change version) with Google Sheets, CSV, Parquet and SQLite
+implementations. sheets_sync picks one per table from config; ops never sees them.
+"""
+import asyncio
+import importlib.util
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Hashable, List, Optional, Protocol, Tuple
+
+import pandas as pd
+
+import config
+import sqlite_store
+
+EMPTY = "–"
+
+# Local files per table (Parquet uses the same names with a .parquet suffix)
+LOCAL_FILES = {
+    "pilots": "pilot_roster.csv", "drones": "drone_fleet.csv",
+    "missions": "missions.csv", "assignments": "assignments.csv",
+}
+
+# One row per booking of a pilot or drone ("pilot" / "drone") on a project; blank dates mean the mission's
+ASSIGNMENT_COLUMNS = ["resource_type", "resource_id", "project_id", "start_date", "end_date"]
+
+class Backend(Protocol):
+    """
+    Where tables live. Tables are DataFrames of text in sheet order; write_table may send
+    only what changed (Sheets and SQLite diff against the last known copy). version() is a
+    cheap token that changes whenever the table does (None when the backend cannot tell), so
+    callers can skip re-reading an unchanged table. A backend may also offer a coroutine
+    aread_table, which the async API in sheets_sync awaits instead of reading on a thread.
+    """
+
+    def handles(self, table: str) -> bool: ...
+    def read_table(self, table: str) -> pd.DataFrame: ...
+    def write_table(self, table: str, df: pd.DataFrame) -> None: ...
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None: ...
+    def version(self, table: str) -> Optional[str]: ...
+
+def _stored_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill NaN and empty as "–" for consistency."""
+    out = df.fillna(EMPTY).astype(str)
+    return out.where(~out.apply(lambda col: col.str.strip().isin(["", "nan", "None"])), EMPTY)
+
+# --- Google Sheets ---
+
+_sheets_client = None
+_pool: Optional[ThreadPoolExecutor] = None
+
+def gather(calls: Dict[Hashable, Callable[[], Any]], timeout: Optional[float] = None) -> Dict[Hashable, Any]:
+    """
+    Run independent calls (e.g. one request per spreadsheet) at once on a shared thread pool, so
+    they take as long as the slowest instead of the sum. Returns each call's result, or the
+    exception it raised; a call still running after `timeout` seconds (SHEETS_FETCH_TIMEOUT)
+    is given up on with TimeoutError. Without a timeout a single call runs on the caller's thread.
+    """
+    global _pool
+    timeout = config.SHEETS_FETCH_TIMEOUT if timeout is None else timeout
+    if len(calls) <= 1 and timeout <= 0:
+        out = {}
+        for key, call in calls.items():
+            try:
+                out[key] = call()
+            except Exception as e:
+                out[key] = e
+        return out
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sheets-fetch")
+    futures = {key: _pool.submit(call) for key, call in calls.items()}
+    deadline = time.monotonic() + timeout
+    out = {}
+    for key, future in futures.items():
+        try:
+            out[key] = future.result(timeout=max(0.0, deadline - time.monotonic()) if timeout > 0 else None)
+        except FutureTimeout:
+            future.cancel()
+            out[key] = TimeoutError(f"no answer within {timeout:g}s")
+        except Exception as e:
+            out[key] = e
+    return out
+
+# Sheet values as last read or written, per (sheet id, worksheet): the baseline for delta writes
+_last_known: Dict[Tuple[str, str], List[List[str]]] = {}
+
+def _get_client():
+    global _sheets_client
+    if _sheets_client is None and config.use_google_sheets():
+        try:
+            import gspread
+            from google.oauth2.service_account import Credentials
+            scopes = [
+                "https://www.googleapis.com/auth/spreadsheets",
+                "https://www.googleapis.com/auth/drive.readonly",
+            ]
+            if config.GOOGLE_CREDENTIALS_JSON_CONTENT:
+                info = json.loads(config.GOOGLE_CREDENTIALS_JSON_CONTENT)
+                creds = Credentials.from_service_account_info(info, scopes=scopes)
+            else:
+                creds = Credentials.from_service_account_file(str(config.CREDENTIALS_PATH), scopes=scopes)
+            _sheets_client = gspread.authorize(creds)
+            if config.SHEETS_FETCH_TIMEOUT > 0 and hasattr(_sheets_client, "set_timeout"):
+                _sheets_client.set_timeout(config.SHEETS_FETCH_TIMEOUT)
+        except Exception as e:
+            raise RuntimeError(f"Google Sheets auth failed: {e}") from e
+    return _sheets_client
+
+def _sheet_to_df(client, sheet_id: str, worksheet_name: str = "Sheet1") -> pd.DataFrame:
+    """Fetch first sheet as DataFrame. Assumes first row is header."""
+    book = client.open_by_key(sheet_id)
+    sheet = book.worksheet(worksheet_name)
+    rows = sheet.get_all_values()
+    _last_known[(sheet_id, worksheet_name)] = rows
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+def _pad(rows: List[List[str]]) -> List[List[str]]:
+    """Rows padded to one width with "", as get_all_values returns them (the API drops trailing blanks)."""
+    width = max((len(r) for r in rows), default=0)
+    return [list(r) + [""] * (width - len(r)) for r in rows]
+
+def _values_batch_get(client, sheet_id: str, worksheets: List[str]) -> Optional[Dict[str, List[List[str]]]]:
+    """
+    All values of several worksheets of one spreadsheet in a single values.batchGet request
+    (no open_by_key / worksheet metadata round trips). None if the client cannot send raw requests.
+    """
+    http = getattr(client, "http_client", client)  # gspread 6 moved request() to http_client
+    if not hasattr(http, "request"):
+        return None
+    ranges = ["'" + name.replace("'", "''") + "'" for name in worksheets]
+    response = http.request(
+        "get", f"https://sheets.googleapis.com/v4/spreadsheets/{sheet_id}/values:batchGet",
+        params={"ranges": ranges, "majorDimension": "ROWS"},
+    )
+    value_ranges = response.json().get("valueRanges", [])
+    return {name: _pad(vr.get("values", [])) for name, vr in zip(worksheets, value_ranges)}
+
+def _values_batch_update(client, sheet_id: str, worksheet_name: str, updates: List[Dict[str, Any]]) -> bool:
+    """
+    Send A1 range updates of one worksheet as a single values.batchUpdate request (no
+    open_by_key / worksheet metadata round trips). False if the client cannot send raw requests.
+    """
+    http = getattr(client, "http_client", client)  # gspread 6 moved request() to http_client
+    if not hasattr(http, "request"):
+        return False
+    tab = "'" + worksheet_name.replace("'", "''") + "'"
+    http.request(
+        "post", f"https://sheets.googleapis.com/v4/spreadsheets/{sheet_id}/values:batchUpdate",
+        json={
+            "valueInputOption": "USER_ENTERED",
+            "data": [{"range": f"{tab}!{u['range']}", "values": u["values"]} for u in updates],
+        },
+    )
+    return True
+
+def _a1(row: int, col: int) -> str:
+    """1-based (row, col) to A1 notation, e.g. (3, 28) -> "AB3"."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+def _changed_ranges(old: List[List[str]], new: List[List[str]]) -> List[Dict[str, Any]]:
+    """
+    batch_update payload turning sheet values `old` into `new`: one range per run of
+    changed cells in a row, plus blanks for rows that are no longer there.
+    """
+    width = max(len(r) for r in old + new)
+    updates = []
+    for i in range(max(len(old), len(new))):
+        before = (old[i] if i < len(old) else []) + [""] * width
+        after = (new[i] if i < len(new) else []) + [""] * width
+        col = 0
+        while col < width:
+            if before[col] == after[col]:
+                col += 1
+                continue
+            start = col
+            while col < width and before[col] != after[col]:
+                col += 1
+            updates.append({"range": f"{_a1(i + 1, start + 1)}:{_a1(i + 1, col)}", "values": [after[start:col]]})
+    return updates
+
+def _df_to_sheet(client, sheet_id: str, df: pd.DataFrame, worksheet_name: str = "Sheet1"):
+    """
+    Write DataFrame to sheet; first row = header. When the sheet was read or written before
+    with the same header, only the changed cells are sent, in one values.batchUpdate request
+    (gspread's batch_update when the client cannot send raw requests).
+    """
+    out = _stored_text(df)
+    rows = [out.columns.tolist()] + out.values.tolist()
+    key = (sheet_id, worksheet_name)
+    old = _last_known.pop(key, None)
+    if old and old[0] == rows[0]:
+        updates = _changed_ranges(old, rows)
+        if updates and not _values_batch_update(client, sheet_id, worksheet_name, updates):
+            client.open_by_key(sheet_id).worksheet(worksheet_name).batch_update(updates, value_input_option="USER_ENTERED")
+    else:
+        # Overwrite in place, then clear what lies beyond, so readers never see an empty sheet
+        sheet = client.open_by_key(sheet_id).worksheet(worksheet_name)
+        sheet.update(rows, value_input_option="USER_ENTERED")
+        leftovers = []
+        if sheet.row_count > len(rows):
+            leftovers.append(f"{len(rows) + 1}:{sheet.row_count}")
+        if sheet.col_count > len(rows[0]):
+            leftovers.append(f"{_a1(1, len(rows[0]) + 1)}:{_a1(len(rows), sheet.col_count)}")
+        if leftovers:
+            sheet.batch_clear(leftovers)
+    # Only a completed write becomes the new baseline; after a failure the next write is a full one
+    _last_known[key] = rows
+
+def _drive_version(client, sheet_id: str) -> Optional[str]:
+    """
+    The spreadsheet's Drive file version (bumped by every edit) and modifiedTime: one small
+    metadata request instead of downloading every cell.
+    """
+    http = getattr(client, "http_client", client)  # gspread 6 moved request() to http_client
+    response = http.request(
+        "get", f"https://www.googleapis.com/drive/v3/files/{sheet_id}",
+        params={"fields": "version,modifiedTime", "supportsAllDrives": True},
+    )
+    meta = response.json()
+    if not (meta.get("version") or meta.get("modifiedTime")):
+        return None
+    return f"{meta.get('version', '')}@{meta.get('modifiedTime', '')}"
+
+class SheetsBackend:
+    """
+    One Google Sheet per table by the *_SHEET_ID settings, on tab "Sheet1" unless SHEET_TABS
+    names another (so tables can share a spreadsheet); writes are cell deltas.
+    version() asks Drive for the file's version, so unchanged sheets need not be downloaded.
+    """
+
+    def sheet_id(self, table: str) -> str:
+        return {
+            "pilots": config.PILOT_SHEET_ID, "drones": config.DRONE_SHEET_ID,
+            "missions": config.MISSIONS_SHEET_ID, "assignments": config.ASSIGNMENTS_SHEET_ID,
+        }[table]
+
+    def worksheet(self, table: str) -> str:
+        return config.SHEET_TABS.get(table, "Sheet1")
+
+    def handles(self, table: str) -> bool:
+        return config.use_google_sheets() and bool(self.sheet_id(table))
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        df = self.read_tables([table])[table]
+        if isinstance(df, Exception):
+            raise df
+        return df
+
+    def read_tables(self, tables: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Several tables with one values.batchGet per spreadsheet they live in; separate
+        spreadsheets are fetched concurrently (see gather). A table whose spreadsheet could
+        not be read maps to the exception instead of a DataFrame.
+        """
+        client = _get_client()
+        by_sheet: Dict[str, List[str]] = {}
+        for table in tables:
+            by_sheet.setdefault(self.sheet_id(table), []).append(table)
+
+        def fetch(sheet_id: str, group: List[str]) -> Dict[str, pd.DataFrame]:
+            worksheets = list(dict.fromkeys(self.worksheet(t) for t in group))
+            values = _values_batch_get(client, sheet_id, worksheets)
+            frames = {}
+            for table in group:
+                name = self.worksheet(table)
+                if values is None:
+                    frames[table] = _sheet_to_df(client, sheet_id, name)
+                    continue
+                rows = _last_known[(sheet_id, name)] = values.get(name, [])
+                frames[table] = pd.DataFrame(rows[1:], columns=rows[0]) if rows else pd.DataFrame()
+            return frames
+
+        results = gather({sid: (lambda sid=sid, group=group: fetch(sid, group)) for sid, group in by_sheet.items()})
+        out: Dict[str, Any] = {}
+        for sheet_id, result in results.items():
+            out.update({t: result for t in by_sheet[sheet_id]} if isinstance(result, Exception) else result)
+        return out
+
+    def write_table(self, table: str, df: pd.DataFrame) -> None:
+        _df_to_sheet(_get_client(), self.sheet_id(table), df, self.worksheet(table))
+
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        """append_rows below the data (with a header first if the sheet is empty), keeping the delta baseline."""
+        sheet_id = self.sheet_id(table)
+        sheet = _get_client().open_by_key(sheet_id).worksheet(self.worksheet(table))
+        key = (sheet_id, self.worksheet(table))
+        known = _last_known.pop(key, None)
+        values = _stored_text(rows).values.tolist()
+        if not (known if known is not None else sheet.row_values(1)):
+            values = [list(rows.columns)] + values
+        sheet.append_rows(values, value_input_option="USER_ENTERED")
+        if known is not None:
+            _last_known[key] = (known or []) + values
+
+    def version(self, table: str) -> Optional[str]:
+        return _drive_version(_get_client(), self.sheet_id(table))
+
+# --- Local files ---
+
+class CsvBackend:
+    """data/*.csv, rewritten whole on every write."""
+
+    def path(self, table: str):
+        return config.DATA_DIR / LOCAL_FILES[table]
+
+    def handles(self, table: str) -> bool:
+        return True
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        path = self.path(table)
+        if table == "assignments":
+            if not path.exists():
+                return pd.DataFrame(columns=ASSIGNMENT_COLUMNS)
+            return pd.read_csv(path, dtype=str).reindex(columns=ASSIGNMENT_COLUMNS).fillna(EMPTY)
+        return pd.read_csv(path).fillna(EMPTY)
+
+    def write_table(self, table: str, df: pd.DataFrame) -> None:
+        df.to_csv(self.path(table), index=False)
+
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        path = self.path(table)
+        rows.to_csv(path, mode="a", index=False, header=not path.exists() or path.stat().st_size == 0)
+
+    def version(self, table: str) -> Optional[str]:
+        path = self.path(table)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+class ParquetBackend(CsvBackend):
+    """
+    data/*.parquet, all columns as text. Needs pyarrow (or fastparquet); a table with no
+    Parquet file yet starts from its CSV.
+    """
+
+    def path(self, table: str):
+        return (config.DATA_DIR / LOCAL_FILES[table]).with_suffix(".parquet")
+
+    def _require_engine(self) -> None:
+        if not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+            raise RuntimeError("Parquet storage needs pyarrow: pip install pyarrow (or set LOCAL_BACKEND=csv).")
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        self._require_engine()
+        if not self.path(table).exists():
+            return CsvBackend().read_table(table)
+        return pd.read_parquet(self.path(table)).fillna(EMPTY)
+
+    def write_table(self, table: str, df: pd.DataFrame) -> None:
+        self._require_engine()
+        _stored_text(df).to_parquet(self.path(table), index=False)
+
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        self.write_table(table, pd.concat([self.read_table(table), rows], ignore_index=True))
+
+class SqliteBackend:
+    """One WAL-mode SQLite database (see sqlite_store); tables are created from their CSV on first use."""
+
+    def handles(self, table: str) -> bool:
+        return True
+
+    def _seed(self, table: str):
+        return lambda: CsvBackend().read_table(table)
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        return sqlite_store.read_table(table, seed=self._seed(table))
+
+    def write_table(self, table: str, df: pd.DataFrame) -> None:
+        sqlite_store.write_table(table, df)
+
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        sqlite_store.append_rows(table, rows, seed=self._seed(table))
+
+    def version(self, table: str) -> Optional[str]:
+        return sqlite_store.version(table)
+
+    def select(self, table: str, **filters) -> pd.DataFrame:
+        """Filtered read in SQL (sheets_sync.query)."""
+        return sqlite_store.select(table, seed=self._seed(table), **filters)
+
+# --- In memory ---
+
+class MemoryBackend:
+    """
+    Tables held in this process, seeded from the CSVs: a fake for offline runs and tests. Every
+    call waits `delay` seconds to stand in for network latency; aread_table waits with
+    asyncio.sleep, so many concurrent async readers need no threads. Not registered by
+    default: register_backend("memory", MemoryBackend(delay=0.2)) and STORAGE_BACKEND=memory.
+    """
+
+    def __init__(self, delay: float = 0.0, tables: Optional[Dict[str, pd.DataFrame]] = None):
+        self.delay = delay
+        self.tables: Dict[str, pd.DataFrame] = {name: df.copy() for name, df in (tables or {}).items()}
+        self.versions: Dict[str, int] = {}
+        self.calls: List[Tuple[str, str]] = []  # (method, table), for tests
+        self._lock = threading.Lock()
+
+    def _table(self, table: str) -> pd.DataFrame:
+        if table not in self.tables:
+            self.tables[table] = CsvBackend().read_table(table)
+        return self.tables[table]
+
+    def _put(self, table: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self.tables[table] = _stored_text(df)
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def handles(self, table: str) -> bool:
+        return True
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        self.calls.append(("read_table", table))
+        time.sleep(self.delay)
+        return self._table(table).copy()
+
+    def write_table(self, table: str, df: pd.DataFrame) -> None:
+        self.calls.append(("write_table", table))
+        time.sleep(self.delay)
+        self._put(table, df)
+
+    def append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        self.calls.append(("append_rows", table))
+        time.sleep(self.delay)
+        self._put(table, pd.concat([self._table(table), _stored_text(rows)], ignore_index=True))
+
+    def version(self, table: str) -> Optional[str]:
+        return f"{id(self)}:{self.versions.get(table, 0)}"
+
+    async def aread_table(self, table: str) -> pd.DataFrame:
+        self.calls.append(("aread_table", table))
+        await asyncio.sleep(self.delay)
+        return self._table(table).copy()
+
+# --- Fake Google Sheets ---
+
+def _cell(a1: str) -> Tuple[int, int]:
+    """A1 cell ("AB3") to 1-based (row, col); a bare row number ("3") is column 1."""
+    letters = "".join(ch for ch in a1 if ch.isalpha())
+    col = 0
+    for ch in letters:
+        col = col * 26 + ord(ch.upper()) - 64
+    return int(a1[len(letters):]), max(col, 1)
+
+class FakeWorksheet:
+    """
+    One tab of a FakeSheetsClient: cells kept as {(row, col): text}, with the gspread
+    worksheet calls the Sheets backend makes. `edits` counts writes, and is what the fake
+    Drive version is made of.
+    """
+
+    def __init__(self, rows: Optional[List[List[Any]]] = None, row_count: int = 1000, col_count: int = 26):
+        self.cells: Dict[Tuple[int, int], str] = {}
+        self.row_count, self.col_count = row_count, col_count
+        self.edits = 0
+        self._set(1, 1, rows or [])
+        self.edits = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "FakeWorksheet":
+        out = _stored_text(df)
+        return cls([out.columns.tolist()] + out.values.tolist())
+
+    def _set(self, row: int, col: int, values: List[List[Any]]) -> None:
+        for i, cells in enumerate(values):
+            for j, value in enumerate(cells):
+                if str(value) == "":
+                    self.cells.pop((row + i, col + j), None)
+                else:
+                    self.cells[(row + i, col + j)] = str(value)
+        self.edits += 1
+
+    def get_all_values(self) -> List[List[str]]:
+        if not self.cells:
+            return []
+        height, width = max(r for r, _ in self.cells), max(c for _, c in self.cells)
+        return [[self.cells.get((r, c), "") for c in range(1, width + 1)] for r in range(1, height + 1)]
+
+    def row_values(self, row: int) -> List[str]:
+        values = self.get_all_values()
+        cells = values[row - 1] if row <= len(values) else []
+        while cells and cells[-1] == "":
+            cells = cells[:-1]
+        return cells
+
+    def update(self, values: List[List[Any]], value_input_option: Optional[str] = None) -> None:
+        self._set(1, 1, values)
+
+    def batch_update(self, data: List[Dict[str, Any]], value_input_option: Optional[str] = None) -> None:
+        for item in data:
+            self._set(*_cell(item["range"].split(":")[0]), item["values"])
+
+    def batch_clear(self, ranges: List[str]) -> None:
+        for rng in ranges:
+            (r1, c1), (r2, c2) = (_cell(part) for part in rng.split(":"))
+            if rng.split(":")[1].isdigit():
+                c2 = self.col_count
+            self.cells = {k: v for k, v in self.cells.items() if not (r1 <= k[0] <= r2 and c1 <= k[1] <= c2)}
+        self.edits += 1
+
+    def append_rows(self, values: List[List[Any]], value_input_option: Optional[str] = None) -> None:
+        self._set(len(self.get_all_values()) + 1, 1, values)
+
+class _FakeSpreadsheet:
+    def __init__(self, tabs: Dict[str, FakeWorksheet]):
+        self.tabs = tabs
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        return self.tabs[name]
+
+class _FakeResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+
+    def json(self) -> Dict[str, Any]:
+        return self.payload
+
+class FakeSheetsClient:
+    """
+    Stand-in for the authorized gspread client, for offline runs and tests: spreadsheets as
+    {spreadsheet id: {tab: FakeWorksheet}}. Answers open_by_key and the raw requests the
+    backend sends (Drive files.get, values.batchGet, values.batchUpdate), logging each in
+    `requests` as ("drive", id), ("batchGet", id, ranges) or ("batchUpdate", id, ranges).
+    Each raw request first waits `delay` seconds (or delay(url), e.g. to make one spreadsheet
+    hang); `max_in_flight` is the most requests seen waiting at once. Use it with backends._sheets_client = client.
+    """
+
+    def __init__(self, books: Dict[str, Dict[str, FakeWorksheet]], delay: Any = 0.0):
+        self.books = books
+        self.delay = delay
+        self.requests: List[Tuple[Any, ...]] = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def open_by_key(self, key: str) -> _FakeSpreadsheet:
+        return _FakeSpreadsheet(self.books[key])
+
+    def request(
+        self, method: str, url: str, params: Optional[Dict[str, Any]] = None, json: Optional[Dict[str, Any]] = None
+    ) -> _FakeResponse:
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            time.sleep(self.delay(url) if callable(self.delay) else self.delay)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if "/drive/" in url:
+            sheet_id = url.rsplit("/", 1)[1]
+            self.requests.append(("drive", sheet_id))
+            edits = sum(ws.edits for ws in self.books[sheet_id].values())
+            return _FakeResponse({"version": str(edits + 1), "modifiedTime": ""})
+        sheet_id = url.split("/spreadsheets/")[1].split("/")[0]
+        if url.endswith("values:batchUpdate"):
+            data = (json or {}).get("data", [])
+            self.requests.append(("batchUpdate", sheet_id, tuple(item["range"] for item in data)))
+            for item in data:
+                tab, a1 = item["range"].rsplit("!", 1)
+                self.books[sheet_id][tab[1:-1].replace("''", "'")].batch_update([{"range": a1, "values": item["values"]}])
+            return _FakeResponse({"totalUpdatedCells": sum(len(row) for item in data for row in item["values"])})
+        ranges = list((params or {}).get("ranges", []))
+        self.requests.append(("batchGet", sheet_id, tuple(ranges)))
+        value_ranges = []
+        for rng in ranges:
+            rows = self.books[sheet_id][rng[1:-1].replace("''", "'")].get_all_values()
+            # Like the API: trailing blank cells are left out
+            value_ranges.append({"range": rng, "values": [row[:max([i + 1 for i, v in enumerate(row) if v] or [0])] for row in rows]})
+        return _FakeResponse({"valueRanges": value_ranges})
+
+# Backends by config name; register_backend() adds or replaces one
+_BACKENDS: Dict[str, Backend] = {
+    "sheets": SheetsBackend(),
+    "csv": CsvBackend(),
+    "parquet": ParquetBackend(),
+    "sqlite": SqliteBackend(),
+}
+
+def register_backend(name: str, backend: Backend) -> None:
+    _BACKENDS[name] = backend
+
+def get_backend(name: str) -> Backend:
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name} (choose from {', '.join(_BACKENDS)})")
+    return _BACKENDS[name]
@@ -16,6 +16,15 @@ GOOGLE_CREDENTIALS_JSON_CONTENT = (os.getenv("GOOGLE_CREDENTIALS_JSON_CONTENT")
 PILOT_SHEET_ID = os.getenv("PILOT_SHEET_ID", "")
 DRONE_SHEET_ID = os.getenv("DRONE_SHEET_ID", "")
 MISSIONS_SHEET_ID = os.getenv("MISSIONS_SHEET_ID", "")
+# Optional sheet for the assignments table. With Sheets but without it there is no assignments
+# table: each pilot / drone holds one booking, in its current_assignment column
+ASSIGNMENTS_SHEET_ID = os.getenv("ASSIGNMENTS_SHEET_ID", "")
+# Tab per table when not "Sheet1", e.g. "pilots:Pilots,drones:Drones,missions:Missions", so several
+# tables can live in one spreadsheet (same *_SHEET_ID) and load with a single request
+SHEET_TABS = dict(
+    (k.strip(), v.strip()) for k, v in
+    (item.split(":", 1) for item in os.getenv("SHEET_TABS", "").split(",") if ":" in item)
+)
 
 # Resolve credentials path (used when no inline content)
 CREDENTIALS_PATH = BASE_DIR / GOOGLE_CREDENTIALS_JSON if not os.path.isabs(GOOGLE_CREDENTIALS_JSON) else Path(GOOGLE_CREDENTIALS_JSON)
@@ -26,4 +35,33 @@ def use_google_sheets() -> bool:
     has_creds = CREDENTIALS_PATH.exists() or bool(GOOGLE_CREDENTIALS_JSON_CONTENT)
     return has_sheets and has_creds
 
+# Where tables live: "sheets", "csv", "parquet" or "sqlite" (see backends.py). "auto" uses Google
+# Sheets when configured, else LOCAL_BACKEND; with a local backend chosen here, writes still go on
+# to Sheets when it is configured, as a sync target.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "auto").strip().lower()
+# Local storage when Sheets is not used: "csv" (data/*.csv), "parquet" (data/*.parquet, needs
+# pyarrow) or "sqlite" (one WAL-mode database at SQLITE_PATH); the latter two start from the CSVs
+LOCAL_BACKEND = os.getenv("LOCAL_BACKEND", "csv").strip().lower()
+SQLITE_PATH = Path(os.getenv("SQLITE_PATH") or DATA_DIR / "skylark.db")
+
+# Last-fetched tables kept on disk as Arrow files (needs pyarrow) so a restarted worker serves
+# them at once while re-fetching from Sheets in the background; SNAPSHOT_CACHE=0 disables
+SNAPSHOT_CACHE = os.getenv("SNAPSHOT_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+SNAPSHOT_CACHE_DIR = Path(os.getenv("SNAPSHOT_CACHE_DIR") or DATA_DIR / "cache")
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+# Seconds a fetched sheet stays fresh in the process-wide read cache (0 disables caching)
+SHEETS_CACHE_TTL = float(os.getenv("SHEETS_CACHE_TTL", "30"))
+# Seconds past that TTL a cached table is still served, while re-fetched in the background
+# (stale-while-revalidate); beyond it a read waits for the fetch. 0 = always wait
+SHEETS_STALE_WHILE_REVALIDATE = float(os.getenv("SHEETS_STALE_WHILE_REVALIDATE", "300"))
+# Seconds between background re-fetches of every table by the app's refresher thread (0 = off)
+SHEETS_REFRESH_INTERVAL = float(os.getenv("SHEETS_REFRESH_INTERVAL", "60"))
+# Seconds to wait for one Sheets / Drive request before giving up on it (0 = no limit)
+SHEETS_FETCH_TIMEOUT = float(os.getenv("SHEETS_FETCH_TIMEOUT", "20"))
+
+# Write-behind: seconds to hold roster/fleet writes so several updates coalesce into one
+# sheet write (0 = write through immediately), and how many queued updates force a flush
+SHEETS_WRITE_DELAY = float(os.getenv("SHEETS_WRITE_DELAY", "0"))
+SHEETS_WRITE_BATCH = int(os.getenv("SHEETS_WRITE_BATCH", "50"))
@@ -0,0 +1,154 @@
+"""
+Live conflict set maintained from roster/fleet/assignments write events.
+After a write only the rules touching the changed pilots, drones, bookings and their projects are
+re-evaluated (with the same fused engine ops uses); reads return the kept set as is.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+import ops
+import sheets_sync
+
+EMPTY = ops.EMPTY
+
+# Rules whose conflicts belong to a pilot row; drone_maintenance_assigned belongs to a drone row
+_PILOT_RULES = ("double_booking", "skill_cert_mismatch", "location_mismatch", "pilot_drone_location_mismatch")
+
+class ConflictStore:
+    """
+    Conflicts of one snapshot, grouped by the row that owns them and kept current from
+    sheets_sync write events. The whole set is rebuilt only when the snapshot is older
+    than max_age (default SHEETS_CACHE_TTL, since edits made directly in the sheet send
+    no events) or a write changes the shape of a table.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = config.SHEETS_CACHE_TTL if max_age is None else max_age
+        self._lock = threading.RLock()
+        self._snap: Optional[sheets_sync.Snapshot] = None
+        self._loaded_at = 0.0
+        # rule -> owning row position -> [(sort key, conflict)]
+        self._entries: Dict[str, Dict[int, List[Tuple[Tuple[int, ...], Dict[str, Any]]]]] = {}
+        self._view: Optional[Dict[str, List]] = None
+        self.close = sheets_sync.subscribe_writes(self._on_write)
+
+    def conflicts(self) -> Dict[str, List]:
+        """Current conflicts, same shape as ops.run_all_conflicts()."""
+        with self._lock:
+            if self._snap is None or time.monotonic() - self._loaded_at > self.max_age:
+                self._rebuild()
+            if self._view is None:
+                self._view = {
+                    rule: [c for _, c in sorted((e for found in owners.values() for e in found), key=lambda e: e[0])]
+                    for rule, owners in self._entries.items()
+                }
+            return {rule: list(found) for rule, found in self._view.items()}
+
+    def _rebuild(self) -> None:
+        self._snap = sheets_sync.load_snapshot()
+        self._loaded_at = time.monotonic()
+        self._entries = {}
+        self._merge(ops.conflict_rows(self._snap), np.arange(len(self._snap.pilots)), np.arange(len(self._snap.drones)))
+
+    def _merge(self, rows: Dict[str, List], pilot_rows: np.ndarray, drone_rows: np.ndarray) -> None:
+        """Replace the conflicts owned by pilot_rows / drone_rows with `rows`, evaluated on just those rows."""
+        for rule, found in rows.items():
+            owners = self._entries.setdefault(rule, {})
+            positions = pilot_rows if rule in _PILOT_RULES else drone_rows
+            for pos in positions:
+                owners.pop(int(pos), None)
+            for key, conflict in found:
+                # Sub-snapshot positions back to full-table positions: first is the owner, then booking
+                # seq and drone row (pilot_drone_location_mismatch) or sequence
+                full = (int(positions[key[0]]),) + key[1:]
+                if rule == "pilot_drone_location_mismatch":
+                    full = full[:2] + (int(drone_rows[key[2]]),)
+                owners.setdefault(full[0], []).append((full, conflict))
+        self._view = None
+
+    def _on_write(self, table: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            if self._snap is None:
+                return
+            try:
+                self._apply_write(table, df)
+            except Exception:
+                # The write itself succeeded, so don't fail it here; rebuild on the next read instead
+                self._snap = None
+
+    def _apply_write(self, table: str, df: pd.DataFrame) -> None:
+        old = self._snap.table(table)
+        if table == "assignments":
+            self._apply_assignments(old, df)
+            return
+        if list(old.columns) != list(df.columns) or len(old) != len(df):
+            self._snap = None
+            return
+        changed = np.flatnonzero((old.astype(str).to_numpy() != df.astype(str).to_numpy()).any(axis=1))
+        if not len(changed):
+            return
+        touched = set()
+        if table == "drones":
+            # A drone moving between projects affects the pilots on both of them
+            for frame in (old, df):
+                touched |= set(frame["current_assignment"].iloc[changed].astype(str).str.strip())
+            booked = ops.bookings(self._snap, "drones")
+            touched |= set(booked["key"][np.isin(booked["row"], changed)])
+        self._snap.replace(table, df.copy())
+        if table == "pilots":
+            self._reevaluate(changed, np.empty(0, dtype=int), touched)
+        else:
+            self._reevaluate(np.empty(0, dtype=int), changed, touched - {EMPTY})
+
+    def _apply_assignments(self, old: pd.DataFrame, df: pd.DataFrame) -> None:
+        """Bookings added or removed (a multiset diff of rows): re-check their pilots, drones and projects."""
+        columns = sheets_sync.ASSIGNMENT_COLUMNS
+        before = old.reindex(columns=columns).astype(str).apply(lambda c: c.str.strip())
+        after = df.reindex(columns=columns).astype(str).apply(lambda c: c.str.strip())
+        counts = pd.concat([before.assign(n=-1), after.assign(n=1)]).groupby(columns).n.sum()
+        diff = counts[counts != 0].index.to_frame(index=False)
+        self._snap.replace("assignments", df.copy())
+        if diff.empty:
+            return
+        kind = diff["resource_type"].str.lower()
+        pilot_ids, drone_ids = set(diff["resource_id"][kind == "pilot"]), set(diff["resource_id"][kind == "drone"])
+        pilot_rows = np.flatnonzero(self._snap.pilots["pilot_id"].astype(str).str.strip().isin(pilot_ids).to_numpy())
+        drone_rows = np.flatnonzero(self._snap.drones["drone_id"].astype(str).str.strip().isin(drone_ids).to_numpy())
+        # A drone joining or leaving a project affects the pilots on it
+        self._reevaluate(pilot_rows, drone_rows, set(diff["project_id"][kind == "drone"]))
+
+    def _reevaluate(self, pilot_rows: np.ndarray, drone_rows: np.ndarray, touched_projects: set) -> None:
+        pilots, drones = self._snap.pilots, self._snap.drones
+        booked = ops.bookings(self._snap, "pilots")
+        on_touched = booked["row"][np.isin(booked["key"], list(touched_projects))]
+        # Double booking pairs rows of the same pilot_id, so take every row of each affected pilot
+        pilot_rows = np.union1d(pilot_rows, on_touched).astype(int)
+        pilot_rows = np.flatnonzero(pilots["pilot_id"].isin(pilots["pilot_id"].iloc[pilot_rows]).to_numpy())
+        crews = set(booked["key"][np.isin(booked["row"], pilot_rows)])
+        d_booked = ops.bookings(self._snap, "drones")
+        drone_rows = np.union1d(drone_rows, d_booked["row"][np.isin(d_booked["key"], list(crews))]).astype(int)
+        # Store bookings sit on every row of a drone, so take them all
+        drone_rows = np.flatnonzero(drones["drone_id"].isin(drones["drone_id"].iloc[drone_rows]).to_numpy())
+        sub = sheets_sync.Snapshot(pilots.iloc[pilot_rows], drones.iloc[drone_rows], self._snap.missions, self._snap.assignments)
+        # Missions and assignments did not change here: reuse their indexes instead of rebuilding them for the sub-snapshot
+        sub.derived.update({k: v for k, v in self._snap.derived.items() if k[1] in ("missions", "assignments")})
+        self._merge(ops.conflict_rows(sub), pilot_rows, drone_rows)
+
+_store: Optional[ConflictStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> ConflictStore:
+    """Process-wide store, created (and subscribed to writes) on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConflictStore()
+        return _store
+
+def current_conflicts() -> Dict[str, List]:
+    return get_store().conflicts()
@@ -1,9 +1,17 @@
 """
 Core operations: roster, assignments, drone inventory, conflict detection.
 Uses sheets_sync for read/write; normalizes "–" for empty assignment.
+Every function takes an optional sheets_sync.Snapshot so a whole turn or batch job
+shares one consistent, once-loaded view of the sheets. The per-snapshot indexes
+(snapshot, derived, id_rows, records, column_strings, column_dates, bookings, the
+eligible_*_rows filters and conflict_rows) are public for planner, availability and
+conflict_store; everything prefixed with _ is internal to this module.
 """
-from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set, Tuple
+import heapq
+import numpy as np
 import pandas as pd
 import re
 
@@ -23,23 +31,295 @@ def _has_skill_or_cert(holder_list: List[str], required: str) -> bool:
     holder_set = {x.strip().lower() for x in holder_list}
     return any(r.strip().lower() in holder_set for r in req)
 
-def _date_parse(d: str) -> Optional[datetime]:
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y")
+
+def parse_date(d: str) -> Optional[datetime]:
     if pd.isna(d) or str(d).strip() in ("", EMPTY):
         return None
-    s = str(d).strip()
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
+    return _parse_date_text(str(d).strip())
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(s: str) -> Optional[datetime]:
+    for fmt in _DATE_FORMATS:
         try:
             return datetime.strptime(s, fmt)
         except ValueError:
             continue
     return None
 
-def _overlap(s1: str, e1: str, s2: str, e2: str) -> bool:
-    a, b = _date_parse(s1), _date_parse(e1)
-    c, d = _date_parse(s2), _date_parse(e2)
-    if not all([a, b, c, d]):
-        return False
-    return not (b < c or d < a)
+def snapshot(snap: Optional[sheets_sync.Snapshot]) -> sheets_sync.Snapshot:
+    """Use the caller's snapshot, or start a lazily-loaded one for this call."""
+    return snap if snap is not None else sheets_sync.Snapshot()
+
+def derived(snap: sheets_sync.Snapshot, key: Tuple, build):
+    """Build a per-snapshot index once and keep it in snap.derived until a table changes."""
+    if key not in snap.derived:
+        snap.derived[key] = build()
+    return snap.derived[key]
+
+def _token_matrix(snap: sheets_sync.Snapshot, table: str, column: str) -> pd.DataFrame:
+    """
+    Multi-hot matrix for a comma/semicolon list column: one row per table row (by position),
+    one bool column per lowercase token. Tokenized once per snapshot, same rules as _parse_list.
+    """
+    def build():
+        df = snap.table(table)
+        col = df[column] if column in df.columns else pd.Series(EMPTY, index=df.index)
+        text = col.where(col.notna(), EMPTY).astype(str).reset_index(drop=True)
+        text = text[~text.str.strip().isin(["", EMPTY])]
+        tokens = text.str.split(r"[,;]", regex=True).explode().str.strip()
+        tokens = tokens[tokens != ""].str.lower()
+        codes, vocab = pd.factorize(tokens)
+        hot = np.zeros((len(df), len(vocab)), dtype=bool)
+        hot[tokens.index.to_numpy(dtype=int), codes] = True
+        return pd.DataFrame(hot, columns=vocab)
+    return derived(snap, ("tokens", table, column), build)
+
+class InvertedIndex:
+    """
+    Postings from each token to the sorted row positions holding it, for one snapshot table.
+    List columns (skills, certifications, capabilities) are posted per lowercase token and
+    value columns (location, status) per stripped value, so "who has skill X and cert Y in
+    location Z" is an intersection of a few postings instead of a scan over every row.
+    """
+
+    def __init__(self, df: pd.DataFrame, id_column: str, token_matrices: Dict[str, pd.DataFrame], value_fields: Tuple[str, ...]):
+        self.size = len(df)
+        self.ids = df[id_column].astype(str).str.strip().to_numpy()
+        self.list_fields = tuple(token_matrices)
+        self.value_fields = value_fields
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+        for field, matrix in token_matrices.items():
+            self.postings[field] = {tok: np.flatnonzero(matrix[tok].to_numpy()) for tok in matrix.columns}
+        for field in value_fields:
+            if field not in df.columns:
+                self.postings[field] = {}
+                continue
+            values = df[field].astype(str).str.strip().to_numpy()
+            self.postings[field] = {
+                key: np.asarray(rows, dtype=np.intp)
+                for key, rows in pd.Series(np.arange(self.size)).groupby(values).indices.items()
+            }
+
+    def any_of(self, field: str, tokens: List[str]) -> np.ndarray:
+        """Union of postings: rows holding at least one of the tokens (case-insensitive)."""
+        wanted = {str(t).strip().lower() for t in tokens}
+        hits = [rows for key, rows in self.postings.get(field, {}).items() if key.lower() in wanted]
+        return self.union(*hits)
+
+    def equal_to(self, field: str, value: str) -> np.ndarray:
+        """Rows whose stripped value is exactly `value`."""
+        return self.postings.get(field, {}).get(str(value).strip(), np.empty(0, dtype=np.intp))
+
+    def select(self, *row_sets: Optional[np.ndarray]) -> np.ndarray:
+        """Intersection of row sets; None means unconstrained. Returns sorted row positions."""
+        rows = np.arange(self.size)
+        for r in row_sets:
+            if r is not None:
+                rows = np.intersect1d(rows, r, assume_unique=True)
+        return rows
+
+    @staticmethod
+    def union(*row_sets: np.ndarray) -> np.ndarray:
+        # One sort of the concatenation, not a pairwise union1d per posting
+        rows = np.sort(np.concatenate([np.empty(0, dtype=np.intp), *row_sets]))
+        return rows[np.concatenate(([True], rows[1:] != rows[:-1]))] if len(rows) else rows
+
+    def ids_of(self, rows: np.ndarray) -> List[str]:
+        return self.ids[rows].tolist()
+
+    def update_rows(self, df: pd.DataFrame, rows: np.ndarray) -> None:
+        """Re-post rows whose values changed in a write, keeping every other posting as is."""
+        for pos in rows:
+            row = df.iloc[pos]
+            for field in self.list_fields + self.value_fields:
+                book = self.postings[field]
+                for key, posting in list(book.items()):
+                    i = np.searchsorted(posting, pos)
+                    if i < len(posting) and posting[i] == pos:
+                        book[key] = np.delete(posting, i)
+                if field in self.list_fields:
+                    keys = {t.lower() for t in _parse_list(row.get(field, ""))}
+                elif field in df.columns:
+                    keys = {str(row[field]).strip()}
+                else:
+                    keys = set()
+                for key in keys:
+                    posting = book.get(key, np.empty(0, dtype=np.intp))
+                    book[key] = np.insert(posting, np.searchsorted(posting, pos), pos)
+
+# table -> (id column, list columns, value columns) covered by its InvertedIndex
+_INDEX_FIELDS = {
+    "pilots": ("pilot_id", ("skills", "certifications"), ("location", "status")),
+    "drones": ("drone_id", ("capabilities",), ("location", "status")),
+}
+
+def _index(snap: sheets_sync.Snapshot, table: str) -> InvertedIndex:
+    id_column, list_fields, value_fields = _INDEX_FIELDS[table]
+    return derived(snap, ("index", table), lambda: InvertedIndex(
+        snap.table(table), id_column, {f: _token_matrix(snap, table, f) for f in list_fields}, value_fields
+    ))
+
+def _rows_with_any(index: InvertedIndex, field: str, required: Optional[str]) -> Optional[np.ndarray]:
+    """Rows holding any token of `required`; None when nothing is required (no constraint)."""
+    req = _parse_list(required)
+    return index.any_of(field, req) if req else None
+
+def _commit_to_snapshot(snap: Optional[sheets_sync.Snapshot], table: str, df: pd.DataFrame, changed: Optional[pd.Series] = None) -> None:
+    """After a write, swap the new table into the caller's snapshot and patch its index in place (if it has one)."""
+    if snap is None:
+        return
+    if table not in _INDEX_FIELDS:
+        snap.replace(table, df)
+        return
+    index = snap.derived.get(("index", table))
+    id_column = _INDEX_FIELDS[table][0]
+    same_rows = index is not None and index.ids.tolist() == df[id_column].astype(str).str.strip().tolist()
+    snap.replace(table, df)
+    if same_rows:
+        index.update_rows(df, np.flatnonzero(changed.to_numpy()))
+        snap.derived[("index", table)] = index
+
+# table -> id column used by the hash indexes below
+ID_COLUMNS = {"pilots": "pilot_id", "drones": "drone_id", "missions": "project_id"}
+
+def id_rows(snap: sheets_sync.Snapshot, table: str) -> Dict[str, int]:
+    """Stripped id -> row position of its first row, so id lookups are O(1) instead of a column scan."""
+    def build():
+        ids = snap.table(table)[ID_COLUMNS[table]].astype(str).str.strip().tolist()
+        rows: Dict[str, int] = {}
+        for pos, key in enumerate(ids):
+            rows.setdefault(key, pos)
+        return rows
+    return derived(snap, ("ids", table), build)
+
+def _rows_by(snap: sheets_sync.Snapshot, table: str, column: str) -> Dict[str, np.ndarray]:
+    """Stripped value -> row positions holding it (e.g. drones grouped by current_assignment)."""
+    def build():
+        values = snap.table(table)[column].astype(str).str.strip().to_numpy()
+        return pd.Series(np.arange(len(values))).groupby(values).indices
+    return derived(snap, ("groups", table, column), build)
+
+def records(snap: sheets_sync.Snapshot, table: str) -> List[Dict[str, Any]]:
+    """Rows as dicts by position, for loops that would otherwise call iterrows/iloc per row."""
+    return derived(snap, ("records", table), lambda: snap.table(table).to_dict("records"))
+
+def column_dates(snap: sheets_sync.Snapshot, table: str, column: str) -> np.ndarray:
+    """
+    datetime64 values of a date column by row position (NaT when empty or unparseable),
+    parsed once per snapshot. Same formats, in the same order, as parse_date.
+    """
+    def build():
+        df = snap.table(table)
+        col = df[column] if column in df.columns else pd.Series(EMPTY, index=df.index)
+        text = col.where(col.notna(), EMPTY).astype(str).str.strip().reset_index(drop=True)
+        out = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+        pending = ~text.isin(["", EMPTY])
+        for fmt in _DATE_FORMATS:
+            if not pending.any():
+                break
+            out[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+            pending &= out.isna()
+        return out.to_numpy()
+    return derived(snap, ("dates", table, column), build)
+
+# --- Bookings ---
+
+# table -> resource_type used for its rows in the assignments table
+_RESOURCE_TYPES = {"pilots": "pilot", "drones": "drone"}
+
+# Roster / fleet status of a resource holding a booking in its current_assignment column
+_BOOKED_STATUS = {"pilots": "Assigned", "drones": "Deployed"}
+
+def bookings(snap: sheets_sync.Snapshot, table: str) -> Dict[str, np.ndarray]:
+    """
+    Every booking of a pilot or drone table as parallel arrays sorted by (row, seq): each
+    row's current_assignment (seq 0) and, on every row of the resource, its rows in the
+    assignments table (seq = assignments position + 1; the first row per resource and
+    project wins). Blank start/end dates fall back to the mission's, so start/end are NaT
+    only when neither is known. Keys: row, seq, key (stripped project id), project (as
+    written), start, end, start_text, end_text. Cached per snapshot.
+    """
+    def build():
+        project_rows, missions = id_rows(snap, "missions"), records(snap, "missions")
+        intervals = _mission_intervals(snap)
+        no_date = np.datetime64("NaT")
+
+        def mission_text(key: str, column: str) -> Any:
+            pos = project_rows.get(key)
+            return missions[pos].get(column, EMPTY) if pos is not None else EMPTY
+
+        resources = records(snap, table)
+        assign = column_strings(snap, table, "current_assignment")
+        out: Dict[str, List[Any]] = {c: [] for c in ("row", "seq", "key", "project", "start", "end", "start_text", "end_text")}
+        for row in np.flatnonzero(assign != EMPTY):
+            key = assign[row]
+            span = intervals.get(key, (no_date, no_date))
+            for column, value in zip(out, (row, 0, key, resources[row].get("current_assignment", ""), span[0], span[1],
+                                           mission_text(key, "start_date"), mission_text(key, "end_date"))):
+                out[column].append(value)
+
+        kind = column_strings(snap, "assignments", "resource_type", lower=True)
+        resource_ids = column_strings(snap, "assignments", "resource_id")
+        keys = column_strings(snap, "assignments", "project_id")
+        own_starts, own_ends = column_dates(snap, "assignments", "start_date"), column_dates(snap, "assignments", "end_date")
+        start_texts, end_texts = column_strings(snap, "assignments", "start_date"), column_strings(snap, "assignments", "end_date")
+        projects = records(snap, "assignments")
+        rows_of = _rows_by(snap, table, ID_COLUMNS[table])
+        seen = set()
+        for i in np.flatnonzero(kind == _RESOURCE_TYPES[table]):
+            rid, key = resource_ids[i], keys[i]
+            if rid not in rows_of or (rid, key) in seen:
+                continue
+            seen.add((rid, key))
+            span = intervals.get(key, (no_date, no_date))
+            start = own_starts[i] if not np.isnat(own_starts[i]) else span[0]
+            end = own_ends[i] if not np.isnat(own_ends[i]) else span[1]
+            start_text = start_texts[i] if start_texts[i] not in ("", EMPTY) else mission_text(key, "start_date")
+            end_text = end_texts[i] if end_texts[i] not in ("", EMPTY) else mission_text(key, "end_date")
+            for row in rows_of[rid]:
+                for column, value in zip(out, (row, i + 1, key, projects[i]["project_id"], start, end, start_text, end_text)):
+                    out[column].append(value)
+
+        arrays = {c: np.array(v, dtype=object) for c, v in out.items()}
+        arrays["row"], arrays["seq"] = np.array(out["row"], dtype=int), np.array(out["seq"], dtype=int)
+        arrays["start"] = np.array(out["start"], dtype="datetime64[ns]")
+        arrays["end"] = np.array(out["end"], dtype="datetime64[ns]")
+        order = np.lexsort((arrays["seq"], arrays["row"]))
+        return {c: v[order] for c, v in arrays.items()}
+    return derived(snap, ("bookings", (table, "missions", "assignments")), build)
+
+def _booked_during(snap: sheets_sync.Snapshot, table: str, rows: np.ndarray, proj_pos: int) -> np.ndarray:
+    """
+    Mask over `rows`: the resource (by id, so any of its rows) holds a booking overlapping
+    the dates of the mission at proj_pos. Undated missions and bookings never overlap.
+    """
+    start, end = (column_dates(snap, "missions", c)[proj_pos] for c in ("start_date", "end_date"))
+    if np.isnat(start) or np.isnat(end) or not len(rows):
+        return np.zeros(len(rows), dtype=bool)
+    booked = bookings(snap, table)
+    # NaT never compares true, so undated bookings drop out here
+    hit = booked["row"][(booked["start"] <= end) & (booked["end"] >= start)]
+    if not len(hit):
+        return np.zeros(len(rows), dtype=bool)
+    ids = column_strings(snap, table, ID_COLUMNS[table])
+    return np.isin(ids[rows], np.unique(ids[hit]))
+
+def get_assignments(snap: Optional[sheets_sync.Snapshot] = None) -> pd.DataFrame:
+    """Every pilot and drone booking, from current_assignment and the assignments table, one row per resource and project."""
+    snap = snapshot(snap)
+    frames = []
+    for table, kind in _RESOURCE_TYPES.items():
+        booked = bookings(snap, table)
+        ids = column_strings(snap, table, ID_COLUMNS[table])[booked["row"]]
+        frames.append(pd.DataFrame({
+            "resource_type": kind,
+            "resource_id": ids,
+            "project_id": booked["project"],
+            "start_date": booked["start_text"],
+            "end_date": booked["end_text"],
+        }).drop_duplicates(["resource_id", "project_id"]))
+    return pd.concat(frames, ignore_index=True)
 
 # --- Roster ---
 
@@ -48,26 +328,43 @@ def get_pilots(
     certification: Optional[str] = None,
     location: Optional[str] = None,
     status: Optional[str] = None,
+    snap: Optional[sheets_sync.Snapshot] = None,
 ) -> pd.DataFrame:
-    df = sheets_sync.read_pilot_roster()
-    if skill:
-        df = df[df.apply(lambda r: _has_skill_or_cert(_parse_list(r.get("skills", "")), skill), axis=1)]
-    if certification:
-        df = df[df.apply(lambda r: _has_skill_or_cert(_parse_list(r.get("certifications", "")), certification), axis=1)]
-    if location:
-        loc = str(location).strip().lower()
-        df = df[df["location"].astype(str).str.strip().str.lower() == loc]
-    if status:
-        st = str(status).strip()
-        df = df[df["status"].astype(str).str.strip() == st]
-    return df.reset_index(drop=True)
-
-def get_current_assignments() -> pd.DataFrame:
-    df = sheets_sync.read_pilot_roster()
+    if snap is None:
+        # No snapshot to stay consistent with: let the storage filter, if it can. The agent always
+        # passes its turn's snapshot, so this serves scripts and other direct callers
+        found = sheets_sync.query(
+            "pilots",
+            equal={k: v for k, v in (("location", location), ("status", status)) if v},
+            any_token={k: _parse_list(v) for k, v in (("skills", skill), ("certifications", certification)) if v},
+        )
+        if found is not None:
+            return found
+    snap = snapshot(snap)
+    index = _index(snap, "pilots")
+    rows = index.select(
+        _rows_with_any(index, "skills", skill) if skill else None,
+        _rows_with_any(index, "certifications", certification) if certification else None,
+        index.any_of("location", [location]) if location else None,
+        index.equal_to("status", status) if status else None,
+    )
+    return snap.pilots.iloc[rows].reset_index(drop=True)
+
+def get_current_assignments(snap: Optional[sheets_sync.Snapshot] = None) -> pd.DataFrame:
+    if snap is None:
+        found = sheets_sync.query("pilots", not_equal={"current_assignment": EMPTY})
+        if found is not None:
+            return found
+    df = snapshot(snap).pilots
     return df[df["current_assignment"].astype(str).str.strip() != EMPTY].reset_index(drop=True)
 
-def update_pilot_status(pilot_id: str, new_status: str) -> None:
-    """Update pilot status and sync to sheet. Allowed: Available, On Leave, Unavailable, Assigned."""
+def update_pilot_status(pilot_id: str, new_status: str, snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """
+    Update pilot status and sync to sheet. Allowed: Available, On Leave, Unavailable, Assigned.
+    Any status but Assigned releases the pilot: current_assignment is cleared and their rows
+    in the assignments table are removed. The write always starts from the latest roster;
+    a passed snapshot is refreshed with the result.
+    """
     allowed = {"Available", "On Leave", "Unavailable", "Assigned"}
     new_status = str(new_status).strip()
     if new_status not in allowed:
@@ -81,86 +378,326 @@ def update_pilot_status(pilot_id: str, new_status: str) -> None:
     if new_status != "Assigned":
         df.loc[mask, "current_assignment"] = EMPTY
     sheets_sync.write_pilot_roster(df)
+    _commit_to_snapshot(snap, "pilots", df, mask)
+    if new_status != "Assigned":
+        _drop_bookings(snap, "pilots", pid)
+
+def _booking_rows(table: pd.DataFrame, resources: str, rid: str) -> pd.Series:
+    """Mask of the assignments-table rows of one pilot or drone."""
+    kind = table["resource_type"].astype(str).str.strip().str.lower() == _RESOURCE_TYPES[resources]
+    return kind & (table["resource_id"].astype(str).str.strip() == rid)
+
+def _drop_bookings(snap: Optional[sheets_sync.Snapshot], resources: str, rid: str) -> None:
+    """Remove a pilot's or drone's rows from the assignments table (no write when it has none)."""
+    table = sheets_sync.read_assignments()
+    drop = _booking_rows(table, resources, rid)
+    if drop.any():
+        kept = table[~drop].reset_index(drop=True)
+        sheets_sync.write_assignments(kept)
+        _commit_to_snapshot(snap, "assignments", kept)
 
 # --- Assignments & matching ---
 
-def get_missions() -> pd.DataFrame:
-    return sheets_sync.read_missions()
+def get_missions(snap: Optional[sheets_sync.Snapshot] = None) -> pd.DataFrame:
+    return snapshot(snap).missions.copy()
 
-def match_pilots_to_project(project_id: str) -> List[Dict[str, Any]]:
-    """Return pilots who match project location, skills, certs and are available (or explicitly include assigned)."""
-    missions = sheets_sync.read_missions()
-    proj = missions[missions["project_id"].astype(str).str.strip() == str(project_id).strip()]
-    if proj.empty:
-        return []
-    proj = proj.iloc[0]
+def eligible_pilot_rows(snap: sheets_sync.Snapshot, proj_pos: int) -> np.ndarray:
+    """
+    Pilots matching the mission at proj_pos on location, skills, certs and available_from,
+    Available or Assigned (booked, but eligible while no booking overlaps it).
+    """
+    proj = records(snap, "missions")[proj_pos]
     loc = str(proj.get("location", "")).strip()
     req_skills = str(proj.get("required_skills", "")).strip()
     req_certs = str(proj.get("required_certs", "")).strip()
-    start = proj.get("start_date")
-    end = proj.get("end_date")
-
-    pilots = sheets_sync.read_pilot_roster()
-    available = pilots[
-        (pilots["status"].astype(str).str.strip().str.lower() == "available")
-        & (pilots["location"].astype(str).str.strip().str.lower() == loc.lower())
+    start_d = column_dates(snap, "missions", "start_date")[proj_pos]
+
+    # Candidates come from posting intersections, shared by missions with the same profile;
+    # only the date check looks at rows
+    index = _index(snap, "pilots")
+    rows = derived(snap, ("eligible", "pilots", loc.lower(), req_skills.lower(), req_certs.lower()), lambda: index.select(
+        index.any_of("status", ["available", _BOOKED_STATUS["pilots"]]),
+        index.any_of("location", [loc]),
+        _rows_with_any(index, "skills", req_skills),
+        _rows_with_any(index, "certifications", req_certs),
+    ))
+    if not np.isnat(start_d):
+        avail_from = column_dates(snap, "pilots", "available_from")[rows]
+        rows = rows[np.isnat(avail_from) | (avail_from <= start_d)]
+    return rows[~_booked_during(snap, "pilots", rows, proj_pos)]
+
+# Weights of the ranked match score (see _match_scores); slack counts up to MATCH_SLACK_CAP_DAYS
+MATCH_WEIGHTS = {"skills": 1.0, "certs": 1.0, "slack": 0.5, "utilization": -1.0}
+MATCH_SLACK_CAP_DAYS = 14
+
+def _utilization(snap: sheets_sync.Snapshot) -> np.ndarray:
+    """Per pilot row: share of that pilot_id's roster rows holding a booking."""
+    def build():
+        assigned = np.zeros(len(snap.pilots), dtype=float)
+        assigned[bookings(snap, "pilots")["row"]] = 1.0
+        assigned = pd.Series(assigned)
+        return assigned.groupby(column_strings(snap, "pilots", "pilot_id")).transform("mean").to_numpy()
+    return derived(snap, ("utilization", ("pilots", "missions", "assignments")), build)
+
+def _match_scores(snap: sheets_sync.Snapshot, proj_pos: int, rows: np.ndarray) -> np.ndarray:
+    """
+    Score candidate pilot rows for a mission, vectorized: required skills held (count),
+    required certs held (share, 1 when none are listed), days between available_from and
+    the start (capped, 0 when either is unknown) and current utilization, weighted by
+    MATCH_WEIGHTS.
+    """
+    proj = records(snap, "missions")[proj_pos]
+    held = {}
+    for part, column, required in (("skills", "skills", "required_skills"), ("certs", "certifications", "required_certs")):
+        req = list(dict.fromkeys(t.lower() for t in _parse_list(proj.get(required, ""))))
+        matrix = _token_matrix(snap, "pilots", column)
+        cols = [t for t in req if t in matrix.columns]
+        count = matrix[cols].to_numpy()[rows].sum(axis=1) if cols else np.zeros(len(rows))
+        held[part] = (count, len(req))
+    certs, n_certs = held["certs"]
+    slack = (column_dates(snap, "missions", "start_date")[proj_pos] - column_dates(snap, "pilots", "available_from")[rows]) / np.timedelta64(1, "D")
+    slack = np.clip(np.nan_to_num(slack, nan=0.0), 0, MATCH_SLACK_CAP_DAYS) / MATCH_SLACK_CAP_DAYS
+    return (
+        MATCH_WEIGHTS["skills"] * held["skills"][0]
+        + MATCH_WEIGHTS["certs"] * (certs / n_certs if n_certs else 1.0)
+        + MATCH_WEIGHTS["slack"] * slack
+        + MATCH_WEIGHTS["utilization"] * _utilization(snap)[rows]
+    )
+
+def match_pilots_to_project(
+    project_id: str, snap: Optional[sheets_sync.Snapshot] = None, top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Return pilots who match project location, skills, certs and are free on its dates
+    (Available, or Assigned with no overlapping booking), per eligible_pilot_rows.
+    With top_k, return only the best top_k by _match_scores, best first, each with its "score".
+    """
+    snap = snapshot(snap)
+    proj_pos = id_rows(snap, "missions").get(str(project_id).strip())
+    if proj_pos is None:
+        return []
+    rows = eligible_pilot_rows(snap, proj_pos)
+    scores = None
+    if top_k is not None:
+        # Heap selection over the scored candidates: O(n log k), and only k rows become dicts
+        scored = _match_scores(snap, proj_pos, rows)
+        best = heapq.nlargest(max(int(top_k), 0), range(len(rows)), key=lambda i: (scored[i], -i))
+        rows, scores = rows[best], scored[best]
+    matches = [
+        {
+            "pilot_id": r["pilot_id"],
+            "name": r["name"],
+            "skills": r.get("skills", ""),
+            "certifications": r.get("certifications", ""),
+            "location": r["location"],
+            "status": r["status"],
+        }
+        for r in snap.pilots.iloc[rows].to_dict("records")
     ]
-    out = []
-    for _, r in available.iterrows():
-        skills_ok = _has_skill_or_cert(_parse_list(r.get("skills", "")), req_skills)
-        certs_ok = _has_skill_or_cert(_parse_list(r.get("certifications", "")), req_certs)
-        avail_from = _date_parse(r.get("available_from"))
-        start_d = _date_parse(start)
-        available_in_time = (start_d is None or avail_from is None) or avail_from <= start_d
-        if skills_ok and certs_ok and available_in_time:
-            out.append({
-                "pilot_id": r["pilot_id"],
-                "name": r["name"],
-                "skills": r.get("skills", ""),
-                "certifications": r.get("certifications", ""),
-                "location": r["location"],
-                "status": r["status"],
-            })
-    return out
-
-def assign_pilot_to_project(pilot_id: str, project_id: str) -> None:
-    """Assign pilot to project; update roster and sync. Raises if double-book (overlapping dates)."""
-    missions = sheets_sync.read_missions()
-    proj = missions[missions["project_id"].astype(str).str.strip() == str(project_id).strip()]
-    if proj.empty:
-        raise ValueError(f"Project not found: {project_id}")
-    proj_row = proj.iloc[0]
-    proj_name = str(proj_row.get("project_id", project_id))
-    new_start, new_end = proj_row["start_date"], proj_row["end_date"]
-
-    df = sheets_sync.read_pilot_roster()
-    pid = str(pilot_id).strip()
-    mask = df["pilot_id"].astype(str).str.strip() == pid
-    if not mask.any():
-        raise ValueError(f"Pilot not found: {pilot_id}")
-    current_assign = df.loc[mask, "current_assignment"].iloc[0]
-    if str(current_assign).strip() != EMPTY:
-        existing = missions[missions["project_id"].astype(str).str.strip() == str(current_assign).strip()]
-        if not existing.empty:
-            ex = existing.iloc[0]
-            if _overlap(ex["start_date"], ex["end_date"], new_start, new_end):
-                raise ValueError(
-                    f"Double-booking: {pid} is already on {current_assign} with overlapping dates. "
-                    "Unassign first or choose a different pilot."
+    if scores is not None:
+        for match, score in zip(matches, scores):
+            match["score"] = round(float(score), 3)
+    return matches
+
+def _dates_overlap(a: Optional[Tuple[Any, Any]], b: Optional[Tuple[Any, Any]]) -> bool:
+    # Missions with missing or unparseable dates never count as overlapping
+    return a is not None and b is not None and not (a[1] < b[0] or b[1] < a[0])
+
+def assign_pilot_to_project(pilot_id: str, project_id: str, snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """Book pilot on project (roster status Assigned). Raises if double-book (overlapping dates)."""
+    assign_pilots_to_projects([(pilot_id, project_id)], snap=snap)
+
+def _booking_span(booked: Dict[str, np.ndarray], i: int) -> Optional[Tuple[Any, Any]]:
+    start, end = booked["start"][i], booked["end"][i]
+    return None if np.isnat(start) or np.isnat(end) else (start, end)
+
+def _new_bookings(
+    snap: sheets_sync.Snapshot, table: str, pairs: List[Tuple[str, str]]
+) -> Tuple[sheets_sync.Snapshot, Dict[str, str], pd.DataFrame]:
+    """
+    Check (resource id, project id) pairs for a pilot or drone table against the latest
+    roster/fleet and assignments, and against each other. Back-to-back bookings are fine;
+    overlapping ones are not. A resource with an empty current_assignment takes its first
+    new booking there; any further ones become rows of the assignments table. Returns
+    (latest tables, {resource id: project for current_assignment}, rows to append);
+    raises ValueError listing every problem.
+    """
+    noun = _RESOURCE_TYPES[table]
+    reader = {"pilots": sheets_sync.read_pilot_roster, "drones": sheets_sync.read_drone_fleet}[table]
+    latest = sheets_sync.Snapshot(**{table: reader(), "missions": snap.missions, "assignments": sheets_sync.read_assignments()})
+    latest.derived.update({k: v for k, v in snap.derived.items() if k[1] == "missions"})
+    project_rows, projects = id_rows(latest, "missions"), records(latest, "missions")
+    intervals = _mission_intervals(latest)
+    rows_of = _rows_by(latest, table, ID_COLUMNS[table])
+    booked = bookings(latest, table)
+    held: Dict[str, List[int]] = {}
+    for i, rid in enumerate(column_strings(latest, table, ID_COLUMNS[table])[booked["row"]]):
+        held.setdefault(rid, []).append(i)
+
+    errors: List[str] = []
+    planned: Dict[str, List[Tuple[str, str]]] = {}  # resource id -> [(project key, project name)]
+    hold: Dict[str, str] = {}
+    new = []
+    for resource_id, project_id in pairs:
+        rid, key = str(resource_id).strip(), str(project_id).strip()
+        proj_pos = project_rows.get(key)
+        if proj_pos is None:
+            errors.append(f"Project not found: {project_id}")
+            continue
+        if rid not in rows_of:
+            errors.append(f"{noun.capitalize()} not found: {resource_id}")
+            continue
+        problem = None
+        for i in held.get(rid, []):
+            if booked["key"][i] == key:
+                problem = f"{rid} is already on {booked['project'][i]}."
+            elif _dates_overlap(_booking_span(booked, i), intervals.get(key)):
+                problem = (
+                    f"Double-booking: {rid} is already on {booked['project'][i]} with overlapping dates. "
+                    f"Unassign first or choose a different {noun}."
                 )
-    df.loc[mask, "status"] = "Assigned"
-    df.loc[mask, "current_assignment"] = proj_name
-    sheets_sync.write_pilot_roster(df)
+            if problem:
+                break
+        for other_key, other in planned.get(rid, []):
+            if problem:
+                break
+            if other_key == key:
+                problem = f"{rid} is in this batch twice for {project_id}."
+            elif _dates_overlap(intervals.get(other_key), intervals.get(key)):
+                problem = f"Double-booking: {rid} is in this batch for both {other} and {project_id} with overlapping dates."
+        if problem:
+            errors.append(problem)
+            continue
+        name = str(projects[proj_pos].get("project_id", project_id))
+        planned.setdefault(rid, []).append((key, name))
+        if rid not in hold and not any(booked["seq"][i] == 0 for i in held.get(rid, [])):
+            hold[rid] = name
+        else:
+            new.append((noun, rid, name, EMPTY, EMPTY))
+    if errors:
+        raise ValueError("\n".join(errors))
+    return latest, hold, pd.DataFrame(new, columns=sheets_sync.ASSIGNMENT_COLUMNS)
+
+def _assign(snap: Optional[sheets_sync.Snapshot], pairs_by_table: Dict[str, List[Tuple[str, str]]]) -> None:
+    """
+    Validate every pair first, then write: free resources get the project as current_assignment
+    (one roster / fleet write per table), and bookings of resources already holding one are
+    appended to the assignments table in one write (dates left blank, so they follow the
+    mission). All or nothing: raises ValueError and writes nothing if any pair is invalid,
+    and undoes the writes already made if a later one fails.
+    """
+    snap = snapshot(snap)
+    errors: List[str] = []
+    checked = []
+    for table, pairs in pairs_by_table.items():
+        try:
+            checked.append((table, *_new_bookings(snap, table, pairs)))
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError("\n".join(errors))
+    rows = pd.concat([rows for *_, rows in checked], ignore_index=True)
+    if not rows.empty and not sheets_sync.has_assignments_table():
+        # Refuse before writing anything rather than book half the batch
+        raise ValueError("\n".join(
+            f"{rid} already holds a booking, and without an assignments sheet (ASSIGNMENTS_SHEET_ID) "
+            f"it cannot also take {project}."
+            for rid, project in zip(rows["resource_id"], rows["project_id"])
+        ))
+    writes = []
+    for table, latest, hold, _ in checked:
+        if not hold:
+            continue
+        before = latest.table(table)
+        df = before.copy()
+        ids = df[ID_COLUMNS[table]].astype(str).str.strip()
+        mask = ids.isin(list(hold))
+        df.loc[mask, "current_assignment"] = ids[mask].map(hold)
+        df.loc[mask, "status"] = _BOOKED_STATUS[table]
+        writes.append((table, before, df, mask))
+    # Append first, so a failed append has written nothing; if a roster / fleet write fails
+    # after it, put back everything already written before re-raising
+    writers = {
+        "pilots": sheets_sync.write_pilot_roster, "drones": sheets_sync.write_drone_fleet,
+        "assignments": sheets_sync.write_assignments,
+    }
+    done = []
+    try:
+        if not rows.empty:
+            sheets_sync.append_assignments(rows)
+            done.append(("assignments", checked[-1][1].assignments))
+        for table, before, df, _ in writes:
+            writers[table](df)
+            done.append((table, before))
+    except Exception:
+        for table, before in reversed(done):
+            try:
+                writers[table](before)
+            except Exception:
+                pass  # the original error is the one worth reporting
+        raise
+    for table, _, df, mask in writes:
+        _commit_to_snapshot(snap, table, df, mask)
+    if not rows.empty:
+        _commit_to_snapshot(snap, "assignments", pd.concat([checked[-1][1].assignments, rows], ignore_index=True))
+
+def assign_pilots_to_projects(pairs: List[Tuple[str, str]], snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """
+    Book many pilots in one go: every pair is validated against the same missions and
+    bookings (including overlaps between the pairs themselves), then written together: a
+    pilot with no current_assignment takes the project there (status Assigned), any other
+    booking is appended to the assignments table. All or nothing: raises ValueError listing
+    every problem and writes nothing.
+    """
+    _assign(snap, {"pilots": pairs})
 
-def unassign_pilot(pilot_id: str) -> None:
+def assign_drones_to_projects(pairs: List[Tuple[str, str]], snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """Book drones on projects, validated and written like assign_pilots_to_projects."""
+    _assign(snap, {"drones": pairs})
+
+def assign_crews(crews: List[Tuple[str, str, str]], snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """Book (pilot_id, drone_id, project_id) crews: both sides validated, then one append."""
+    _assign(snap, {
+        "pilots": [(pilot_id, project_id) for pilot_id, _, project_id in crews],
+        "drones": [(drone_id, project_id) for _, drone_id, project_id in crews],
+    })
+
+def unassign_pilot(pilot_id: str, snap: Optional[sheets_sync.Snapshot] = None, project_id: Optional[str] = None) -> None:
+    """
+    Release a pilot from everything (roster status back to Available), or with project_id
+    from that project only: its current_assignment and/or its rows in the assignments table.
+    When the released project was the current_assignment and other bookings remain, the
+    first of them moves into current_assignment and the pilot stays Assigned.
+    """
     df = sheets_sync.read_pilot_roster()
     pid = str(pilot_id).strip()
     mask = df["pilot_id"].astype(str).str.strip() == pid
     if not mask.any():
         raise ValueError(f"Pilot not found: {pilot_id}")
-    df.loc[mask, "status"] = "Available"
-    df.loc[mask, "current_assignment"] = EMPTY
-    sheets_sync.write_pilot_roster(df)
+    table = sheets_sync.read_assignments()
+    booked = drop = _booking_rows(table, "pilots", pid)
+    if project_id is not None:
+        key = str(project_id).strip()
+        mask &= df["current_assignment"].astype(str).str.strip() == key
+        drop = booked & (table["project_id"].astype(str).str.strip() == key)
+        if not (mask.any() or drop.any()):
+            raise ValueError(f"{pid} is not on {project_id}")
+    if mask.any():
+        rest = np.flatnonzero((booked & ~drop).to_numpy())
+        if len(rest):
+            # Still booked elsewhere: the next booking moves into the roster
+            df.loc[mask, "current_assignment"] = table["project_id"].iloc[rest[0]]
+            drop = drop.copy()
+            drop.iloc[rest[0]] = True
+        else:
+            df.loc[mask, "status"] = "Available"
+            df.loc[mask, "current_assignment"] = EMPTY
+        sheets_sync.write_pilot_roster(df)
+        _commit_to_snapshot(snap, "pilots", df, mask)
+    if drop.any():
+        kept = table[~drop].reset_index(drop=True)
+        sheets_sync.write_assignments(kept)
+        _commit_to_snapshot(snap, "assignments", kept)
 
 # --- Drone inventory ---
 
@@ -168,27 +705,68 @@ def get_drones(
     capability: Optional[str] = None,
     status: Optional[str] = None,
     location: Optional[str] = None,
+    snap: Optional[sheets_sync.Snapshot] = None,
 ) -> pd.DataFrame:
-    df = sheets_sync.read_drone_fleet()
-    if capability:
-        df = df[df.apply(lambda r: _has_skill_or_cert(_parse_list(r.get("capabilities", "")), capability), axis=1)]
-    if status:
-        st = str(status).strip()
-        df = df[df["status"].astype(str).str.strip() == st]
-    if location:
-        loc = str(location).strip().lower()
-        df = df[df["location"].astype(str).str.strip().str.lower() == loc]
-    return df.reset_index(drop=True)
-
-def get_maintenance_due() -> pd.DataFrame:
-    df = sheets_sync.read_drone_fleet()
-    today = datetime.now().date()
-    def is_due(val):
-        d = _date_parse(val)
-        return d is not None and d.date() <= today
-    return df[df["maintenance_due"].apply(is_due)].reset_index(drop=True)
-
-def update_drone_status(drone_id: str, new_status: str) -> None:
+    if snap is None:
+        found = sheets_sync.query(
+            "drones",
+            equal={k: v for k, v in (("status", status), ("location", location)) if v},
+            any_token={"capabilities": _parse_list(capability)} if capability else None,
+        )
+        if found is not None:
+            return found
+    snap = snapshot(snap)
+    index = _index(snap, "drones")
+    rows = index.select(
+        _rows_with_any(index, "capabilities", capability) if capability else None,
+        index.equal_to("status", status) if status else None,
+        index.any_of("location", [location]) if location else None,
+    )
+    return snap.drones.iloc[rows].reset_index(drop=True)
+
+def get_maintenance_due(snap: Optional[sheets_sync.Snapshot] = None) -> pd.DataFrame:
+    if snap is None:
+        found = sheets_sync.query("drones", on_or_before={"maintenance_due": datetime.now().date().isoformat()})
+        if found is not None:
+            return found
+    snap = snapshot(snap)
+    # Due on or before today == strictly before tomorrow's midnight (NaT never compares true)
+    tomorrow = np.datetime64(datetime.now().date() + timedelta(days=1))
+    due = column_dates(snap, "drones", "maintenance_due") < tomorrow
+    return snap.drones[due].reset_index(drop=True)
+
+# Mission skill -> drone capabilities that can fly it (any one will do). A skill missing
+# here is looked up as a capability of the same name.
+SKILL_CAPABILITIES: Dict[str, Tuple[str, ...]] = {
+    "mapping": ("RGB", "LiDAR"),
+    "inspection": ("RGB",),
+    "survey": ("RGB",),
+    "thermal": ("Thermal",),
+}
+
+def eligible_drone_rows(snap: sheets_sync.Snapshot, proj_pos: int) -> np.ndarray:
+    """
+    Available or Deployed drones at the mission's location with a capability for any of its
+    required skills (via SKILL_CAPABILITIES), whose maintenance is not due before the mission
+    ends (or by today, for undated missions) and with no booking overlapping it.
+    """
+    proj = records(snap, "missions")[proj_pos]
+    loc = str(proj.get("location", "")).strip()
+    skills = [s.lower() for s in _parse_list(proj.get("required_skills", ""))]
+    caps = sorted({c for s in skills for c in SKILL_CAPABILITIES.get(s, (s,))})
+    index = _index(snap, "drones")
+    rows = derived(snap, ("eligible", "drones", loc.lower(), tuple(caps)), lambda: index.select(
+        index.union(index.equal_to("status", "Available"), index.equal_to("status", _BOOKED_STATUS["drones"])),
+        index.any_of("location", [loc]),
+        index.any_of("capabilities", caps) if caps else None,
+    ))
+    ends = [column_dates(snap, "missions", c)[proj_pos] for c in ("end_date", "start_date")]
+    last_day = next((d for d in ends if not np.isnat(d)), np.datetime64(datetime.now().date()))
+    due = column_dates(snap, "drones", "maintenance_due")[rows]
+    rows = rows[np.isnat(due) | (due > last_day)]
+    return rows[~_booked_during(snap, "drones", rows, proj_pos)]
+
+def update_drone_status(drone_id: str, new_status: str, snap: Optional[sheets_sync.Snapshot] = None) -> None:
     allowed = {"Available", "Maintenance", "Deployed"}
     new_status = str(new_status).strip()
     if new_status not in allowed:
@@ -202,165 +780,218 @@ def update_drone_status(drone_id: str, new_status: str) -> None:
     if new_status == "Available":
         df.loc[mask, "current_assignment"] = EMPTY
     sheets_sync.write_drone_fleet(df)
+    _commit_to_snapshot(snap, "drones", df, mask)
+    if new_status == "Available":
+        _drop_bookings(snap, "drones", did)
 
 # --- Conflict detection ---
 
-def check_pilot_double_booking() -> List[Dict[str, Any]]:
-    """Pilots assigned to overlapping project date ranges."""
-    pilots = sheets_sync.read_pilot_roster()
-    missions = sheets_sync.read_missions()
-    assigned = pilots[pilots["current_assignment"].astype(str).str.strip() != EMPTY]
-    conflicts = []
-    for _, p in assigned.iterrows():
-        pid, name, assign = p["pilot_id"], p["name"], p["current_assignment"]
-        projs = missions[missions["project_id"].astype(str).str.strip() == str(assign).strip()]
-        if projs.empty:
-            continue
-        p1 = projs.iloc[0]
-        s1, e1 = p1["start_date"], p1["end_date"]
-        for _, p2 in missions.iterrows():
-            if str(p2["project_id"]).strip() == str(assign).strip():
+def _mission_intervals(snap: sheets_sync.Snapshot) -> Dict[str, Tuple[np.datetime64, np.datetime64, int]]:
+    """project_id -> (start, end, row position) for missions with parseable dates; first row per id wins."""
+    def build():
+        ids = snap.missions["project_id"].astype(str).str.strip().reset_index(drop=True)
+        starts = column_dates(snap, "missions", "start_date")
+        ends = column_dates(snap, "missions", "end_date")
+        first = np.flatnonzero(~ids.duplicated().to_numpy())
+        dated = first[~np.isnat(starts[first]) & ~np.isnat(ends[first])]
+        return {ids[pos]: (starts[pos], ends[pos], int(pos)) for pos in dated}
+    return derived(snap, ("intervals", "missions"), build)
+
+def _overlapping_bookings(spans) -> Set[Tuple[Any, str, str]]:
+    """
+    Sweep-line over (resource_id, project_id, start, end) bookings in start order.
+    Each resource keeps a min-heap of its active bookings keyed by end date, so finished
+    ones are dropped as the sweep advances. Inverted intervals (end before start) are
+    typos, not bookings, and are skipped. Returns (resource_id, project_a, project_b)
+    for every overlapping pair, in both directions. O(B log B + overlaps).
+    """
+    active: Dict[Any, List[Tuple[np.datetime64, str]]] = {}
+    pairs: Set[Tuple[Any, str, str]] = set()
+    valid = [b for b in spans if not b[3] < b[2]]
+    for rid, proj, start, end in sorted(valid, key=lambda b: b[2]):
+        heap = active.setdefault(rid, [])
+        while heap and heap[0][0] < start:
+            heapq.heappop(heap)
+        for _, other in heap:
+            if other != proj:
+                pairs.add((rid, proj, other))
+                pairs.add((rid, other, proj))
+        heapq.heappush(heap, (end, proj))
+    return pairs
+
+def column_strings(snap: sheets_sync.Snapshot, table: str, column: str, lower: bool = False) -> np.ndarray:
+    """Stripped (optionally lowercased) string values of a column by row position; "" if the column is missing."""
+    def build():
+        df = snap.table(table)
+        if column not in df.columns:
+            return np.full(len(df), "", dtype=object)
+        col = df[column].astype(str).str.strip()
+        return (col.str.lower() if lower else col).to_numpy(dtype=object)
+    return derived(snap, ("strings", table, column, lower), build)
+
+def _covers(snap: sheets_sync.Snapshot, holder: Tuple[str, str], required: Tuple[str, str], holder_rows: np.ndarray, required_rows: np.ndarray) -> np.ndarray:
+    """
+    Vectorized _has_skill_or_cert over row pairs: does each holder row hold any token its
+    paired required row lists (True when nothing is listed)? Uses the token matrices.
+    """
+    held, needed = _token_matrix(snap, *holder), _token_matrix(snap, *required)
+    lists_any = needed.to_numpy()[required_rows].any(axis=1)
+    shared = [tok for tok in needed.columns if tok in held.columns]
+    if not shared:
+        return ~lists_any
+    hit = (held[shared].to_numpy()[holder_rows] & needed[shared].to_numpy()[required_rows]).any(axis=1)
+    return ~lists_any | hit
+
+def conflict_rows(snap: sheets_sync.Snapshot) -> Dict[str, List[Tuple[Tuple[int, ...], Dict[str, Any]]]]:
+    """
+    All conflict rules in one pass over one join. Pilot bookings (bookings) are joined to
+    their mission (first row per project_id) and to the drone bookings on the same project,
+    by row position; every rule is then a vectorized mask over that join, and only flagged
+    rows are turned into the dicts the check_* functions have always returned. Each conflict
+    comes with its sort key (pilot row, booking seq, then drone row or sequence; drone row
+    for maintenance), which is the report order. Cached per snapshot.
+    """
+    def build():
+        pilots, drones, missions = records(snap, "pilots"), records(snap, "drones"), records(snap, "missions")
+        booked = bookings(snap, "pilots")
+        b_rows, b_seq, b_keys, b_projects = booked["row"], booked["seq"], booked["key"], booked["project"]
+        # bookings ⋈ missions
+        project_rows = id_rows(snap, "missions")
+        m_rows = pd.Series(b_keys, dtype=object).map(project_rows).fillna(-1).to_numpy(dtype=int)
+        jb, jm = np.flatnonzero(m_rows >= 0), m_rows[m_rows >= 0]
+        jp = b_rows[jb]
+        skills_ok = _covers(snap, ("pilots", "skills"), ("missions", "required_skills"), jp, jm)
+        certs_ok = _covers(snap, ("pilots", "certifications"), ("missions", "required_certs"), jp, jm)
+        req_skills = column_strings(snap, "missions", "required_skills")
+        req_certs = column_strings(snap, "missions", "required_certs")
+        skill_cert = [
+            ((p, b_seq[b]), {
+                "pilot_id": pilots[p]["pilot_id"],
+                "pilot_name": pilots[p]["name"],
+                "project": b_projects[b],
+                "missing_skills": req_skills[m] if not s_ok else None,
+                "missing_certs": req_certs[m] if not c_ok else None,
+            })
+            for b, p, m, s_ok, c_ok in zip(jb, jp, jm, skills_ok, certs_ok)
+            if not (s_ok and c_ok)
+        ]
+        away = column_strings(snap, "pilots", "location", lower=True)[jp] != column_strings(snap, "missions", "location", lower=True)[jm]
+        location = [
+            ((p, b_seq[b]), {
+                "pilot_id": pilots[p]["pilot_id"],
+                "pilot_name": pilots[p]["name"],
+                "pilot_location": pilots[p]["location"],
+                "project": b_projects[b],
+                "project_location": missions[m]["location"],
+            })
+            for b, p, m in zip(jb[away], jp[away], jm[away])
+        ]
+        # Double booking: sweep the dated (pilot, project) bookings, first booking per pair
+        dated: Dict[Tuple[Any, str], int] = {}
+        for b in np.flatnonzero(~np.isnat(booked["start"]) & ~np.isnat(booked["end"])):
+            dated.setdefault((pilots[b_rows[b]]["pilot_id"], b_keys[b]), b)
+        overlaps: Dict[Tuple[Any, str], List[str]] = {}
+        spans = ((pid, key, booked["start"][b], booked["end"][b]) for (pid, key), b in dated.items())
+        for pid, proj_a, proj_b in _overlapping_bookings(spans):
+            overlaps.setdefault((pid, proj_a), []).append(proj_b)
+        double = []
+        for b, p in enumerate(b_rows):
+            pid = pilots[p]["pilot_id"]
+            others = overlaps.get((pid, b_keys[b]))
+            if not others:
                 continue
-            if _overlap(s1, e1, p2["start_date"], p2["end_date"]):
-                # Check if same pilot is also assigned to p2 (e.g. via another source)
-                other = assigned[assigned["current_assignment"].astype(str).str.strip() == str(p2["project_id"]).strip()]
-                if not other.empty and (other["pilot_id"] == pid).any():
-                    conflicts.append({
-                        "pilot_id": pid,
-                        "pilot_name": name,
-                        "project_a": assign,
-                        "project_b": p2["project_id"],
-                        "dates_a": (s1, e1),
-                        "dates_b": (p2["start_date"], p2["end_date"]),
-                    })
-    return conflicts
-
-def check_skill_cert_mismatch() -> List[Dict[str, Any]]:
-    """Pilots assigned to a project that requires skills/certs they don't have."""
-    pilots = sheets_sync.read_pilot_roster()
-    missions = sheets_sync.read_missions()
-    mismatches = []
-    for _, p in pilots.iterrows():
-        assign = p.get("current_assignment", "")
-        if str(assign).strip() == EMPTY:
-            continue
-        projs = missions[missions["project_id"].astype(str).str.strip() == str(assign).strip()]
-        if projs.empty:
-            continue
-        proj = projs.iloc[0]
-        req_skills = str(proj.get("required_skills", "")).strip()
-        req_certs = str(proj.get("required_certs", "")).strip()
-        skills_ok = _has_skill_or_cert(_parse_list(p.get("skills", "")), req_skills)
-        certs_ok = _has_skill_or_cert(_parse_list(p.get("certifications", "")), req_certs)
-        if not skills_ok or not certs_ok:
-            mismatches.append({
-                "pilot_id": p["pilot_id"],
-                "pilot_name": p["name"],
-                "project": assign,
-                "missing_skills": req_skills if not skills_ok else None,
-                "missing_certs": req_certs if not certs_ok else None,
+            first = dated[(pid, b_keys[b])]
+            # Report in mission-sheet order, like the sheet the coordinator is looking at
+            for seq, proj_b in enumerate(sorted(others, key=lambda k: (project_rows.get(k, len(missions)), k))):
+                other = dated[(pid, proj_b)]
+                double.append(((p, b_seq[b], seq), {
+                    "pilot_id": pid,
+                    "pilot_name": pilots[p]["name"],
+                    "project_a": b_projects[b],
+                    "project_b": missions[project_rows[proj_b]]["project_id"] if proj_b in project_rows else b_projects[other],
+                    "dates_a": (booked["start_text"][first], booked["end_text"][first]),
+                    "dates_b": (booked["start_text"][other], booked["end_text"][other]),
+                }))
+        # pilot bookings ⋈ drone bookings on the same project (the project need not be in missions)
+        d_booked = bookings(snap, "drones")
+        crew = pd.merge(
+            pd.DataFrame({"b": np.arange(len(b_rows)), "p": b_rows, "s": b_seq, "key": b_keys}),
+            pd.DataFrame({"d": d_booked["row"], "key": d_booked["key"]}),
+            on="key",
+        ).drop_duplicates(["p", "s", "d"]).sort_values(["p", "s", "d"])
+        cb, cp, cd = (crew[c].to_numpy(dtype=int) for c in ("b", "p", "d"))
+        apart = column_strings(snap, "pilots", "location", lower=True)[cp] != column_strings(snap, "drones", "location", lower=True)[cd]
+        pilot_drone = [
+            ((p, b_seq[b], d), {
+                "pilot_id": pilots[p]["pilot_id"],
+                "pilot_name": pilots[p]["name"],
+                "pilot_location": pilots[p]["location"],
+                "drone_id": drones[d].get("drone_id"),
+                "drone_location": drones[d].get("location"),
+                "project": b_projects[b],
             })
-    return mismatches
+            for b, p, d in zip(cb[apart], cp[apart], cd[apart])
+        ]
+        grounded = (column_strings(snap, "drones", "status", lower=True) == "maintenance") & np.isin(np.arange(len(drones)), d_booked["row"])
+        return {
+            "double_booking": double,
+            "skill_cert_mismatch": skill_cert,
+            "drone_maintenance_assigned": [((d,), dict(drones[d])) for d in np.flatnonzero(grounded)],
+            "location_mismatch": location,
+            "pilot_drone_location_mismatch": pilot_drone,
+        }
+    return derived(snap, ("conflict_rows", ("pilots", "drones", "missions", "assignments")), build)
+
+def _conflict_engine(snap: sheets_sync.Snapshot) -> Dict[str, List[Dict[str, Any]]]:
+    """Conflicts by rule, in report order, without their sort keys."""
+    return derived(snap, ("conflicts", ("pilots", "drones", "missions", "assignments")), lambda: {
+        rule: [conflict for _, conflict in found] for rule, found in conflict_rows(snap).items()
+    })
+
+def check_pilot_double_booking(snap: Optional[sheets_sync.Snapshot] = None) -> List[Dict[str, Any]]:
+    """Pilots assigned to overlapping project date ranges."""
+    return list(_conflict_engine(snapshot(snap))["double_booking"])
+
+def check_skill_cert_mismatch(snap: Optional[sheets_sync.Snapshot] = None) -> List[Dict[str, Any]]:
+    """Pilots assigned to a project that requires skills/certs they don't have."""
+    return list(_conflict_engine(snapshot(snap))["skill_cert_mismatch"])
 
-def check_drone_maintenance_assigned() -> List[Dict[str, Any]]:
+def check_drone_maintenance_assigned(snap: Optional[sheets_sync.Snapshot] = None) -> List[Dict[str, Any]]:
     """Drones in Maintenance but still have an assignment (or flagged as deployed)."""
-    df = sheets_sync.read_drone_fleet()
-    return df[
-        (df["status"].astype(str).str.strip().str.lower() == "maintenance")
-        & (df["current_assignment"].astype(str).str.strip() != EMPTY)
-    ].to_dict("records")
+    return list(_conflict_engine(snapshot(snap))["drone_maintenance_assigned"])
 
-def check_location_mismatch() -> List[Dict[str, Any]]:
+def check_location_mismatch(snap: Optional[sheets_sync.Snapshot] = None) -> List[Dict[str, Any]]:
     """Pilot and their assigned project in different locations."""
-    pilots = sheets_sync.read_pilot_roster()
-    missions = sheets_sync.read_missions()
-    mismatches = []
-    for _, p in pilots.iterrows():
-        assign = p.get("current_assignment", "")
-        if str(assign).strip() == EMPTY:
-            continue
-        projs = missions[missions["project_id"].astype(str).str.strip() == str(assign).strip()]
-        if projs.empty:
-            continue
-        proj = projs.iloc[0]
-        ploc = str(p.get("location", "")).strip().lower()
-        mloc = str(proj.get("location", "")).strip().lower()
-        if ploc != mloc:
-            mismatches.append({
-                "pilot_id": p["pilot_id"],
-                "pilot_name": p["name"],
-                "pilot_location": p["location"],
-                "project": assign,
-                "project_location": proj["location"],
-            })
-    return mismatches
+    return list(_conflict_engine(snapshot(snap))["location_mismatch"])
 
-def check_pilot_drone_location_mismatch() -> List[Dict[str, Any]]:
+def check_pilot_drone_location_mismatch(snap: Optional[sheets_sync.Snapshot] = None) -> List[Dict[str, Any]]:
     """Pilot and assigned drone in different locations (same project). Edge case."""
-    pilots = sheets_sync.read_pilot_roster()
-    drones = sheets_sync.read_drone_fleet()
-    missions = sheets_sync.read_missions()
-    mismatches = []
-    for _, p in pilots.iterrows():
-        assign = p.get("current_assignment", "")
-        if str(assign).strip() == EMPTY:
-            continue
-        ploc = str(p.get("location", "")).strip().lower()
-        # Drones assigned to same project
-        assigned_drones = drones[
-            (drones["current_assignment"].astype(str).str.strip() == str(assign).strip())
-        ]
-        for _, d in assigned_drones.iterrows():
-            dloc = str(d.get("location", "")).strip().lower()
-            if ploc != dloc:
-                mismatches.append({
-                    "pilot_id": p["pilot_id"],
-                    "pilot_name": p["name"],
-                    "pilot_location": p["location"],
-                    "drone_id": d.get("drone_id"),
-                    "drone_location": d.get("location"),
-                    "project": assign,
-                })
-    return mismatches
-
-def run_all_conflicts() -> Dict[str, List]:
-    return {
-        "double_booking": check_pilot_double_booking(),
-        "skill_cert_mismatch": check_skill_cert_mismatch(),
-        "drone_maintenance_assigned": check_drone_maintenance_assigned(),
-        "location_mismatch": check_location_mismatch(),
-        "pilot_drone_location_mismatch": check_pilot_drone_location_mismatch(),
-    }
+    return list(_conflict_engine(snapshot(snap))["pilot_drone_location_mismatch"])
+
+def run_all_conflicts(snap: Optional[sheets_sync.Snapshot] = None) -> Dict[str, List]:
+    """Every conflict rule, evaluated together by the fused engine (one join, one pass)."""
+    return {rule: list(found) for rule, found in _conflict_engine(snapshot(snap)).items()}
 
 # --- Urgent reassignments ---
 
-def suggest_urgent_reassignment(project_id: str, reason: str = "") -> Dict[str, Any]:
+def suggest_urgent_reassignment(
+    project_id: str, reason: str = "", snap: Optional[sheets_sync.Snapshot] = None
+) -> Dict[str, Any]:
     """
     For an urgent project: find best available pilots and drones; flag conflicts.
     reason can be e.g. 'pilot unavailable', 'drone in maintenance'.
+    All lookups share one snapshot, so each sheet is read once.
     """
-    missions = sheets_sync.read_missions()
-    proj = missions[missions["project_id"].astype(str).str.strip() == str(project_id).strip()]
-    if proj.empty:
+    snap = snapshot(snap)
+    proj_pos = id_rows(snap, "missions").get(str(project_id).strip())
+    if proj_pos is None:
         return {"error": f"Project not found: {project_id}"}
-    proj = proj.iloc[0]
-    loc = str(proj.get("location", "")).strip()
-    req_skills = str(proj.get("required_skills", "")).strip()
-    req_certs = str(proj.get("required_certs", "")).strip()
-    req_cap = req_skills  # map skill to capability: Mapping->RGB/LiDAR, Inspection->RGB, Thermal->Thermal
-
-    pilots = match_pilots_to_project(project_id)
-    drones = get_drones(location=loc, status="Available")
-    # Filter drones by capability overlap
-    cap_map = {"mapping": "rgb lidar", "inspection": "rgb", "survey": "rgb", "thermal": "thermal"}
-    need_caps = [cap_map.get(s.strip().lower(), s.strip().lower()) for s in _parse_list(req_skills)]
-    def drone_ok(d):
-        caps = " ".join(_parse_list(d.get("capabilities", ""))).lower()
-        return any(n in caps for n in need_caps) if need_caps else True
-    drones = drones[drones.apply(drone_ok, axis=1)]
-
-    maintenance_due = get_drones(status="Maintenance")
-    conflicts = run_all_conflicts()
+
+    pilots = match_pilots_to_project(project_id, snap)
+    drones = snap.drones.iloc[eligible_drone_rows(snap, proj_pos)]
+
+    maintenance_due = get_drones(status="Maintenance", snap=snap)
+    conflicts = run_all_conflicts(snap)
 
     return {
         "project_id": project_id,
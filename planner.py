@@ -0,0 +1,226 @@
+"""
+Staffing planner: proposes pilots (or pilot + drone crews) for many open missions at once.
+A plan is a plain dict; commit_plan() / commit_crews() book it in the assignments table
+with one append.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import ops
+import sheets_sync
+
+# Mission priority -> weight; anything else counts as Standard
+PRIORITY_WEIGHTS = {"urgent": 3, "high": 2, "standard": 1}
+
+# "auto" plans exactly up to this many eligible (resource, mission) pairs, greedily above it
+EXACT_MAX_EDGES = 2_000_000
+
+_METHODS = ("auto", "optimal", "greedy")
+
+def _open_missions(snap: sheets_sync.Snapshot) -> List[str]:
+    """Missions no pilot is booked on, in sheet order."""
+    taken = set(ops.bookings(snap, "pilots")["key"])
+    return [pid for pid in ops.id_rows(snap, "missions") if pid not in taken]
+
+def _mission_order(snap: sheets_sync.Snapshot, project_ids: List[str]) -> List[int]:
+    """Row positions of project_ids: highest weight first, then earliest start (undated last), then sheet order."""
+    project_rows = ops.id_rows(snap, "missions")
+    priority = ops.column_strings(snap, "missions", "priority", lower=True)
+    starts = ops.column_dates(snap, "missions", "start_date")
+    positions = list(dict.fromkeys(project_rows[p] for p in (str(x).strip() for x in project_ids) if p in project_rows))
+    positions.sort(key=lambda pos: (
+        -PRIORITY_WEIGHTS.get(priority[pos], 1),
+        np.isnat(starts[pos]),
+        starts[pos] if not np.isnat(starts[pos]) else np.datetime64(0, "ns"),
+        pos,
+    ))
+    return positions
+
+def _options(
+    snap: sheets_sync.Snapshot, table: str, positions: List[int], eligible: Callable[[sheets_sync.Snapshot, int], np.ndarray]
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Per mission, the resources of `table` it may take (`eligible` rows, which already
+    excludes anyone booked over the mission), as codes into the returned ids. Within a
+    mission, resources fewest missions can use come first, keeping flexible ones for later.
+    """
+    codes, ids = pd.factorize(ops.column_strings(snap, table, ops.ID_COLUMNS[table]))
+    adj = [pd.unique(codes[eligible(snap, pos)]) for pos in positions]
+    demand = np.bincount(np.concatenate([np.empty(0, dtype=int), *adj]), minlength=len(ids))
+    return [a[np.argsort(demand[a], kind="stable")] for a in adj], np.asarray(ids, dtype=object)
+
+class _Matcher:
+    """
+    Missions-to-resources matching grown one mission at a time. find() looks for a free
+    resource, else (exact mode) an augmenting path (BFS) that moves earlier picks to other
+    resources to free one; apply() commits what find() returned. Resources reached by a
+    failed search stay marked until a search succeeds: the matching has not changed, so
+    they cannot lead to a free resource.
+    """
+
+    def __init__(self, adj: List[np.ndarray], n_resources: int, exact: bool):
+        self.adj = adj
+        self.exact = exact
+        self.resource_of = [-1] * len(adj)
+        self.mission_of = np.full(n_resources, -1)
+        self._seen = np.zeros(n_resources, dtype=bool)
+        self._seen_list: List[int] = []
+
+    def find(self, m: int) -> Optional[List[Tuple[int, int]]]:
+        """(mission, resource) links that staff mission m, or None."""
+        cands = self.adj[m]
+        free = cands[self.mission_of[cands] < 0]
+        if len(free) or not self.exact:
+            return [(m, int(free[0]))] if len(free) else None
+        parent: Dict[int, int] = {}
+        queue, found, head = [m], -1, 0
+        while head < len(queue) and found < 0:
+            mm = queue[head]
+            head += 1
+            reached = self.adj[mm][~self._seen[self.adj[mm]]]
+            self._seen[reached] = True
+            self._seen_list.extend(reached.tolist())
+            for r in reached.tolist():
+                parent[r] = mm
+            owners = self.mission_of[reached]
+            if (owners < 0).any():
+                found = int(reached[np.argmax(owners < 0)])
+            else:
+                queue.extend(owners.tolist())
+        if found < 0:
+            return None
+        self._seen[self._seen_list] = False
+        self._seen_list = []
+        path, r = [], found
+        while True:
+            mm = parent[r]
+            path.append((mm, r))
+            if mm == m:
+                return path
+            r = self.resource_of[mm]
+
+    def apply(self, path: List[Tuple[int, int]]) -> None:
+        for mm, r in path:
+            self.resource_of[mm], self.mission_of[r] = r, mm
+
+def _method(method: str, *adjs: List[np.ndarray]) -> str:
+    if method not in _METHODS:
+        raise ValueError(f"Unknown planning method: {method}")
+    if method == "auto":
+        n_edges = sum(len(a) for adj in adjs for a in adj)
+        method = "optimal" if n_edges <= EXACT_MAX_EDGES else "greedy"
+    return method
+
+def _first_values(snap: sheets_sync.Snapshot, table: str, column: str) -> Dict[str, Any]:
+    """Resource id -> `column` of its first row."""
+    values: Dict[str, Any] = {}
+    for rid, row in zip(ops.column_strings(snap, table, ops.ID_COLUMNS[table]), ops.records(snap, table)):
+        values.setdefault(rid, row.get(column, ""))
+    return values
+
+def plan_assignments(
+    project_ids: Optional[List[str]] = None,
+    method: str = "auto",
+    snap: Optional[sheets_sync.Snapshot] = None,
+) -> Dict[str, Any]:
+    """
+    Propose at most one pilot per mission and one new mission per pilot per plan for
+    project_ids, default every open mission. Eligibility is the same as
+    ops.match_pilots_to_project (which skips pilots booked over the mission).
+
+    "optimal" maximizes priority-weighted coverage. The weight belongs to the mission alone,
+    so serving missions in priority order with augmenting paths reaches the same optimum a
+    min-cost (Hungarian) matching would, for any weights that keep Urgent > High > Standard,
+    without building a dense pilots x missions cost matrix. "greedy" gives each mission its
+    least-contended free candidate in one pass. "auto" is optimal up to EXACT_MAX_EDGES
+    candidate pairs.
+
+    Returns {"assignments": [{project_id, pilot_id, name, priority}], "unstaffed": [project_id], "method": str}.
+    """
+    snap = ops.snapshot(snap)
+    positions = _mission_order(snap, _open_missions(snap) if project_ids is None else project_ids)
+    adj, pilot_ids = _options(snap, "pilots", positions, ops.eligible_pilot_rows)
+    method = _method(method, adj)
+    matcher = _Matcher(adj, len(pilot_ids), exact=method == "optimal")
+    for m in range(len(positions)):
+        path = matcher.find(m)
+        if path:
+            matcher.apply(path)
+
+    names = _first_values(snap, "pilots", "name")
+    projects = ops.records(snap, "missions")
+    assignments, unstaffed = [], []
+    for pos, pick in zip(positions, matcher.resource_of):
+        proj = projects[pos]
+        if pick < 0:
+            unstaffed.append(proj["project_id"])
+            continue
+        pid = pilot_ids[pick]
+        assignments.append({
+            "project_id": proj["project_id"],
+            "pilot_id": pid,
+            "name": names.get(pid, ""),
+            "priority": proj.get("priority", ""),
+        })
+    return {"assignments": assignments, "unstaffed": unstaffed, "method": method}
+
+def plan_crews(
+    project_ids: Optional[List[str]] = None,
+    method: str = "auto",
+    snap: Optional[sheets_sync.Snapshot] = None,
+) -> Dict[str, Any]:
+    """
+    Propose a (pilot, drone) crew per mission for project_ids, default every open mission,
+    using no pilot or drone twice. Pilots are eligible as in plan_assignments; drones as in
+    ops.eligible_drone_rows (available or deployed on other dates, at the mission's location,
+    a capability for its skills per ops.SKILL_CAPABILITIES, maintenance not due before it
+    ends), so a crew is always co-located.
+
+    Missions are taken in priority order and a mission is crewed only when both a pilot and
+    a drone can be found for it, re-routing earlier picks on either side (in "optimal"
+    mode) without un-crewing any mission already crewed.
+
+    Returns {"crews": [{project_id, priority, pilot_id, name, drone_id, model}], "uncrewed": [project_id], "method": str}.
+    """
+    snap = ops.snapshot(snap)
+    positions = _mission_order(snap, _open_missions(snap) if project_ids is None else project_ids)
+    pilot_adj, pilot_ids = _options(snap, "pilots", positions, ops.eligible_pilot_rows)
+    drone_adj, drone_ids = _options(snap, "drones", positions, ops.eligible_drone_rows)
+    method = _method(method, pilot_adj, drone_adj)
+    pilot_side = _Matcher(pilot_adj, len(pilot_ids), exact=method == "optimal")
+    drone_side = _Matcher(drone_adj, len(drone_ids), exact=method == "optimal")
+    for m in range(len(positions)):
+        pilot_path = pilot_side.find(m)
+        drone_path = drone_side.find(m) if pilot_path else None
+        if pilot_path and drone_path:
+            pilot_side.apply(pilot_path)
+            drone_side.apply(drone_path)
+
+    names, models = _first_values(snap, "pilots", "name"), _first_values(snap, "drones", "model")
+    projects = ops.records(snap, "missions")
+    crews, uncrewed = [], []
+    for m, pos in enumerate(positions):
+        proj = projects[pos]
+        if pilot_side.resource_of[m] < 0:
+            uncrewed.append(proj["project_id"])
+            continue
+        pid, did = pilot_ids[pilot_side.resource_of[m]], drone_ids[drone_side.resource_of[m]]
+        crews.append({
+            "project_id": proj["project_id"],
+            "priority": proj.get("priority", ""),
+            "pilot_id": pid,
+            "name": names.get(pid, ""),
+            "drone_id": did,
+            "model": models.get(did, ""),
+        })
+    return {"crews": crews, "uncrewed": uncrewed, "method": method}
+
+def commit_plan(plan: Dict[str, Any], snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """Book a plan from plan_assignments with one validated append."""
+    ops.assign_pilots_to_projects([(a["pilot_id"], a["project_id"]) for a in plan["assignments"]], snap)
+
+def commit_crews(plan: Dict[str, Any], snap: Optional[sheets_sync.Snapshot] = None) -> None:
+    """Book a plan from plan_crews, pilots and drones together, with one validated append."""
+    ops.assign_crews([(c["pilot_id"], c["drone_id"], c["project_id"]) for c in plan["crews"]], snap)
@@ -1,131 +1,734 @@
-"""Google Sheets 2-way sync: read pilots, drones, missions; write pilot status and drone status."""
-import json
+"""Google Sheets 2-way sync: read pilots, drones, missions, assignments; write pilot status, drone status and assignments."""
+import asyncio
+import atexit
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 import pandas as pd
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import backends
 import config
+import snapshot_cache
+from backends import ASSIGNMENT_COLUMNS
 
-# Lazy client
-_sheets_client = None
+# Process-wide read cache: table name -> (fetched_at monotonic seconds, DataFrame)
+_cache: Dict[str, Tuple[float, pd.DataFrame]] = {}
+_cache_locks = {name: threading.Lock() for name in ("pilots", "drones", "missions", "assignments")}
+# Bumped by every write or invalidation, so a background fetch started before it is discarded
+_generation = {name: 0 for name in _cache_locks}
+_refreshing = set()  # tables with a background fetch in flight
 
-def _get_client():
-    global _sheets_client
-    if _sheets_client is None and config.use_google_sheets():
-        try:
-            import gspread
-            from google.oauth2.service_account import Credentials
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive.readonly",
-            ]
-            if config.GOOGLE_CREDENTIALS_JSON_CONTENT:
-                info = json.loads(config.GOOGLE_CREDENTIALS_JSON_CONTENT)
-                creds = Credentials.from_service_account_info(info, scopes=scopes)
-            else:
-                creds = Credentials.from_service_account_file(str(config.CREDENTIALS_PATH), scopes=scopes)
-            _sheets_client = gspread.authorize(creds)
-        except Exception as e:
-            raise RuntimeError(f"Google Sheets auth failed: {e}") from e
-    return _sheets_client
-
-def _sheet_to_df(client, sheet_id: str, worksheet_name: str = "Sheet1") -> pd.DataFrame:
-    """Fetch first sheet as DataFrame. Assumes first row is header."""
-    book = client.open_by_key(sheet_id)
-    sheet = book.worksheet(worksheet_name)
-    rows = sheet.get_all_values()
-    if not rows:
-        return pd.DataFrame()
-    return pd.DataFrame(rows[1:], columns=rows[0])
+# Per table, for the data reads are served from: when it was fetched (time.time()), where
+# from, and the last fetch error; see freshness()
+_status: Dict[str, Dict[str, Any]] = {
+    name: {"fetched_at": None, "source": None, "error": None, "error_at": None} for name in _cache_locks
+}
+# Per table, the version token (None if not asked, e.g. on a cold load) and frame of the last
+# full read; an unchanged version reuses it
+_last_fetch: Dict[str, Tuple[Tuple[str, Optional[str]], pd.DataFrame]] = {}
+_refresher: Optional[threading.Thread] = None
+_refresher_stop = threading.Event()
+
+# Callbacks fired after a successful write; see subscribe_writes
+_write_listeners: List[Callable[[str, pd.DataFrame], None]] = []
+
+# Write-behind queue: table -> latest unflushed DataFrame, and how many writes it coalesces
+_pending: Dict[str, pd.DataFrame] = {}
+_pending_counts: Dict[str, int] = {}
+_write_lock = threading.RLock()
+_defer = threading.local()  # .depth: batched_writes() nesting for this thread
+_flush_timer: Optional[threading.Timer] = None
+last_flush_error: Optional[Exception] = None
 
 def _normalize_empty(val):
     if val is None or (isinstance(val, str) and val.strip() in ("", "–", "-", "—")):
         return "–"
     return str(val).strip()
 
-def _df_to_sheet(client, sheet_id: str, df: pd.DataFrame, worksheet_name: str = "Sheet1"):
-    """Write DataFrame to sheet. Replaces content; first row = header."""
-    book = client.open_by_key(sheet_id)
-    sheet = book.worksheet(worksheet_name)
-    # Fill NaN and empty as "–" for consistency
-    out = df.fillna("–").astype(str)
-    out = out.applymap(lambda x: "–" if str(x).strip() in ("", "nan", "None") else x)
-    rows = [out.columns.tolist()] + out.values.tolist()
-    sheet.clear()
-    if rows:
-        sheet.update(rows, value_input_option="USER_ENTERED")
+def _cached_read(table: str) -> pd.DataFrame:
+    """
+    Return a copy of the cached table, fetching it if missing or older than SHEETS_CACHE_TTL.
+    Up to SHEETS_STALE_WHILE_REVALIDATE seconds past the TTL the cached copy is returned at
+    once and re-fetched in the background; if a fetch fails, the last good copy is served.
+    """
+    queued = _pending.get(table)
+    if queued is not None:
+        # Read-your-writes: a queued table is newer than anything in the sheet
+        return queued.copy()
+    ttl = config.SHEETS_CACHE_TTL
+    if ttl <= 0:
+        return _fetch_or_fallback(table, None)
+    # Per-table lock so concurrent sessions share one fetch instead of each hitting Sheets
+    with _cache_locks[table]:
+        hit = _cache.get(table)
+        if hit is None:
+            hit = _cold_start(table)
+        age = time.monotonic() - hit[0] if hit is not None else None
+        if hit is None or age > ttl + config.SHEETS_STALE_WHILE_REVALIDATE:
+            hit = (time.monotonic(), _fetch_or_fallback(table, hit[1] if hit is not None else None))
+            _cache[table] = hit
+        elif age > ttl:
+            _refresh_async(table)
+        return hit[1].copy()
 
-# --- Public API ---
+def _fetch_or_fallback(table: str, stale: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Fetch now; on error serve `stale` if there is one, else (Sheets only) local storage."""
+    try:
+        return _fetch(table)
+    except Exception as e:
+        return _fallback(table, e, stale)
 
-def read_pilot_roster() -> pd.DataFrame:
-    if config.use_google_sheets():
+def _fallback(table: str, error: Exception, stale: Optional[pd.DataFrame]) -> pd.DataFrame:
+    _status[table].update(error=str(error) or type(error).__name__, error_at=time.time())
+    if stale is not None:
+        return stale
+    if _backend_name(table) != "sheets":
+        raise error
+    # Fallback to local storage on any Sheets error
+    df = backends.get_backend(config.LOCAL_BACKEND).read_table(table)
+    _status[table].update(fetched_at=time.time(), source="local fallback")
+    return df.reindex(columns=ASSIGNMENT_COLUMNS).fillna("–") if table == "assignments" else df
+
+def _cold_start(table: str) -> Optional[Tuple[float, pd.DataFrame]]:
+    """
+    First read in this process: serve the on-disk copy (snapshot_cache) when it came from the
+    same source. Kept if the backend's version shows it is current; when either version is
+    unknown (e.g. Drive is unreachable, or the copy was saved by a cold load), it is served
+    at once and re-fetched in the background. Caller holds the lock.
+    """
+    cold = snapshot_cache.load(table, _source(table))
+    if cold is None:
+        return None
+    df, saved_version, saved_at = cold
+    try:
+        version = _backend_for(table).version(table)
+    except Exception:
+        version = None
+    if version is not None and saved_version is not None and version != saved_version:
+        return None
+    hit = _cache[table] = (time.monotonic(), df)
+    _status[table].update(fetched_at=saved_at, source="disk cache")
+    if version is not None and version == saved_version:
+        _last_fetch[table] = ((_source(table), version), df.copy())
+    else:
+        _refresh_async(table)
+    return hit
+
+def _refresh(table: str) -> None:
+    """Re-fetch `table` into the cache, unless a write or invalidation happens meanwhile."""
+    generation = _generation[table]
+    try:
+        df = _fetch(table)
+    except Exception as e:
+        _status[table].update(error=str(e) or type(e).__name__, error_at=time.time())
+        return
+    finally:
+        _refreshing.discard(table)
+    with _cache_locks[table]:
+        if _generation[table] == generation:
+            _cache[table] = (time.monotonic(), df)
+
+def _refresh_async(table: str) -> None:
+    if table not in _refreshing:
+        _refreshing.add(table)
+        threading.Thread(target=_refresh, args=(table,), daemon=True).start()
+
+def invalidate_cache(table: Optional[str] = None) -> None:
+    """Drop cached data for one table ("pilots", "drones", "missions", "assignments") or for all of them."""
+    for name in ([table] if table else list(_cache_locks)):
+        _generation[name] += 1
+        _cache.pop(name, None)
+
+def freshness() -> Dict[str, Dict[str, Any]]:
+    """
+    Per table, for the data reads are served from: "age" (seconds since it was fetched; None
+    if not read yet), "source" (backend name, "disk cache" or "local fallback"), and
+    "last_error" / "error_age" of the latest failed fetch (None once a fetch succeeds),
+    "pending_writes" (queued updates not in storage yet) and "write_error" (why the last
+    timed flush of those failed; None when nothing is queued or the flush has not failed).
+    """
+    now = time.time()
+    with _write_lock:
+        pending, flush_error = dict(_pending_counts), last_flush_error
+    return {
+        table: {
+            "age": now - st["fetched_at"] if st["fetched_at"] is not None else None,
+            "source": st["source"],
+            "last_error": st["error"],
+            "error_age": now - st["error_at"] if st["error_at"] is not None else None,
+            "pending_writes": pending.get(table, 0),
+            "write_error": (str(flush_error) or type(flush_error).__name__) if pending.get(table) and flush_error else None,
+        }
+        for table, st in _status.items()
+    }
+
+def start_refresher(interval: Optional[float] = None) -> None:
+    """
+    Re-fetch every table in a background thread each `interval` seconds (default
+    SHEETS_REFRESH_INTERVAL), so reads are served from memory instead of waiting on Sheets.
+    Does nothing if the refresher is already running or the interval is 0.
+    """
+    global _refresher
+    interval = config.SHEETS_REFRESH_INTERVAL if interval is None else interval
+    with _write_lock:
+        if interval <= 0 or (_refresher is not None and _refresher.is_alive()):
+            return
+        _refresher_stop.clear()
+        _refresher = threading.Thread(target=_refresh_loop, args=(interval,), name="sheets-refresher", daemon=True)
+        _refresher.start()
+
+def stop_refresher() -> None:
+    global _refresher
+    _refresher_stop.set()
+    if _refresher is not None:
+        _refresher.join()
+        _refresher = None
+
+def _refresh_loop(interval: float) -> None:
+    while not _refresher_stop.wait(interval):
+        tables = [t for t in _cache_locks if t not in _refreshing and t not in _pending]
+        generations = {t: _generation[t] for t in tables}
+        frames, errors = _fetch_many(tables)
+        for table, error in errors.items():
+            _status[table].update(error=str(error) or type(error).__name__, error_at=time.time())
+        for table, df in frames.items():
+            with _cache_locks[table]:
+                if _generation[table] == generations[table]:
+                    _cache[table] = (time.monotonic(), df)
+
+def _backend_name(table: str) -> str:
+    """
+    Where `table` is read from and written to: STORAGE_BACKEND, or for "auto" Google Sheets
+    when configured, else LOCAL_BACKEND. Assignments stay with Sheets even without an
+    ASSIGNMENTS_SHEET_ID (see has_assignments_table): a local file there would be lost on
+    redeploy and differ per instance.
+    """
+    name = "sheets" if config.STORAGE_BACKEND == "auto" else config.STORAGE_BACKEND
+    backend = backends.get_backend(name)
+    if backend.handles(table) or (table == "assignments" and backend.handles("pilots")):
+        return name
+    return config.LOCAL_BACKEND
+
+def has_assignments_table() -> bool:
+    """
+    False when the tables come from Google Sheets but no ASSIGNMENTS_SHEET_ID is set: the
+    assignments table then reads as empty and cannot be written, and bookings live only in
+    the roster / fleet current_assignment column.
+    """
+    return _backend_for("assignments").handles("assignments")
+
+def _backend_for(table: str) -> backends.Backend:
+    return backends.get_backend(_backend_name(table))
+
+def _sync_target(table: str) -> Optional[backends.Backend]:
+    """Google Sheets, when it is configured for `table` but local storage is the primary one."""
+    sheets = backends.get_backend("sheets")
+    if _backend_for(table) is sheets or not sheets.handles(table):
+        return None
+    return sheets
+
+def _source(table: str) -> str:
+    """Which backend and sheet / file `table` is read from, to tell cached copies apart."""
+    backend = _backend_for(table)
+    if isinstance(backend, backends.SheetsBackend):
+        where = f"{backend.sheet_id(table)}/{backend.worksheet(table)}"
+    elif isinstance(backend, backends.SqliteBackend):
+        where = str(config.SQLITE_PATH)
+    else:
+        where = str(getattr(backend, "path", lambda t: "")(table))
+    return f"{type(backend).__name__}:{where}"
+
+def _call_or_error(call: Callable[[], Any]) -> Any:
+    try:
+        return call()
+    except Exception as e:
+        return e
+
+def _fetch(table: str) -> pd.DataFrame:
+    """Read `table` from its backend, keep it on disk for cold starts and record when it was fetched."""
+    frames, errors = _fetch_many([table])
+    if table in errors:
+        raise errors[table]
+    return frames[table]
+
+def _fetch_many(tables: List[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+    """
+    _fetch for several tables at once: tables whose version is unchanged since the last full
+    read are reused, and the rest are downloaded together where the backend can batch
+    (SheetsBackend.read_tables: one values.batchGet per spreadsheet, spreadsheets in
+    parallel). Returns the tables read and, separately, the error of each one that failed.
+    """
+    out, errors = {}, {}
+    if "assignments" in tables and not has_assignments_table():
+        out["assignments"] = pd.DataFrame(columns=ASSIGNMENT_COLUMNS)
+        _status["assignments"].update(fetched_at=time.time(), source="none", error=None, error_at=None)
+        tables = [t for t in tables if t != "assignments"]
+    groups: Dict[str, List[str]] = {}
+    for table in tables:
+        groups.setdefault(_backend_name(table), []).append(table)
+    for name, group in groups.items():
+        backend = backends.get_backend(name)
+        # Taken before the read, so a copy saved with one is never newer than it claims. On
+        # Sheets only for tables read before: with nothing to reuse, a cold load would just wait
+        # a Drive round trip, so it reads without one and the next fetch picks it up. Tables
+        # sharing a spreadsheet share its Drive version: ask once
+        keys = {
+            table: backend.sheet_id(table) if isinstance(backend, backends.SheetsBackend) else table
+            for table in group if name != "sheets" or table in _last_fetch
+        }
+        calls = {key: (lambda table=table: backend.version(table)) for table, key in keys.items()}
+        # Concurrently for Sheets (one Drive request per spreadsheet); a failed check is "unknown"
+        asked = backends.gather(calls) if name == "sheets" else {k: _call_or_error(c) for k, c in calls.items()}
+        versions = {table: None for table in group}
+        versions.update({table: None if isinstance(asked[key], Exception) else asked[key] for table, key in keys.items()})
+        download = []
+        for table in group:
+            unchanged = _unchanged(table, versions[table])
+            if unchanged is not None:
+                out[table] = unchanged
+            else:
+                download.append(table)
+        read_tables = getattr(backend, "read_tables", None)
         try:
-            client = _get_client()
-            return _sheet_to_df(client, config.PILOT_SHEET_ID)
+            if read_tables is not None and download:
+                frames = read_tables(download)
+            else:
+                frames = {table: _call_or_error(lambda table=table: backend.read_table(table)) for table in download}
         except Exception as e:
-            # Fallback to local CSV on any Sheets error
-            pass
-    path = config.DATA_DIR / "pilot_roster.csv"
-    return pd.read_csv(path).fillna("–")
+            frames = {table: e for table in download}
+        for table in download:
+            df = frames[table]
+            if isinstance(df, Exception):
+                errors[table] = df
+                continue
+            out[table] = _record_fetch(table, df, versions[table])
+        for table in group:
+            if table in out:
+                _status[table].update(fetched_at=time.time(), source=name, error=None, error_at=None)
+    return out, errors
+
+def _unchanged(table: str, version: Optional[str]) -> Optional[pd.DataFrame]:
+    """The last full read of `table` if `version` shows it is unchanged since (e.g. same Drive version), else None."""
+    last = _last_fetch.get(table)
+    if version is not None and last is not None and last[0] == (_source(table), version):
+        return last[1].copy()
+    return None
+
+def _record_fetch(table: str, df: pd.DataFrame, version: Optional[str]) -> pd.DataFrame:
+    """After a full read taken at `version`: keep it for reuse while unchanged and on disk for cold starts."""
+    if table == "assignments":
+        df = df.reindex(columns=ASSIGNMENT_COLUMNS).fillna("–")
+    _last_fetch[table] = ((_source(table), version), df.copy())
+    snapshot_cache.save(table, df, _source(table), version)
+    return df
+
+def _remember(table: str, df: pd.DataFrame) -> None:
+    """Keep df, just written, as the on-disk copy for the next cold start."""
+    # Asking for the version costs a request (a Drive call for Sheets): skip it when nothing is saved
+    if not snapshot_cache.enabled():
+        return
+    try:
+        version = _backend_for(table).version(table)
+    except Exception:
+        version = None
+    snapshot_cache.save(table, df, _source(table), version)
+
+# --- Public API ---
+
+def read_pilot_roster() -> pd.DataFrame:
+    return _cached_read("pilots")
 
 def read_drone_fleet() -> pd.DataFrame:
-    if config.use_google_sheets():
-        try:
-            client = _get_client()
-            return _sheet_to_df(client, config.DRONE_SHEET_ID)
-        except Exception:
-            pass
-    path = config.DATA_DIR / "drone_fleet.csv"
-    return pd.read_csv(path).fillna("–")
+    return _cached_read("drones")
 
 def read_missions() -> pd.DataFrame:
-    if config.use_google_sheets():
-        try:
-            client = _get_client()
-            return _sheet_to_df(client, config.MISSIONS_SHEET_ID)
-        except Exception:
-            pass
-    path = config.DATA_DIR / "missions.csv"
-    return pd.read_csv(path).fillna("–")
+    return _cached_read("missions")
 
-def write_pilot_roster(df: pd.DataFrame) -> None:
-    """Write full pilot roster back to sheet (used after status/assignment updates)."""
+def read_assignments() -> pd.DataFrame:
+    return _cached_read("assignments")
+
+def query(
+    table: str,
+    equal: Optional[Dict[str, str]] = None,
+    not_equal: Optional[Dict[str, str]] = None,
+    any_token: Optional[Dict[str, List[str]]] = None,
+    on_or_before: Optional[Dict[str, str]] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Filtered read done by the storage itself (see sqlite_store.select for the filters).
+    None when the backend cannot filter (Sheets, CSV, Parquet) or the table has queued
+    writes: the caller then filters a full read instead.
+    """
+    select = getattr(_backend_for(table), "select", None)
+    if select is None or table in _pending:
+        return None
+    return select(table, equal=equal, not_equal=not_equal, any_token=any_token, on_or_before=on_or_before)
+
+class Snapshot:
+    """
+    One consistent view of pilots, drones, missions and assignments for an agent turn or batch job.
+    Each table is read once, on first access, unless passed in. ops keeps derived
+    indexes in `derived`, keyed by tuples whose second item is the source table name
+    (or a tuple of names); they are dropped when one of their tables is replaced.
+    """
+
+    def __init__(
+        self,
+        pilots: Optional[pd.DataFrame] = None,
+        drones: Optional[pd.DataFrame] = None,
+        missions: Optional[pd.DataFrame] = None,
+        assignments: Optional[pd.DataFrame] = None,
+    ):
+        self._tables: Dict[str, Optional[pd.DataFrame]] = {
+            "pilots": pilots, "drones": drones, "missions": missions, "assignments": assignments,
+        }
+        self.derived: Dict[str, Any] = {}
+
+    def table(self, name: str) -> pd.DataFrame:
+        if self._tables[name] is None:
+            reader = {
+                "pilots": read_pilot_roster, "drones": read_drone_fleet,
+                "missions": read_missions, "assignments": read_assignments,
+            }[name]
+            self._tables[name] = reader()
+        return self._tables[name]
+
+    def loaded(self) -> List[str]:
+        """Names of the tables read (or passed in) so far."""
+        return [name for name, df in self._tables.items() if df is not None]
+
+    def replace(self, name: str, df: pd.DataFrame) -> None:
+        """Swap in a new version of one table (e.g. after a write) and drop indexes built from it."""
+        self._tables[name] = df
+        for key in [k for k in self.derived if k[1] == name or (isinstance(k[1], tuple) and name in k[1])]:
+            del self.derived[key]
+
+    @property
+    def pilots(self) -> pd.DataFrame:
+        return self.table("pilots")
+
+    @property
+    def drones(self) -> pd.DataFrame:
+        return self.table("drones")
+
+    @property
+    def missions(self) -> pd.DataFrame:
+        return self.table("missions")
+
+    @property
+    def assignments(self) -> pd.DataFrame:
+        return self.table("assignments")
+
+def _needs_fetch(table: str) -> bool:
+    """True if reading `table` now would wait on its backend (no queued, cached or on-disk copy to serve)."""
+    if table in _pending:
+        return False
+    ttl = config.SHEETS_CACHE_TTL
+    if ttl <= 0:
+        return True
+    with _cache_locks[table]:
+        hit = _cache.get(table) or _cold_start(table)
+        return hit is None or time.monotonic() - hit[0] > ttl + config.SHEETS_STALE_WHILE_REVALIDATE
+
+def load_snapshot() -> Snapshot:
+    """
+    Read all four tables now and return them as one Snapshot. Tables that must be fetched are
+    fetched together (one request per spreadsheet on Sheets); the rest come from the cache.
+    """
+    names = ("pilots", "drones", "missions", "assignments")
+    need = [name for name in names if _needs_fetch(name)]
+    frames: Dict[str, pd.DataFrame] = {}
+    if len(need) > 1:
+        generations = {name: _generation[name] for name in need}
+        frames, errors = _fetch_many(need)
+        for name, error in errors.items():
+            hit = _cache.get(name)
+            frames[name] = _fallback(name, error, hit[1].copy() if hit is not None else None)
+        for name, df in frames.items():
+            with _cache_locks[name]:
+                if config.SHEETS_CACHE_TTL > 0 and _generation[name] == generations[name]:
+                    _cache[name] = (time.monotonic(), df.copy())
+    snap = Snapshot(**frames)
+    for name in names:
+        snap.table(name)
+    return snap
+
+def subscribe_writes(listener: Callable[[str, pd.DataFrame], None]) -> Callable[[], None]:
+    """
+    Call listener(table, df) after every write_pilot_roster ("pilots"), write_drone_fleet
+    ("drones") or write/append_assignments ("assignments"), with the whole table as written,
+    as soon as readers can see it (for a deferred write that is when it is queued).
+    Returns an unsubscribe function.
+    """
+    _write_listeners.append(listener)
+    return lambda: _write_listeners.remove(listener) if listener in _write_listeners else None
+
+def _notify_write(table: str, df: pd.DataFrame) -> None:
+    # Called outside the table lock: listeners may read the table back
+    for listener in list(_write_listeners):
+        listener(table, df)
+
+# What each table is called in sync errors, and what to say when local storage is read-only
+_SYNC_NAMES = {"pilots": "pilot roster", "drones": "drone fleet", "assignments": "assignments"}
+_READ_ONLY = {
+    "pilots": (
+        "Cannot save updates here—the app is running in read-only mode. "
+        "To enable status updates on the deployed app, add your Google Sheets credentials and Sheet IDs in the app's Secrets (Settings → Secrets). See the README for setup."
+    ),
+    "drones": (
+        "Cannot save drone status here—the app is running in read-only mode. "
+        "Add Google Sheets credentials and Sheet IDs in the app's Secrets to enable 2-way sync."
+    ),
+    "assignments": (
+        "Cannot save assignments here—the app is running in read-only mode. "
+        "Add Google Sheets credentials and an ASSIGNMENTS_SHEET_ID in the app's Secrets to enable 2-way sync."
+    ),
+}
+
+def _store(table: str, action: Callable[[backends.Backend], None]) -> None:
+    """Run a write on the table's backend, then on Google Sheets when that is only its sync target."""
+    backend = _backend_for(table)
+    targets = [backend] + [t for t in [_sync_target(table)] if t is not None]
+    for target in targets:
+        if target is backends.get_backend("sheets"):
+            try:
+                action(target)
+            except Exception as e:
+                raise RuntimeError(f"Failed to sync {_SYNC_NAMES[table]} to Google Sheets: {e}") from e
+        else:
+            # Local: fails on Streamlit Cloud / read-only filesystem
+            try:
+                action(target)
+            except (PermissionError, OSError, sqlite3.Error) as e:
+                raise RuntimeError(_READ_ONLY[table]) from e
+
+def _push(table: str, df: pd.DataFrame) -> None:
+    # Hold the table lock so no concurrent reader re-caches the old sheet mid-write
+    with _cache_locks[table]:
+        _cache.pop(table, None)
+        _generation[table] += 1
+        _store(table, lambda backend: backend.write_table(table, df))
+        _remember(table, df)
+
+def _append_assignment_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """Append rows to the assignments table without rewriting it; returns the whole table after."""
+    with _cache_locks["assignments"]:
+        hit = _cache.get("assignments")
+        fresh = hit is not None and time.monotonic() - hit[0] <= config.SHEETS_CACHE_TTL
+        before = hit[1] if fresh else _fetch_or_fallback("assignments", None)
+        _generation["assignments"] += 1
+        _store("assignments", lambda backend: backend.append_rows("assignments", rows))
+        after = pd.concat([before, rows], ignore_index=True)
+        _remember("assignments", after)
+        if fresh:
+            _cache["assignments"] = (hit[0], after)
+        return after
+
+def _write(table: str, df: pd.DataFrame) -> None:
+    """Push now, or queue behind batched_writes() / SHEETS_WRITE_DELAY; readers see the change either way."""
     df = df.copy()
     for c in df.columns:
         df[c] = df[c].apply(lambda x: _normalize_empty(x))
-    if config.use_google_sheets():
-        try:
-            client = _get_client()
-            _df_to_sheet(client, config.PILOT_SHEET_ID, df)
-            return
-        except Exception as e:
-            raise RuntimeError(f"Failed to sync pilot roster to Google Sheets: {e}") from e
-    # Local: write to CSV (fails on Streamlit Cloud / read-only filesystem)
-    path = config.DATA_DIR / "pilot_roster.csv"
+    with _write_lock:
+        if getattr(_defer, "depth", 0) == 0 and config.SHEETS_WRITE_DELAY <= 0:
+            # Write-through; this full table also supersedes anything still queued for it
+            _push(table, df)
+            _pending.pop(table, None)
+            _pending_counts.pop(table, None)
+            flush_now = False
+        else:
+            _pending[table] = df
+            _pending_counts[table] = _pending_counts.get(table, 0) + 1
+            flush_now = sum(_pending_counts.values()) >= config.SHEETS_WRITE_BATCH
+            if not flush_now and getattr(_defer, "depth", 0) == 0:
+                _arm_flush_timer()
+    _notify_write(table, df)
+    if flush_now:
+        flush_writes()
+
+def _arm_flush_timer() -> None:
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(config.SHEETS_WRITE_DELAY, _timed_flush)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+def _timed_flush() -> None:
+    global _flush_timer, last_flush_error
+    with _write_lock:
+        _flush_timer = None
     try:
-        df.to_csv(path, index=False)
-    except (PermissionError, OSError) as e:
-        raise RuntimeError(
-            "Cannot save updates here—the app is running in read-only mode. "
-            "To enable status updates on the deployed app, add your Google Sheets credentials and Sheet IDs in the app's Secrets (Settings → Secrets). See the README for setup."
-        ) from e
+        flush_writes()
+    except Exception as e:
+        # Nobody is waiting on a timed flush: keep the writes queued and retry after the delay
+        last_flush_error = e
+        with _write_lock:
+            _arm_flush_timer()
+
+def flush_writes() -> None:
+    """Push every queued table now: one write per table, however many updates were coalesced into it."""
+    global _flush_timer, last_flush_error
+    with _write_lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        for table in list(_pending):
+            _push(table, _pending[table])
+            del _pending[table]
+            _pending_counts.pop(table, None)
+        last_flush_error = None
+
+def pending_writes() -> Dict[str, int]:
+    """Queued updates per table that have not reached the sheet yet."""
+    with _write_lock:
+        return dict(_pending_counts)
+
+@contextmanager
+def batched_writes():
+    """
+    Queue every write made by this thread inside the block and flush once on the way out,
+    e.g. to reassign a whole crew with one write per sheet. Nested blocks flush at the outermost.
+    """
+    _defer.depth = getattr(_defer, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _defer.depth -= 1
+        if _defer.depth == 0:
+            flush_writes()
+
+def write_pilot_roster(df: pd.DataFrame) -> None:
+    """Write full pilot roster back to sheet (used after status/assignment updates)."""
+    _write("pilots", df)
 
 def write_drone_fleet(df: pd.DataFrame) -> None:
     """Write full drone fleet back to sheet (status updates)."""
-    df = df.copy()
-    for c in df.columns:
-        df[c] = df[c].apply(lambda x: _normalize_empty(x))
-    if config.use_google_sheets():
-        try:
-            client = _get_client()
-            _df_to_sheet(client, config.DRONE_SHEET_ID, df)
-            return
-        except Exception as e:
-            raise RuntimeError(f"Failed to sync drone fleet to Google Sheets: {e}") from e
-    path = config.DATA_DIR / "drone_fleet.csv"
-    try:
-        df.to_csv(path, index=False)
-    except (PermissionError, OSError) as e:
+    _write("drones", df)
+
+def _require_assignments_table() -> None:
+    if not has_assignments_table():
         raise RuntimeError(
-            "Cannot save drone status here—the app is running in read-only mode. "
-            "Add Google Sheets credentials and Sheet IDs in the app's Secrets to enable 2-way sync."
-        ) from e
+            "No assignments sheet: each pilot or drone can hold one booking, in current_assignment. "
+            "Add an ASSIGNMENTS_SHEET_ID in the app's Secrets to book more than one project."
+        )
+
+def write_assignments(df: pd.DataFrame) -> None:
+    """Write the full assignments table (used when bookings are removed)."""
+    _require_assignments_table()
+    _write("assignments", df)
+
+def append_assignments(rows: pd.DataFrame) -> None:
+    """
+    Add bookings (ASSIGNMENT_COLUMNS) with one append: the cost does not grow with the
+    table. If a full write of the table is queued, the rows are added to it instead.
+    """
+    _require_assignments_table()
+    rows = rows.reindex(columns=ASSIGNMENT_COLUMNS)
+    for c in rows.columns:
+        rows[c] = rows[c].apply(lambda x: _normalize_empty(x))
+    with _write_lock:
+        queued = _pending.get("assignments")
+        if queued is not None:
+            table = _pending["assignments"] = pd.concat([queued, rows], ignore_index=True)
+            _pending_counts["assignments"] += 1
+        else:
+            table = _append_assignment_rows(rows)
+    _notify_write("assignments", table)
+
+# --- Async API ---
+# For async agent loops and web APIs. Cached tables are returned without leaving the event
+# loop; backends with a coroutine aread_table are awaited directly; everything else (gspread
+# is blocking) runs on asyncio's default thread pool, sharing the cache, queue and locks above.
+
+_afetches: Dict[str, "asyncio.Future[pd.DataFrame]"] = {}  # native async fetch in flight per table
+
+def _served_from_memory(table: str) -> Optional[pd.DataFrame]:
+    """What _cached_read would return without waiting on storage, or None."""
+    queued = _pending.get(table)
+    if queued is not None:
+        return queued.copy()
+    ttl = config.SHEETS_CACHE_TTL
+    hit = _cache.get(table)
+    if ttl <= 0 or hit is None:
+        return None
+    age = time.monotonic() - hit[0]
+    if age > ttl + config.SHEETS_STALE_WHILE_REVALIDATE:
+        return None
+    if age > ttl:
+        _refresh_async(table)
+    return hit[1].copy()
+
+async def _afetch(table: str, backend: backends.Backend) -> pd.DataFrame:
+    """_fetch with the backend's coroutine aread_table; the version check is local for such backends."""
+    generation = _generation[table]
+    version = _call_or_error(lambda: backend.version(table))
+    version = None if isinstance(version, Exception) else version
+    df = _unchanged(table, version)
+    if df is None:
+        df = _record_fetch(table, await backend.aread_table(table), version)
+    _status[table].update(fetched_at=time.time(), source=_backend_name(table), error=None, error_at=None)
+    if config.SHEETS_CACHE_TTL > 0 and _generation[table] == generation:
+        _cache[table] = (time.monotonic(), df.copy())
+    return df
+
+def _from_disk(table: str) -> Optional[pd.DataFrame]:
+    """_served_from_memory after a cold start from the on-disk copy (which may ask the backend for its version)."""
+    with _cache_locks[table]:
+        if table not in _cache:
+            _cold_start(table)
+    return _served_from_memory(table)
+
+async def _aread(table: str) -> pd.DataFrame:
+    served = _served_from_memory(table)
+    if served is None and table not in _cache and config.SHEETS_CACHE_TTL > 0 and snapshot_cache.enabled():
+        # First read in this process: on a thread, as the version check may be a request
+        served = await asyncio.to_thread(_from_disk, table)
+    if served is not None:
+        return served
+    backend = _backend_for(table)
+    if not hasattr(backend, "aread_table"):
+        return await asyncio.to_thread(_cached_read, table)
+    # Concurrent readers of one table share a single fetch
+    loop = asyncio.get_running_loop()
+    pending = _afetches.get(table)
+    if pending is None or pending.get_loop() is not loop or pending.done():
+        pending = _afetches[table] = asyncio.ensure_future(_afetch(table, backend))
+    try:
+        return (await asyncio.shield(pending)).copy()
+    except Exception as e:
+        hit = _cache.get(table)
+        return _fallback(table, e, hit[1].copy() if hit is not None else None)
+
+async def aread_pilot_roster() -> pd.DataFrame:
+    return await _aread("pilots")
+
+async def aread_drone_fleet() -> pd.DataFrame:
+    return await _aread("drones")
+
+async def aread_missions() -> pd.DataFrame:
+    return await _aread("missions")
+
+async def aread_assignments() -> pd.DataFrame:
+    return await _aread("assignments")
+
+async def aload_snapshot() -> Snapshot:
+    """load_snapshot without blocking the event loop."""
+    names = ("pilots", "drones", "missions", "assignments")
+    native = all(hasattr(_backend_for(name), "aread_table") for name in names)
+    if not native and any(_served_from_memory(name) is None for name in names):
+        # One batched load on a thread (a batchGet per spreadsheet) beats four separate ones
+        return await asyncio.to_thread(load_snapshot)
+    frames = await asyncio.gather(*(_aread(name) for name in names))
+    return Snapshot(**dict(zip(names, frames)))
+
+async def awrite_pilot_roster(df: pd.DataFrame) -> None:
+    """write_pilot_roster on a worker thread (writes go through the shared queue and locks)."""
+    await asyncio.to_thread(write_pilot_roster, df)
+
+async def awrite_drone_fleet(df: pd.DataFrame) -> None:
+    await asyncio.to_thread(write_drone_fleet, df)
+
+# Push anything still queued when the process exits
+atexit.register(lambda: flush_writes() if _pending else None)
@@ -0,0 +1,116 @@
+"""
+On-disk copy of the last-fetched tables, so a restarted worker has data before Sheets answers.
+Each table is one uncompressed Arrow IPC file with explicit types (status and location as
+dictionary-encoded categoricals, ISO date columns as dates), memory-mapped on load. Needs
+pyarrow; without it nothing is cached and every cold start fetches as before.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+import config
+
+EMPTY = "–"
+
+# Low-cardinality columns stored dictionary-encoded
+_CATEGORICAL = {"status", "location", "resource_type"}
+_DATE_COLUMNS = {"available_from", "maintenance_due", "start_date", "end_date"}
+_ISO = r"\d{4}-\d{2}-\d{2}"
+
+_lock = threading.Lock()
+# Frame last saved per table file, so an unchanged re-fetch is not rewritten
+_saved: Dict[str, Tuple[Tuple[str, Optional[str]], pd.DataFrame]] = {}
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        return pyarrow
+    except ImportError:
+        return None
+
+def enabled() -> bool:
+    """True when tables are being cached: SNAPSHOT_CACHE is on and pyarrow is installed."""
+    return bool(config.SNAPSHOT_CACHE) and _arrow() is not None
+
+def _path(table: str):
+    return config.SNAPSHOT_CACHE_DIR / f"{table}.arrow"
+
+def _to_arrow(pa, df: pd.DataFrame, meta: Dict[str, Any]):
+    arrays, dates = [], []
+    for column in df.columns:
+        text = df[column].astype(str)
+        if column in _CATEGORICAL:
+            arrays.append(pa.array(text).dictionary_encode())
+            continue
+        filled = text != EMPTY
+        # Dates only when every value round-trips; other formats stay text as they are in the sheet
+        if column in _DATE_COLUMNS and filled.any() and text[filled].str.fullmatch(_ISO).all():
+            parsed = pd.to_datetime(text.where(filled), format="%Y-%m-%d", errors="coerce")
+            if parsed[filled].notna().all():
+                arrays.append(pa.array(parsed.dt.date, type=pa.date32()))
+                dates.append(column)
+                continue
+        arrays.append(pa.array(text, type=pa.string()))
+    metadata = {"skylark": json.dumps({**meta, "dates": dates})}
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns], metadata=metadata)
+
+def _from_arrow(arrow_table) -> pd.DataFrame:
+    out = {}
+    for name, column in zip(arrow_table.column_names, arrow_table.columns):
+        values = column.to_pandas()
+        if str(column.type).startswith("date"):
+            values = pd.to_datetime(values).dt.strftime("%Y-%m-%d").fillna(EMPTY)
+        out[name] = values.astype(str)
+    return pd.DataFrame(out, columns=arrow_table.column_names)
+
+def save(table: str, df: pd.DataFrame, source: str, version: Optional[str] = None) -> None:
+    """
+    Store df as the last-known copy of `table` read from `source` (a backend and sheet/path);
+    version is the backend's change token, when it has one. Best effort: errors are ignored.
+    """
+    pa = _arrow()
+    if not config.SNAPSHOT_CACHE or pa is None:
+        return
+    path = _path(table)
+    with _lock:
+        previous = _saved.get(str(path))
+        if previous is not None and previous[0] == (source, version) and previous[1].equals(df):
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            arrow_table = _to_arrow(pa, df, {"source": source, "version": version or "", "saved_at": time.time()})
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except (OSError, pa.ArrowException, ValueError, TypeError):
+            return
+        _saved[str(path)] = ((source, version), df)
+
+def load(table: str, source: str) -> Optional[Tuple[pd.DataFrame, Optional[str], float]]:
+    """(table as text, version and time.time() it was saved at) if a copy read from `source` is on disk, else None."""
+    pa = _arrow()
+    path = _path(table)
+    if not config.SNAPSHOT_CACHE or pa is None or not path.exists():
+        return None
+    try:
+        # Zero-copy: the columns are views of the mapped file until converted to text below
+        arrow_table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        meta = json.loads((arrow_table.schema.metadata or {}).get(b"skylark", b"{}"))
+    except (OSError, pa.ArrowException, ValueError):
+        return None
+    if meta.get("source") != source:
+        return None
+    return _from_arrow(arrow_table), meta.get("version") or None, float(meta.get("saved_at") or path.stat().st_mtime)
+
+def clear() -> None:
+    """Delete every cached table file."""
+    with _lock:
+        _saved.clear()
+        for path in config.SNAPSHOT_CACHE_DIR.glob("*.arrow"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,241 @@
+"""
+SQLite storage for the local backend (LOCAL_BACKEND=sqlite): one table per sheet in a WAL-mode
+database, indexed on ids, status, location and dates. Writes of a whole table are applied as a
+row diff in one transaction, so changing one pilot's status is a single-row UPDATE; filtered
+reads (select) run in SQL instead of loading the table.
+"""
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+EMPTY = "–"
+
+# Columns indexed per table (when present); location is compared case-insensitively
+_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "pilots": ("pilot_id", "status", "location", "current_assignment", "available_from"),
+    "drones": ("drone_id", "status", "location", "current_assignment", "maintenance_due"),
+    "missions": ("project_id", "location", "start_date", "end_date"),
+    "assignments": ("resource_id", "project_id", "start_date", "end_date"),
+}
+_NOCASE = {"location"}
+
+# Date columns are stored as ISO-8601 text, so range queries compare (and index) correctly
+_DATE_COLUMNS = {"available_from", "maintenance_due", "start_date", "end_date"}
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y")
+_ISO_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+_local = threading.local()  # .conns: database path -> this thread's connection
+_ready: Dict[Tuple[str, str], bool] = {}  # (database, table) known to exist
+_ready_lock = threading.Lock()
+
+# Stored rows as last read or written, per (database, table): (rowids, values, columns).
+# The baseline write_table diffs against, so a write only has to find and send what changed.
+_last_known: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray, List[str]]] = {}
+
+def _connect() -> sqlite3.Connection:
+    """This thread's connection: readers never block each other or the writer in WAL mode."""
+    path = str(config.SQLITE_PATH)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("list_tokens", 1, _list_tokens, deterministic=True)
+        conns[path] = conn
+    return conn
+
+def _list_tokens(value: Optional[str]) -> str:
+    """",mapping,night ops,": a list cell's tokens as ops._parse_list reads them (split on , or ;, stripped, lowercase)."""
+    tokens = (t.strip().lower() for t in re.split(r"[,;]", str(value or "")))
+    return "," + ",".join(t for t in tokens if t) + ","
+
+def _q(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+@lru_cache(maxsize=4096)
+def _iso(value: str) -> str:
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return value
+
+def _rows(df: pd.DataFrame) -> np.ndarray:
+    """Stored form of a table as a 2-D object array: stripped text, "–" for empty, ISO dates."""
+    out = df.fillna(EMPTY).astype(str).apply(lambda col: col.str.strip())
+    out = out.where(~out.isin(["", "nan", "None", "-", "—"]), EMPTY)
+    for column in _DATE_COLUMNS.intersection(out.columns):
+        other = ~out[column].str.fullmatch(r"\d{4}-\d{2}-\d{2}") & (out[column] != EMPTY)
+        if other.any():
+            out.loc[other, column] = out.loc[other, column].map(_iso)
+    return out.to_numpy(dtype=object).reshape(len(out), len(out.columns))
+
+def _bump(conn: sqlite3.Connection, table: str) -> None:
+    """Count a change to `table` (inside the caller's transaction); see version()."""
+    conn.execute("CREATE TABLE IF NOT EXISTS _versions (name TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    conn.execute("INSERT INTO _versions VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET n = n + 1", (table,))
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_q(table)})")]
+
+def _create(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    """(Re)create `table` holding df, with its indexes, inside the caller's transaction."""
+    conn.execute(f"DROP TABLE IF EXISTS {_q(table)}")
+    conn.execute(f"CREATE TABLE {_q(table)} ({', '.join(_q(c) + ' TEXT' for c in df.columns)})")
+    for column in _INDEXES.get(table, ()):
+        if column in df.columns:
+            collate = " COLLATE NOCASE" if column in _NOCASE else ""
+            conn.execute(f"CREATE INDEX {_q(f'ix_{table}_{column}')} ON {_q(table)} ({_q(column)}{collate})")
+    if len(df.columns):
+        marks = ", ".join("?" * len(df.columns))
+        conn.executemany(f"INSERT INTO {_q(table)} VALUES ({marks})", map(tuple, _rows(df)))
+    _bump(conn, table)
+
+def _ensure(conn: sqlite3.Connection, table: str, seed: Optional[Callable[[], pd.DataFrame]]) -> None:
+    """Create `table` from seed() (e.g. the CSV it replaces) the first time it is used."""
+    key = (str(config.SQLITE_PATH), table)
+    if _ready.get(key):
+        return
+    with _ready_lock:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+        if not exists:
+            if seed is None:
+                raise KeyError(f"No such table in {config.SQLITE_PATH}: {table}")
+            with conn:
+                _create(conn, table, seed())
+        _ready[key] = True
+
+def _frame(cursor: sqlite3.Cursor) -> pd.DataFrame:
+    columns = [d[0] for d in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=columns).fillna(EMPTY).astype(str)
+
+def _fetch_known(conn: sqlite3.Connection, table: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """(rowids, values, columns) of the stored table, in row order."""
+    columns = _columns(conn, table)
+    rows = conn.execute(f"SELECT rowid, * FROM {_q(table)} ORDER BY rowid").fetchall()
+    values = np.array([r[1:] for r in rows], dtype=object).reshape(len(rows), len(columns))
+    return np.array([r[0] for r in rows], dtype=np.int64), values, columns
+
+def read_table(table: str, seed: Optional[Callable[[], pd.DataFrame]] = None) -> pd.DataFrame:
+    """The whole table in row order."""
+    conn = _connect()
+    _ensure(conn, table, seed)
+    known = _fetch_known(conn, table)
+    _last_known[(str(config.SQLITE_PATH), table)] = known
+    return pd.DataFrame(known[1], columns=known[2]).fillna(EMPTY).astype(str)
+
+def write_table(table: str, df: pd.DataFrame) -> None:
+    """
+    Make the stored table equal df in one transaction. Rows are matched by position (like
+    the sheet) against the table as last read or written: changed rows are UPDATEd, extra
+    rows INSERTed, missing rows DELETEd. A change of columns rewrites the table.
+    """
+    conn = _connect()
+    _ensure(conn, table, lambda: df)
+    key = (str(config.SQLITE_PATH), table)
+    new = _rows(df)
+    columns = list(df.columns)
+    known = _last_known.pop(key, None)
+    with conn:
+        if known is None or known[2] != columns:
+            known = _fetch_known(conn, table)
+        if known[2] != columns:
+            _create(conn, table, df)
+            return
+        rowids, old, _ = known
+        n = min(len(old), len(new))
+        changed = np.flatnonzero((old[:n] != new[:n]).any(axis=1)) if n and columns else np.empty(0, dtype=int)
+        if len(changed) or len(old) != len(new):
+            _bump(conn, table)
+        assign = ", ".join(f"{_q(c)} = ?" for c in columns)
+        conn.executemany(
+            f"UPDATE {_q(table)} SET {assign} WHERE rowid = ?",
+            [tuple(new[i]) + (int(rowids[i]),) for i in changed],
+        )
+        if len(new) > len(old):
+            conn.executemany(f"INSERT INTO {_q(table)} VALUES ({', '.join('?' * len(columns))})", map(tuple, new[len(old):]))
+            last = int(rowids[-1]) if len(rowids) else 0
+            added = [r[0] for r in conn.execute(f"SELECT rowid FROM {_q(table)} WHERE rowid > ? ORDER BY rowid", (last,))]
+            rowids = np.concatenate([rowids, np.array(added, dtype=np.int64)])
+        elif len(old) > len(new):
+            conn.executemany(f"DELETE FROM {_q(table)} WHERE rowid = ?", [(int(r),) for r in rowids[len(new):]])
+            rowids = rowids[:len(new)]
+    # Only a committed write becomes the new baseline
+    _last_known[key] = (rowids, new, columns)
+
+def append_rows(table: str, df: pd.DataFrame, seed: Optional[Callable[[], pd.DataFrame]] = None) -> None:
+    """INSERT df's rows (columns in table order) in one transaction."""
+    conn = _connect()
+    _ensure(conn, table, seed)
+    columns = _columns(conn, table)
+    _last_known.pop((str(config.SQLITE_PATH), table), None)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO {_q(table)} ({', '.join(map(_q, columns))}) VALUES ({', '.join('?' * len(columns))})",
+            map(tuple, _rows(df.reindex(columns=columns))),
+        )
+        _bump(conn, table)
+
+def version(table: str) -> Optional[str]:
+    """Change counter of `table` in this database (None before its first write)."""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT n FROM _versions WHERE name = ?", (table,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return f"{config.SQLITE_PATH}:{row[0]}" if row else None
+
+def select(
+    table: str,
+    equal: Optional[Dict[str, str]] = None,
+    not_equal: Optional[Dict[str, str]] = None,
+    any_token: Optional[Dict[str, List[str]]] = None,
+    on_or_before: Optional[Dict[str, str]] = None,
+    seed: Optional[Callable[[], pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    """
+    Rows matching every filter, in row order, filtered in SQL: equal (exact; location
+    case-insensitive), not_equal, any_token (list column holds any of the tokens, compared
+    like ops._parse_list: split on , or ;, case-insensitive) and on_or_before (ISO date).
+    """
+    conn = _connect()
+    _ensure(conn, table, seed)
+    columns = set(_columns(conn, table))
+    where, params = [], []
+    for column, value in (equal or {}).items():
+        if column not in columns:
+            return _frame(conn.execute(f"SELECT * FROM {_q(table)} WHERE 0"))
+        where.append(f"{_q(column)} = ?" + (" COLLATE NOCASE" if column in _NOCASE else ""))
+        params.append(str(value).strip())
+    for column, value in (not_equal or {}).items():
+        if column in columns:
+            where.append(f"{_q(column)} <> ?")
+            params.append(str(value).strip())
+    for column, tokens in (any_token or {}).items():
+        if not tokens:
+            continue
+        if column not in columns:
+            return _frame(conn.execute(f"SELECT * FROM {_q(table)} WHERE 0"))
+        # ",mapping,survey," holds ",mapping,": token boundaries without a tokens table
+        padded = f"list_tokens({_q(column)})"
+        where.append("(" + " OR ".join(f"instr({padded}, ?) > 0" for _ in tokens) + ")")
+        params.extend("," + str(t).strip().lower() + "," for t in tokens)
+    for column, day in (on_or_before or {}).items():
+        if column not in columns:
+            return _frame(conn.execute(f"SELECT * FROM {_q(table)} WHERE 0"))
+        where.append(f"{_q(column)} <= ? AND {_q(column)} GLOB '{_ISO_GLOB}'")
+        params.append(day)
+    sql = f"SELECT * FROM {_q(table)}" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY rowid"
+    return _frame(conn.execute(sql, params))
@@ -0,0 +1,99 @@
+"""Every test runs against an in-memory copy of the CSVs (backends.MemoryBackend), never data/."""
+import datetime
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backends  # noqa: E402
+import config  # noqa: E402
+import ops  # noqa: E402
+import sheets_sync  # noqa: E402
+
+EMPTY = ops.EMPTY
+
+@pytest.fixture(autouse=True)
+def memory(monkeypatch):
+    """A fresh MemoryBackend as the only storage, with sheets_sync's caches and queue emptied."""
+    backend = backends.MemoryBackend()
+    monkeypatch.setitem(backends._BACKENDS, "memory", backend)
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "memory")
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE", False)
+    monkeypatch.setattr(config, "SHEETS_WRITE_DELAY", 0.0)
+    sheets_sync.invalidate_cache()
+    sheets_sync._last_fetch.clear()
+    sheets_sync._pending.clear()
+    sheets_sync._pending_counts.clear()
+    for status in sheets_sync._status.values():
+        status.update(fetched_at=None, source=None, error=None, error_at=None)
+    yield backend
+    sheets_sync.stop_refresher()
+    with sheets_sync._write_lock:
+        if sheets_sync._flush_timer is not None:
+            sheets_sync._flush_timer.cancel()
+            sheets_sync._flush_timer = None
+        sheets_sync._pending.clear()
+        sheets_sync._pending_counts.clear()
+        sheets_sync.last_flush_error = None
+    sheets_sync.invalidate_cache()
+    sheets_sync._last_fetch.clear()
+
+@pytest.fixture
+def sheets(monkeypatch):
+    """Google Sheets configured against a backends.FakeSheetsClient holding the CSVs, one spreadsheet per table."""
+    ids = {"pilots": "pilot-sheet", "drones": "drone-sheet", "missions": "mission-sheet", "assignments": "assignment-sheet"}
+    local = backends.CsvBackend()
+    client = backends.FakeSheetsClient({
+        sheet_id: {"Sheet1": backends.FakeWorksheet.from_frame(local.read_table(table))} for table, sheet_id in ids.items()
+    })
+    for table, setting in (("pilots", "PILOT_SHEET_ID"), ("drones", "DRONE_SHEET_ID"),
+                           ("missions", "MISSIONS_SHEET_ID"), ("assignments", "ASSIGNMENTS_SHEET_ID")):
+        monkeypatch.setattr(config, setting, ids[table])
+    monkeypatch.setattr(config, "GOOGLE_CREDENTIALS_JSON_CONTENT", "{}")
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "auto")
+    monkeypatch.setattr(backends, "_sheets_client", client)
+    monkeypatch.setattr(backends, "_last_known", {})
+    return client
+
+LOCATIONS = ["Bangalore", "Mumbai", "Delhi", " mumbai "]
+SKILLS = ["Mapping", "Survey", "Inspection", "Thermal"]
+CERTS = ["DGCA", "Night Ops", "BVLOS"]
+
+def _random_tables(seed, n_pilots=40, n_missions=20, n_drones=15):
+    r = random.Random(seed)
+    day = lambda: datetime.date(2026, 1, 1) + datetime.timedelta(days=r.randint(0, 120))
+    missions = []
+    for i in range(n_missions):
+        start = day()
+        end = start + datetime.timedelta(days=r.randint(0, 30))
+        missions.append({
+            "project_id": f"PRJ{i:03d}", "client": "C", "location": r.choice(LOCATIONS[:3]),
+            "required_skills": ", ".join(r.sample(SKILLS, r.randint(0, 2))) or EMPTY,
+            "required_certs": ", ".join(r.sample(CERTS, r.randint(0, 2))) or EMPTY,
+            "start_date": start.isoformat() if r.random() > 0.1 else r.choice([EMPTY, start.strftime("%d/%m/%Y")]),
+            "end_date": end.isoformat(), "priority": r.choice(["High", "Urgent", "Standard"]),
+        })
+    pick = lambda: f"PRJ{r.randint(0, n_missions + 2):03d}" if r.random() < 0.6 else EMPTY
+    pilots = [{
+        # Repeated ids: one pilot on several roster rows is how double bookings show up
+        "pilot_id": f"P{r.randint(0, n_pilots * 2 // 3):03d}", "name": f"N{i}",
+        "skills": ", ".join(r.sample(SKILLS, r.randint(0, 3))) or EMPTY,
+        "certifications": "; ".join(r.sample(CERTS, r.randint(0, 2))) or EMPTY,
+        "location": r.choice(LOCATIONS), "status": r.choice(["Available", "Assigned", "On Leave"]),
+        "current_assignment": pick(), "available_from": day().isoformat(),
+    } for i in range(n_pilots)]
+    drones = [{
+        "drone_id": f"D{i:03d}", "model": "X", "capabilities": "RGB",
+        "status": r.choice(["Available", "Maintenance", "Deployed"]), "location": r.choice(LOCATIONS[:3]),
+        "current_assignment": pick(), "maintenance_due": day().isoformat(),
+    } for i in range(n_drones)]
+    return pd.DataFrame(pilots), pd.DataFrame(drones), pd.DataFrame(missions)
+
+@pytest.fixture
+def random_tables():
+    """(pilots, drones, missions) frames from a seed: random_tables(seed, n_pilots=40, n_missions=20, n_drones=15)."""
+    return _random_tables
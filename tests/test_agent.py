@@ -0,0 +1,22 @@
+import agent
+import planner
+
+def test_urgent_reassignment_reaches_planner(monkeypatch):
+    seen = []
+    plan_crews = planner.plan_crews
+    monkeypatch.setattr(planner, "plan_crews", lambda ids, **kw: seen.append(ids) or plan_crews(ids, **kw))
+    reply = agent.handle_message("Urgent reassignment for PRJ002")
+    assert seen == [["PRJ002"]]
+    assert "**Urgent reassignment for PRJ002**" in reply
+    assert "Proposed crew" in reply
+
+def test_urgent_without_project_crews_every_urgent_mission(monkeypatch):
+    seen = []
+    plan_crews = planner.plan_crews
+    monkeypatch.setattr(planner, "plan_crews", lambda ids, **kw: seen.append(ids) or plan_crews(ids, **kw))
+    agent.handle_message("Any urgent reassignment needed?")
+    assert len(seen) == 1
+
+def test_assignments_still_listed():
+    assert agent.handle_message("Show current assignments").startswith("**Current assignments:**")
+    assert agent.handle_message("list assignments").startswith("**Current assignments:**")
@@ -0,0 +1,82 @@
+"""Calendar interval bookkeeping, by hand and against a set of busy days."""
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from availability import Calendar
+
+D = lambda s: np.datetime64(s, "D")
+
+def _spans(cal):
+    return [(str(s), str(e)) for s, e in cal.busy()]
+
+def test_book_merges_overlapping_and_adjacent_intervals():
+    cal = Calendar()
+    cal.book("2026-03-10", "2026-03-12")
+    cal.book("2026-03-01", "2026-03-03")
+    assert _spans(cal) == [("2026-03-01", "2026-03-03"), ("2026-03-10", "2026-03-12")]
+    cal.book("2026-03-04", "2026-03-05")  # adjacent to the first
+    assert _spans(cal) == [("2026-03-01", "2026-03-05"), ("2026-03-10", "2026-03-12")]
+    cal.book("2026-03-05", "2026-03-11")  # overlaps both
+    assert _spans(cal) == [("2026-03-01", "2026-03-12")]
+    cal.book("2026-03-14", "2026-03-14")  # one-day gap stays a gap
+    assert _spans(cal) == [("2026-03-01", "2026-03-12"), ("2026-03-14", "2026-03-14")]
+
+def test_release_splits_an_interval():
+    cal = Calendar()
+    cal.book("2026-03-01", "2026-03-10")
+    cal.release("2026-03-04", "2026-03-06")
+    assert _spans(cal) == [("2026-03-01", "2026-03-03"), ("2026-03-07", "2026-03-10")]
+    cal.release("2026-03-01", "2026-03-01")
+    assert _spans(cal) == [("2026-03-02", "2026-03-03"), ("2026-03-07", "2026-03-10")]
+    cal.release("2026-02-01", "2026-03-08")
+    assert _spans(cal) == [("2026-03-09", "2026-03-10")]
+    cal.release("2026-04-01", "2026-04-05")  # nothing booked there
+    assert _spans(cal) == [("2026-03-09", "2026-03-10")]
+
+def test_is_free_bounds_are_inclusive():
+    cal = Calendar()
+    cal.book("2026-03-05", "2026-03-07")
+    assert cal.is_free("2026-03-01", "2026-03-04")
+    assert not cal.is_free("2026-03-01", "2026-03-05")
+    assert not cal.is_free("2026-03-07", "2026-03-09")
+    assert cal.is_free("2026-03-08", "2026-03-09")
+    assert not cal.is_free("2026-03-06", "2026-03-06")
+    assert not cal.is_free("2026-03-01", "2026-03-31")
+    assert cal.is_free(date(2026, 3, 8), "08/03/2026")
+
+def test_next_free():
+    cal = Calendar()
+    cal.book("2026-03-05", "2026-03-07")
+    cal.book("2026-03-10", "2026-03-12")
+    assert cal.next_free(4, "2026-03-01") == D("2026-03-01")
+    assert cal.next_free(5, "2026-03-01") == D("2026-03-13")  # the 2-day gap is too short
+    assert cal.next_free(2, "2026-03-01") == D("2026-03-01")
+    assert cal.next_free(2, "2026-03-06") == D("2026-03-08")
+    assert cal.next_free(1, "2026-03-12") == D("2026-03-13")
+    cal.book("2026-03-20", "9999-12-31")  # e.g. maintenance due, never free again
+    assert cal.next_free(8, "2026-03-13") is None
+    assert cal.next_free(7, "2026-03-13") == D("2026-03-13")
+
+def test_random_operations_match_a_set_of_days():
+    r = random.Random(0)
+    base = date(2026, 1, 1)
+    day = lambda: base + timedelta(days=r.randint(0, 60))
+    cal, busy = Calendar(), set()
+    for _ in range(300):
+        start = day()
+        end = start + timedelta(days=r.randint(0, 6))
+        span = {start + timedelta(days=i) for i in range((end - start).days + 1)}
+        if r.random() < 0.6:
+            cal.book(start, end)
+            busy |= span
+        else:
+            cal.release(start, end)
+            busy -= span
+        assert cal.is_free(start, end) == (not span & busy)
+        spans = cal.busy()
+        # Sorted, disjoint and never touching: one interval per run of busy days
+        assert all(e1 + np.timedelta64(1, "D") < s2 for (_, e1), (s2, _) in zip(spans, spans[1:]))
+        covered = {s.astype(date) + timedelta(days=i) for s, e in spans for i in range(int((e - s).astype(int)) + 1)}
+        assert covered == busy
@@ -0,0 +1,133 @@
+import time
+
+import pandas as pd
+
+import backends
+import config
+import ops
+import sheets_sync
+
+def _downloads(client):
+    return [r for r in client.requests if r[0] == "batchGet"]
+
+def test_unchanged_sheet_is_not_downloaded_again(sheets):
+    first = sheets_sync.read_pilot_roster()
+    sheets_sync.invalidate_cache()
+    sheets_sync.read_pilot_roster()
+    downloads = len(_downloads(sheets))
+    for _ in range(3):
+        sheets_sync.invalidate_cache()
+        assert sheets_sync.read_pilot_roster().equals(first)
+    assert len(_downloads(sheets)) == downloads
+    assert sheets.requests[-1] == ("drive", "pilot-sheet")
+
+def test_edited_sheet_is_downloaded_again(sheets):
+    sheets_sync.read_pilot_roster()
+    sheets_sync.invalidate_cache()
+    sheets_sync.read_pilot_roster()  # picks up the version token
+    sheets.books["pilot-sheet"]["Sheet1"].batch_update([{"range": "F2:F2", "values": [["On Leave"]]}])
+    sheets_sync.invalidate_cache()
+    assert sheets_sync.read_pilot_roster().at[0, "status"] == "On Leave"
+    assert sheets_sync.read_pilot_roster().at[0, "status"] == "On Leave"
+
+def test_write_sends_only_changed_cells(sheets):
+    ops.update_pilot_status("P001", "On Leave")
+    ws = sheets.books["pilot-sheet"]["Sheet1"]
+    assert ws.cells[(2, 6)] == "On Leave"
+    assert sheets_sync.read_pilot_roster().at[0, "status"] == "On Leave"
+    assert [r for r in sheets.requests if r[0] == "batchUpdate"] == [("batchUpdate", "pilot-sheet", ("'Sheet1'!F2:F2",))]
+
+def test_delta_write_falls_back_to_gspread_without_raw_requests(sheets):
+    ws = sheets.books["pilot-sheet"]["Sheet1"]
+    rows = ws.get_all_values()
+    backends._last_known[("pilot-sheet", "Sheet1")] = rows
+    edited = pd.DataFrame(rows[1:], columns=rows[0])
+    edited.at[0, "status"] = "On Leave"
+    class GspreadOnly:
+        def open_by_key(self, key):
+            return sheets.open_by_key(key)
+    backends._df_to_sheet(GspreadOnly(), "pilot-sheet", edited)
+    assert ws.cells[(2, 6)] == "On Leave"
+    assert sheets.requests == []
+
+def test_write_asks_no_version_without_snapshot_cache(sheets):
+    assert not config.SNAPSHOT_CACHE
+    sheets_sync.read_pilot_roster()
+    before = len(sheets.requests)
+    ops.update_pilot_status("P001", "On Leave")
+    assert ("drive", "pilot-sheet") not in sheets.requests[before:]
+
+def test_snapshot_loads_with_one_request_per_spreadsheet(sheets):
+    sheets_sync.load_snapshot()
+    assert sorted(r[1] for r in _downloads(sheets)) == ["assignment-sheet", "drone-sheet", "mission-sheet", "pilot-sheet"]
+
+def test_changed_ranges():
+    old = [["id", "status"], ["P1", "Available"], ["P2", "Assigned"], ["P3", "Available"]]
+    new = [["id", "status"], ["P1", "On Leave"], ["P2", "Assigned"]]
+    assert backends._changed_ranges(old, new) == [
+        {"range": "B2:B2", "values": [["On Leave"]]},
+        {"range": "A4:B4", "values": [["", ""]]},
+    ]
+
+def test_changed_ranges_groups_runs_and_widens():
+    old = [["a", "b", "c", "d"], ["1", "2", "3", "4"]]
+    new = [["a", "b", "c", "d", "e"], ["9", "8", "3", "7", "6"]]
+    assert backends._changed_ranges(old, new) == [
+        {"range": "E1:E1", "values": [["e"]]},
+        {"range": "A2:B2", "values": [["9", "8"]]},
+        {"range": "D2:E2", "values": [["7", "6"]]},
+    ]
+    assert backends._changed_ranges(old, old) == []
+
+def test_cold_load_does_not_wait_for_versions(sheets):
+    sheets_sync.load_snapshot()
+    assert all(r[0] == "batchGet" for r in sheets.requests)
+    # The next fetch asks Drive, downloads once more to pair the data with a version, then reuses it
+    for _ in range(3):
+        sheets_sync.invalidate_cache()
+        sheets_sync.load_snapshot()
+    assert len(_downloads(sheets)) == 8
+
+def test_gather_runs_calls_together():
+    started = time.monotonic()
+    out = backends.gather({i: (lambda i=i: time.sleep(0.2) or i) for i in range(4)}, timeout=5)
+    assert out == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert time.monotonic() - started < 0.6
+
+def test_gather_gives_up_on_a_hung_call():
+    started = time.monotonic()
+    out = backends.gather({"fast": lambda: "ok", "hung": lambda: time.sleep(1.0)}, timeout=0.2)
+    assert out["fast"] == "ok"
+    assert isinstance(out["hung"], TimeoutError)
+    assert time.monotonic() - started < 0.6
+
+def test_gather_returns_errors():
+    def fail():
+        raise ConnectionError("down")
+    assert isinstance(backends.gather({"x": fail}, timeout=1)["x"], ConnectionError)
+
+def test_read_tables_fetches_spreadsheets_in_parallel(sheets):
+    sheets.delay = 0.2
+    started = time.monotonic()
+    frames = backends.SheetsBackend().read_tables(["pilots", "drones", "missions"])
+    assert time.monotonic() - started < 0.5  # one at a time would take 0.6 s
+    assert sheets.max_in_flight == 3
+    assert list(frames["pilots"]["pilot_id"][:2]) == ["P001", "P002"]
+
+def test_read_tables_times_out_one_spreadsheet(sheets, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_FETCH_TIMEOUT", 0.3)
+    sheets.delay = lambda url: 1.5 if "drone-sheet" in url else 0.05
+    started = time.monotonic()
+    frames = backends.SheetsBackend().read_tables(["pilots", "drones", "missions"])
+    assert time.monotonic() - started < 1.0
+    assert isinstance(frames["drones"], TimeoutError)
+    assert not isinstance(frames["pilots"], Exception) and not isinstance(frames["missions"], Exception)
+
+def test_hung_spreadsheet_falls_back_without_blocking_the_others(sheets, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_FETCH_TIMEOUT", 0.3)
+    sheets.delay = lambda url: 1.5 if "drone-sheet" in url else 0.05
+    started = time.monotonic()
+    snap = sheets_sync.load_snapshot()
+    assert time.monotonic() - started < 1.0
+    assert len(snap.drones) and sheets_sync.freshness()["drones"]["source"] == "local fallback"
+    assert sheets_sync.freshness()["pilots"]["source"] == "sheets"
@@ -0,0 +1,80 @@
+"""The live conflict set, kept current from write events, against a full recompute."""
+import json
+import random
+
+import pandas as pd
+import pytest
+
+import conflict_store
+import ops
+import sheets_sync
+
+def _plain(found):
+    return json.loads(json.dumps(found, default=str))
+
+def _full():
+    return _plain(ops.run_all_conflicts(sheets_sync.load_snapshot()))
+
+@pytest.fixture
+def store(memory, random_tables, monkeypatch):
+    """A ConflictStore over random sheets that never expires, counting its full rebuilds."""
+    pilots, drones, missions = random_tables(5)
+    for table, df in (("pilots", pilots), ("drones", drones), ("missions", missions)):
+        memory.write_table(table, df)
+    memory.write_table("assignments", pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+    sheets_sync.invalidate_cache()
+    store = conflict_store.ConflictStore(max_age=float("inf"))
+    store.rebuilds = 0
+    rebuild = store._rebuild
+    def counted():
+        store.rebuilds += 1
+        rebuild()
+    monkeypatch.setattr(store, "_rebuild", counted)
+    assert _plain(store.conflicts()) == _full()
+    assert sum(map(len, store.conflicts().values())) > 0
+    yield store
+    store.close()
+
+def test_row_edits_update_the_set_incrementally(store):
+    r = random.Random(1)
+    projects = sheets_sync.read_missions()["project_id"].tolist() + [ops.EMPTY]
+    for step in range(30):
+        table = r.choice(["pilots", "drones"])
+        df = (sheets_sync.read_pilot_roster if table == "pilots" else sheets_sync.read_drone_fleet)()
+        row = r.randrange(len(df))
+        df.at[row, "current_assignment"] = r.choice(projects)
+        if r.random() < 0.5:
+            df.at[row, "location"] = r.choice(["Bangalore", "Mumbai", "Delhi"])
+        if table == "drones" and r.random() < 0.3:
+            df.at[row, "status"] = r.choice(["Available", "Maintenance", "Deployed"])
+        (sheets_sync.write_pilot_roster if table == "pilots" else sheets_sync.write_drone_fleet)(df)
+        assert _plain(store.conflicts()) == _full(), f"step {step}: {table} row {row}"
+    assert store.rebuilds == 1
+
+def test_booking_writes_update_the_set_incrementally(store):
+    r = random.Random(2)
+    pilot_ids = sheets_sync.read_pilot_roster()["pilot_id"].tolist()
+    drone_ids = sheets_sync.read_drone_fleet()["drone_id"].tolist()
+    projects = sheets_sync.read_missions()["project_id"].tolist()
+    for step in range(15):
+        kind, rid = r.choice([("pilot", r.choice(pilot_ids)), ("drone", r.choice(drone_ids))])
+        sheets_sync.append_assignments(pd.DataFrame(
+            [(kind, rid, r.choice(projects), ops.EMPTY, ops.EMPTY)], columns=sheets_sync.ASSIGNMENT_COLUMNS,
+        ))
+        assert _plain(store.conflicts()) == _full(), f"step {step}: append {kind} {rid}"
+    table = sheets_sync.read_assignments()
+    for step in range(5):
+        table = table.drop(index=r.choice(list(table.index)))
+        sheets_sync.write_assignments(table)
+        assert _plain(store.conflicts()) == _full(), f"step {step}: removal"
+    assert store.rebuilds == 1
+
+def test_shape_change_rebuilds(store):
+    pilots = sheets_sync.read_pilot_roster()
+    extra = pilots.iloc[[0]].assign(pilot_id="P999", current_assignment=sheets_sync.read_missions().at[0, "project_id"])
+    sheets_sync.write_pilot_roster(pd.concat([pilots, extra], ignore_index=True))
+    assert _plain(store.conflicts()) == _full()
+    assert store.rebuilds == 2
+    sheets_sync.write_pilot_roster(pilots.drop(columns=["available_from"]))
+    assert _plain(store.conflicts()) == _full()
+    assert store.rebuilds == 3
@@ -0,0 +1,113 @@
+"""Conflict checks on hand-made and random sheets."""
+import json
+
+import pandas as pd
+import pytest
+
+import ops
+import sheets_sync
+
+EMPTY = ops.EMPTY
+
+# --- Reference rules: one current_assignment per row, scanned row by row ---
+
+def _mission(missions, key):
+    found = missions[missions["project_id"].astype(str).str.strip() == str(key).strip()]
+    return None if found.empty else found.iloc[0]
+
+def _assigned(df):
+    return df[df["current_assignment"].astype(str).str.strip() != EMPTY]
+
+def _overlap(s1, e1, s2, e2):
+    a, b, c, d = (ops.parse_date(x) for x in (s1, e1, s2, e2))
+    return all([a, b, c, d]) and not (b < c or d < a)
+
+def _double_booking(pilots, missions):
+    assigned, out = _assigned(pilots), []
+    for _, p in assigned.iterrows():
+        p1 = _mission(missions, p["current_assignment"])
+        if p1 is None:
+            continue
+        for _, p2 in missions.iterrows():
+            if str(p2["project_id"]).strip() == str(p["current_assignment"]).strip():
+                continue
+            if _overlap(p1["start_date"], p1["end_date"], p2["start_date"], p2["end_date"]):
+                other = assigned[assigned["current_assignment"].astype(str).str.strip() == str(p2["project_id"]).strip()]
+                if (other["pilot_id"] == p["pilot_id"]).any():
+                    out.append({
+                        "pilot_id": p["pilot_id"], "pilot_name": p["name"],
+                        "project_a": p["current_assignment"], "project_b": p2["project_id"],
+                        "dates_a": (p1["start_date"], p1["end_date"]), "dates_b": (p2["start_date"], p2["end_date"]),
+                    })
+    return out
+
+def _skill_cert(pilots, missions):
+    out = []
+    for _, p in _assigned(pilots).iterrows():
+        proj = _mission(missions, p["current_assignment"])
+        if proj is None:
+            continue
+        skills_ok = ops._has_skill_or_cert(ops._parse_list(p["skills"]), proj["required_skills"])
+        certs_ok = ops._has_skill_or_cert(ops._parse_list(p["certifications"]), proj["required_certs"])
+        if not (skills_ok and certs_ok):
+            out.append({
+                "pilot_id": p["pilot_id"], "pilot_name": p["name"], "project": p["current_assignment"],
+                "missing_skills": None if skills_ok else proj["required_skills"],
+                "missing_certs": None if certs_ok else proj["required_certs"],
+            })
+    return out
+
+def _location(pilots, missions):
+    out = []
+    for _, p in _assigned(pilots).iterrows():
+        proj = _mission(missions, p["current_assignment"])
+        if proj is not None and p["location"].strip().lower() != proj["location"].strip().lower():
+            out.append({
+                "pilot_id": p["pilot_id"], "pilot_name": p["name"], "pilot_location": p["location"],
+                "project": p["current_assignment"], "project_location": proj["location"],
+            })
+    return out
+
+def _pilot_drone(pilots, drones):
+    out = []
+    for _, p in _assigned(pilots).iterrows():
+        crew = drones[drones["current_assignment"].astype(str).str.strip() == p["current_assignment"].strip()]
+        for _, d in crew.iterrows():
+            if p["location"].strip().lower() != d["location"].strip().lower():
+                out.append({
+                    "pilot_id": p["pilot_id"], "pilot_name": p["name"], "pilot_location": p["location"],
+                    "drone_id": d["drone_id"], "drone_location": d["location"], "project": p["current_assignment"],
+                })
+    return out
+
+def _maintenance(drones):
+    grounded = drones["status"].str.strip().str.lower() == "maintenance"
+    return drones[grounded & (drones["current_assignment"].str.strip() != EMPTY)].to_dict("records")
+
+def _plain(found):
+    return json.loads(json.dumps(found, default=str))
+
+@pytest.mark.parametrize("seed", range(8))
+def test_fused_engine_matches_row_rules(seed, random_tables):
+    pilots, drones, missions = random_tables(seed)
+    snap = sheets_sync.Snapshot(pilots, drones, missions, pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+    expected = {
+        "double_booking": _double_booking(pilots, missions),
+        "skill_cert_mismatch": _skill_cert(pilots, missions),
+        "drone_maintenance_assigned": _maintenance(drones),
+        "location_mismatch": _location(pilots, missions),
+        "pilot_drone_location_mismatch": _pilot_drone(pilots, drones),
+    }
+    assert sum(map(len, expected.values())) > 0
+    assert _plain(ops.run_all_conflicts(snap)) == _plain(expected)
+    assert _plain(ops.check_pilot_double_booking(snap)) == _plain(expected["double_booking"])
+    assert _plain(ops.check_location_mismatch(snap)) == _plain(expected["location_mismatch"])
+
+def test_inverted_mission_dates_are_not_a_double_booking(random_tables):
+    pilots, drones, missions = random_tables(0, n_pilots=2, n_missions=2, n_drones=1)
+    pilots["pilot_id"] = "P001"
+    pilots["current_assignment"] = ["PRJ000", "PRJ001"]
+    missions["start_date"] = ["2026-03-10", "2026-03-01"]
+    missions["end_date"] = ["2026-03-05", "2026-03-20"]  # PRJ000 ends before it starts
+    snap = sheets_sync.Snapshot(pilots, drones, missions, pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+    assert ops.check_pilot_double_booking(snap) == []
@@ -0,0 +1,129 @@
+import pandas as pd
+import pytest
+
+import agent
+import ops
+import sheets_sync
+
+def _status(pilot_id):
+    roster = sheets_sync.read_pilot_roster().set_index("pilot_id")
+    return roster.at[pilot_id, "status"], roster.at[pilot_id, "current_assignment"]
+
+def test_assign_updates_roster():
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    assert _status("P001") == ("Assigned", "PRJ001")
+    assert "P001" not in ops.get_pilots(status="Available")["pilot_id"].tolist()
+    assert "P001" in ops.get_current_assignments()["pilot_id"].tolist()
+    assert "P001" not in agent.handle_message("who is available?")
+
+def test_second_booking_goes_to_assignments_table():
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    ops.assign_pilot_to_project("P001", "PRJ003")
+    assert _status("P001") == ("Assigned", "PRJ001")
+    table = sheets_sync.read_assignments()
+    assert table[["resource_id", "project_id"]].values.tolist() == [["P001", "PRJ003"]]
+    # Releasing the roster project promotes the next booking
+    ops.unassign_pilot("P001", project_id="PRJ001")
+    assert _status("P001") == ("Assigned", "PRJ003")
+    assert sheets_sync.read_assignments().empty
+
+def test_leave_releases_every_booking():
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    ops.assign_pilot_to_project("P001", "PRJ003")
+    ops.update_pilot_status("P001", "On Leave")
+    assert _status("P001") == ("On Leave", "–")
+    assert sheets_sync.read_assignments().empty
+    assert not any(b["resource_id"] == "P001" for b in ops.get_assignments().to_dict("records"))
+
+def test_without_assignments_sheet_bookings_stay_in_roster(memory, monkeypatch):
+    # Like Sheets configured without ASSIGNMENTS_SHEET_ID: the backend has no assignments table
+    monkeypatch.setattr(memory, "handles", lambda table: table != "assignments")
+    sheets_sync.invalidate_cache()
+    assert not sheets_sync.has_assignments_table()
+    assert sheets_sync.read_assignments().empty
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    assert _status("P001") == ("Assigned", "PRJ001")
+    with pytest.raises(ValueError, match="ASSIGNMENTS_SHEET_ID"):
+        ops.assign_pilot_to_project("P001", "PRJ003")
+    with pytest.raises(RuntimeError, match="ASSIGNMENTS_SHEET_ID"):
+        sheets_sync.append_assignments(pd.DataFrame([("pilot", "P003", "PRJ003", "–", "–")], columns=sheets_sync.ASSIGNMENT_COLUMNS))
+    assert ("read_table", "assignments") not in memory.calls
+    ops.update_pilot_status("P001", "Available")
+    assert _status("P001") == ("Available", "–")
+
+def _fail(*args):
+    raise OSError("disk full")
+
+def test_failed_append_books_nobody(memory, monkeypatch):
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    monkeypatch.setattr(memory, "append_rows", _fail)
+    with pytest.raises(RuntimeError):
+        ops.assign_pilots_to_projects([("P003", "PRJ002"), ("P001", "PRJ003")])
+    assert _status("P003") == ("Available", "–")
+    assert sheets_sync.read_assignments().empty
+
+def test_failed_roster_write_undoes_the_append(memory, monkeypatch):
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    write_table = memory.write_table
+    monkeypatch.setattr(memory, "write_table", lambda table, df: _fail() if table == "pilots" else write_table(table, df))
+    with pytest.raises(RuntimeError):
+        ops.assign_pilots_to_projects([("P003", "PRJ002"), ("P001", "PRJ003")])
+    assert ("append_rows", "assignments") in memory.calls
+    assert sheets_sync.read_assignments().empty
+    assert _status("P003") == ("Available", "–")
+
+def test_booked_resources_match_missions_on_other_dates(memory):
+    missions = sheets_sync.read_missions()
+    later = ["PRJ009", "Client D", "Bangalore", "Mapping", "DGCA", "2026-02-20", "2026-02-22", "High"]
+    memory.write_table("missions", pd.concat([missions, pd.DataFrame([later], columns=missions.columns)], ignore_index=True))
+    sheets_sync.invalidate_cache()
+    ops.assign_pilot_to_project("P001", "PRJ001")
+    ops.assign_drones_to_projects([("D001", "PRJ001")])
+    assert _status("P001") == ("Assigned", "PRJ001")
+
+    # Booked Feb 6-8: free again for a mission on Feb 20-22, not for one overlapping PRJ001
+    assert [p["pilot_id"] for p in ops.match_pilots_to_project("PRJ009")] == ["P001"]
+    assert "P001" not in [p["pilot_id"] for p in ops.match_pilots_to_project("PRJ001")]
+    snap = ops.snapshot(None)
+    drones = ops.column_strings(snap, "drones", "drone_id")
+    assert "D001" in drones[ops.eligible_drone_rows(snap, ops.id_rows(snap, "missions")["PRJ009"])]
+    assert "D001" not in drones[ops.eligible_drone_rows(snap, ops.id_rows(snap, "missions")["PRJ001"])]
+    # The back-to-back booking goes through and lands in the assignments table
+    ops.assign_pilot_to_project("P001", "PRJ009")
+    assert sheets_sync.read_assignments()[["resource_id", "project_id"]].values.tolist() == [["P001", "PRJ009"]]
+
+def _ranking_snapshot():
+    """One mission needing Mapping + Survey and DGCA + Night Ops, and pilots scoring apart or tied."""
+    missions = pd.DataFrame([
+        ["PRJ100", "A", "Bangalore", "Mapping, Survey", "DGCA, Night Ops", "2026-03-15", "2026-03-17", "High"],
+        ["PRJ101", "B", "Bangalore", "Mapping", "DGCA", "2026-02-01", "2026-02-03", "High"],
+    ], columns=["project_id", "client", "location", "required_skills", "required_certs", "start_date", "end_date", "priority"])
+    pilots = pd.DataFrame([
+        ["P101", "A", "Mapping, Survey", "DGCA, Night Ops", "Bangalore", "Available", "–", "2026-03-01"],  # 2 + 1 + .5
+        ["P102", "B", "Mapping", "DGCA, Night Ops", "Bangalore", "Available", "–", "2026-03-01"],  # 1 + 1 + .5
+        ["P103", "C", "Mapping, Survey", "DGCA", "Bangalore", "Available", "–", "2026-03-08"],  # 2 + .5 + .25
+        ["P104", "D", "Survey", "DGCA", "Bangalore", "Available", "–", "2026-03-15"],  # 1 + .5 + 0
+        ["P105", "E", "Mapping", "DGCA; Night Ops", "Bangalore", "Available", "–", "2026-03-01"],  # ties P102
+        ["P106", "F", "Mapping, Survey", "DGCA, Night Ops", "Bangalore", "Assigned", "PRJ101", "2026-03-01"],  # 3.5 - 1 busy
+        ["P107", "G", "Mapping, Survey", "DGCA, Night Ops", "Mumbai", "Available", "–", "2026-03-01"],  # elsewhere
+    ], columns=["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"])
+    drones = sheets_sync.read_drone_fleet()
+    return sheets_sync.Snapshot(pilots, drones, missions, pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+
+def _ranked(top_k, snap=None):
+    return [(m["pilot_id"], m["score"]) for m in ops.match_pilots_to_project("PRJ100", snap or _ranking_snapshot(), top_k=top_k)]
+
+def test_top_k_ranks_by_weighted_score_and_breaks_ties_by_row():
+    assert _ranked(4) == [("P101", 3.5), ("P103", 2.75), ("P102", 2.5), ("P105", 2.5)]
+    assert _ranked(10) == _ranked(4) + [("P106", 2.5), ("P104", 1.5)]
+    assert _ranked(0) == []
+    unranked = ops.match_pilots_to_project("PRJ100", _ranking_snapshot())
+    assert [m["pilot_id"] for m in unranked] == ["P101", "P102", "P103", "P104", "P105", "P106"]
+    assert "score" not in unranked[0]
+
+def test_top_k_follows_match_weights(monkeypatch):
+    monkeypatch.setitem(ops.MATCH_WEIGHTS, "utilization", 0.0)
+    assert _ranked(2) == [("P101", 3.5), ("P106", 3.5)]
+    monkeypatch.setitem(ops.MATCH_WEIGHTS, "slack", 0.0)
+    monkeypatch.setitem(ops.MATCH_WEIGHTS, "certs", 2.0)
+    assert _ranked(4) == [("P101", 4.0), ("P106", 4.0), ("P102", 3.0), ("P103", 3.0)]
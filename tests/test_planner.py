@@ -0,0 +1,100 @@
+"""Planner plans against brute force on small random sheets."""
+from functools import lru_cache
+
+import pandas as pd
+import pytest
+
+import ops
+import planner
+import sheets_sync
+
+def _best_weight(snap):
+    """Brute-force maximum priority weight over every way to give open missions distinct eligible pilots."""
+    positions = planner._mission_order(snap, planner._open_missions(snap))
+    ids = ops.column_strings(snap, "pilots", "pilot_id")
+    priority = ops.column_strings(snap, "missions", "priority", lower=True)
+    options = tuple(
+        (planner.PRIORITY_WEIGHTS.get(priority[pos], 1), frozenset(ids[ops.eligible_pilot_rows(snap, pos)]))
+        for pos in positions
+    )
+
+    @lru_cache(maxsize=None)
+    def best(i, used):
+        if i == len(options):
+            return 0
+        weight, pilots = options[i]
+        return max([best(i + 1, used)] + [weight + best(i + 1, used | {p}) for p in pilots if p not in used])
+    return best(0, frozenset())
+
+def _snapshot(random_tables, seed):
+    pilots, drones, missions = random_tables(seed, n_pilots=14, n_missions=8, n_drones=3)
+    pilots["status"] = "Available"
+    pilots["current_assignment"] = ops.EMPTY
+    pilots["available_from"] = "2026-01-01"
+    return sheets_sync.Snapshot(pilots, drones, missions, pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+
+def _weight(plan):
+    return sum(planner.PRIORITY_WEIGHTS.get(a["priority"].strip().lower(), 1) for a in plan["assignments"])
+
+@pytest.mark.parametrize("seed", range(25))
+def test_optimal_plan_has_the_best_priority_weight(seed, random_tables):
+    snap = _snapshot(random_tables, seed)
+    optimal = planner.plan_assignments(method="optimal", snap=snap)
+    greedy = planner.plan_assignments(method="greedy", snap=snap)
+    pilots = [a["pilot_id"] for a in optimal["assignments"]]
+    assert len(pilots) == len(set(pilots))
+    assert _weight(optimal) == _best_weight(snap)
+    assert _weight(greedy) <= _weight(optimal)
+
+MISSION_COLUMNS = ["project_id", "client", "location", "required_skills", "required_certs", "start_date", "end_date", "priority"]
+PILOT_COLUMNS = ["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"]
+DRONE_COLUMNS = ["drone_id", "model", "capabilities", "status", "location", "current_assignment", "maintenance_due"]
+
+def _crew_snapshot():
+    """Four urgent missions on the same days competing for two Bangalore pilots and drones."""
+    missions = pd.DataFrame([
+        ["PRJ001", "A", "Bangalore", "Mapping", "DGCA", "2026-03-01", "2026-03-03", "Urgent"],
+        ["PRJ002", "B", "Bangalore", "Mapping", "DGCA", "2026-03-01", "2026-03-03", "Urgent"],
+        ["PRJ003", "C", "Mumbai", "Thermal", "DGCA", "2026-03-01", "2026-03-03", "Urgent"],
+        ["PRJ004", "D", "Bangalore", "Thermal", "DGCA", "2026-03-01", "2026-03-03", "Urgent"],
+    ], columns=MISSION_COLUMNS)
+    pilots = pd.DataFrame([
+        ["P001", "Arjun", "Mapping", "DGCA", "Bangalore", "Available", ops.EMPTY, "2026-02-01"],
+        ["P002", "Neha", "Mapping, Thermal", "DGCA", "Bangalore", "Available", ops.EMPTY, "2026-02-01"],
+        ["P003", "Rohit", "Thermal", "DGCA", "Mumbai", "Available", ops.EMPTY, "2026-02-01"],
+        ["P004", "Sneha", "Mapping", "DGCA", "Mumbai", "Available", ops.EMPTY, "2026-02-01"],
+    ], columns=PILOT_COLUMNS)
+    drones = pd.DataFrame([
+        ["D001", "M300", "LiDAR", "Available", "Bangalore", ops.EMPTY, "2026-06-01"],
+        ["D002", "Mavic", "RGB", "Available", "Bangalore", ops.EMPTY, "2026-03-02"],  # due mid-mission
+        ["D003", "Mavic", "RGB", "Available", "Bangalore", ops.EMPTY, "2026-06-01"],
+        ["D004", "M30T", "Thermal", "Available", "Mumbai", ops.EMPTY, "2026-06-01"],
+        ["D005", "M300", "LiDAR", "Available", "Mumbai", ops.EMPTY, "2026-06-01"],
+        ["D006", "M30T", "Thermal", "Available", "Bangalore", ops.EMPTY, "2026-02-20"],  # due before
+    ], columns=DRONE_COLUMNS)
+    return sheets_sync.Snapshot(pilots, drones, missions, pd.DataFrame(columns=sheets_sync.ASSIGNMENT_COLUMNS))
+
+@pytest.mark.parametrize("method", ["optimal", "greedy"])
+def test_crews_match_capability_location_and_maintenance(method):
+    snap = _crew_snapshot()
+    plan = planner.plan_crews(method=method, snap=snap)
+    crews = {c["project_id"]: c for c in plan["crews"]}
+
+    assert sorted(crews) == ["PRJ001", "PRJ002", "PRJ003"]
+    assert plan["uncrewed"] == ["PRJ004"]  # P002 is free, but no Bangalore thermal drone flies before maintenance
+    for key in ("pilot_id", "drone_id"):
+        assert len({c[key] for c in plan["crews"]}) == len(plan["crews"])
+    assert {crews["PRJ001"]["pilot_id"], crews["PRJ002"]["pilot_id"]} == {"P001", "P002"}
+    # Mapping flies on LiDAR or RGB; D002 is due mid-mission and D005 is in Mumbai
+    assert {crews["PRJ001"]["drone_id"], crews["PRJ002"]["drone_id"]} == {"D001", "D003"}
+    assert (crews["PRJ003"]["pilot_id"], crews["PRJ003"]["drone_id"]) == ("P003", "D004")
+
+    pilots, drones, missions = (ops.records(snap, t) for t in ("pilots", "drones", "missions"))
+    by_id = lambda rows, key: {r[key]: r for r in rows}
+    pilots, drones, missions = by_id(pilots, "pilot_id"), by_id(drones, "drone_id"), by_id(missions, "project_id")
+    for c in plan["crews"]:
+        mission, pilot, drone = missions[c["project_id"]], pilots[c["pilot_id"]], drones[c["drone_id"]]
+        assert pilot["location"] == drone["location"] == mission["location"]
+        caps = set(ops.SKILL_CAPABILITIES[mission["required_skills"].lower()])
+        assert caps & {cap.strip() for cap in drone["capabilities"].split(",")}
+        assert drone["maintenance_due"] > mission["end_date"]
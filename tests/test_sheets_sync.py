@@ -0,0 +1,188 @@
+import asyncio
+import time
+
+import pytest
+
+import agent
+import config
+import ops
+import sheets_sync
+import snapshot_cache
+
+def test_failed_timed_flush_is_reported(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_WRITE_DELAY", 0.05)
+    def refuse(table, df):
+        raise RuntimeError("quota exceeded")
+    monkeypatch.setattr(memory, "write_table", refuse)
+    ops.update_pilot_status("P001", "On Leave")
+    assert sheets_sync.freshness()["pilots"]["pending_writes"] == 1
+    assert sheets_sync.freshness()["pilots"]["write_error"] is None
+    deadline = time.monotonic() + 2
+    while sheets_sync.last_flush_error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    status = sheets_sync.freshness()
+    assert status["pilots"]["write_error"] == "quota exceeded"
+    assert status["drones"]["write_error"] is None
+    reply = agent.handle_message("who is on leave?")
+    assert "P001" in reply
+    assert "Changes not saved yet: pilots (1 update(s))" in reply
+    assert "quota exceeded" in reply
+
+def _age(table, seconds):
+    """Make the cached copy of `table` look `seconds` old."""
+    stamp, df = sheets_sync._cache[table]
+    sheets_sync._cache[table] = (stamp - seconds, df)
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+def _slow_reads(memory, monkeypatch, delay, error=None):
+    """read_table takes the table as it is now, then waits `delay` seconds (and raises `error`, if given)."""
+    def read_table(table):
+        memory.calls.append(("read_table", table))
+        df = memory._table(table).copy()
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return df
+    monkeypatch.setattr(memory, "read_table", read_table)
+
+def _reads(memory, table="pilots"):
+    return memory.calls.count(("read_table", table))
+
+def test_stale_read_returns_at_once_and_refetches_once(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    before = sheets_sync.read_pilot_roster()
+    edited = before.copy()
+    edited.at[0, "status"] = "On Leave"
+    memory.write_table("pilots", edited)  # edited in the sheet: no write event
+    _slow_reads(memory, monkeypatch, 0.3)
+    _age("pilots", 61)
+    started = time.monotonic()
+    for _ in range(5):
+        assert sheets_sync.read_pilot_roster().equals(before)
+    assert time.monotonic() - started < 0.2
+    _wait_for(lambda: not sheets_sync._refreshing)
+    assert sheets_sync.read_pilot_roster().equals(edited)
+    assert _reads(memory) == 2  # the first read, then one background fetch for all five stale reads
+
+def test_write_during_a_fetch_is_not_overwritten(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = sheets_sync.read_pilot_roster()
+    memory.write_table("pilots", roster.assign(name=roster["name"] + " (sheet)"))
+    _slow_reads(memory, monkeypatch, 0.3)
+    _age("pilots", 61)
+    sheets_sync.read_pilot_roster()  # starts the background fetch of the sheet edit
+    _wait_for(lambda: _reads(memory) == 2)
+    ops.update_pilot_status("P001", "On Leave")  # lands while that fetch is in flight
+    _wait_for(lambda: not sheets_sync._refreshing)
+    assert sheets_sync.read_pilot_roster().set_index("pilot_id").at["P001", "status"] == "On Leave"
+
+def test_fetch_errors_show_in_freshness(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = sheets_sync.read_pilot_roster()
+    assert sheets_sync.freshness()["pilots"]["last_error"] is None
+    memory.write_table("pilots", roster)  # a new version, so the next fetch must download
+    read_table = memory.read_table
+    _slow_reads(memory, monkeypatch, 0.0, error=RuntimeError("quota exceeded"))
+    _age("pilots", 61)
+    assert sheets_sync.read_pilot_roster().equals(roster)
+    _wait_for(lambda: not sheets_sync._refreshing)
+    status = sheets_sync.freshness()["pilots"]
+    assert status["last_error"] == "quota exceeded" and status["error_age"] is not None
+    # Past the stale window the fetch is made inline; the last good copy is still served
+    _age("pilots", 60 + config.SHEETS_STALE_WHILE_REVALIDATE + 1)
+    assert sheets_sync.read_pilot_roster().equals(roster)
+    monkeypatch.setattr(memory, "read_table", read_table)
+    _age("pilots", 60 + config.SHEETS_STALE_WHILE_REVALIDATE + 1)
+    sheets_sync.read_pilot_roster()
+    assert sheets_sync.freshness()["pilots"]["last_error"] is None
+
+def test_refresher_picks_up_sheet_edits_until_stopped(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = sheets_sync.read_pilot_roster()
+    sheets_sync.start_refresher(0.05)
+    thread = sheets_sync._refresher
+    sheets_sync.start_refresher(0.05)
+    assert sheets_sync._refresher is thread and thread.is_alive()
+    memory.write_table("pilots", roster.assign(status="Unavailable"))
+    _wait_for(lambda: (sheets_sync.read_pilot_roster()["status"] == "Unavailable").all())
+    sheets_sync.stop_refresher()
+    assert sheets_sync._refresher is None and not thread.is_alive()
+    memory.write_table("pilots", roster)
+    time.sleep(0.15)
+    assert (sheets_sync.read_pilot_roster()["status"] == "Unavailable").all()
+
+def _areads(memory, table="pilots"):
+    return memory.calls.count(("aread_table", table))
+
+def test_concurrent_async_reads_share_one_fetch(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    memory.delay = 0.1
+    async def read_all():
+        return await asyncio.gather(*(sheets_sync.aread_pilot_roster() for _ in range(10)))
+    frames = asyncio.run(read_all())
+    assert _areads(memory) == 1
+    assert all(df.equals(frames[0]) for df in frames)
+    assert sheets_sync.freshness()["pilots"]["source"] == "memory"
+
+def test_async_snapshot_reuses_unchanged_tables(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    snap = asyncio.run(sheets_sync.aload_snapshot())
+    assert snap.loaded() == ["pilots", "drones", "missions", "assignments"]
+    assert snap.pilots.equals(sheets_sync.read_pilot_roster())
+    assert [_areads(memory, t) for t in snap.loaded()] == [1, 1, 1, 1]
+    # Versions unchanged since the async fetch: nothing is downloaded again
+    sheets_sync.invalidate_cache()
+    asyncio.run(sheets_sync.aload_snapshot())
+    assert [_areads(memory, t) for t in snap.loaded()] == [1, 1, 1, 1]
+    memory.write_table("drones", snap.drones.assign(status="Maintenance"))
+    sheets_sync.invalidate_cache()
+    assert (asyncio.run(sheets_sync.aload_snapshot()).drones["status"] == "Maintenance").all()
+    assert [_areads(memory, t) for t in snap.loaded()] == [1, 2, 1, 1]
+
+def test_async_fetch_feeds_the_cold_start_copy(memory, monkeypatch, tmp_path):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE", True)
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(snapshot_cache, "_saved", {})
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = asyncio.run(sheets_sync.aread_pilot_roster())
+    assert (tmp_path / "pilots.arrow").exists()
+    # A new worker: the on-disk copy is current, so no fetch
+    sheets_sync.invalidate_cache()
+    sheets_sync._last_fetch.clear()
+    assert asyncio.run(sheets_sync.aread_pilot_roster()).equals(roster)
+    assert _areads(memory) == 1
+    assert sheets_sync.freshness()["pilots"]["source"] == "disk cache"
+
+def test_ttl_cache_hits_expires_and_invalidates(memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 0.2)
+    monkeypatch.setattr(config, "SHEETS_STALE_WHILE_REVALIDATE", 0.0)
+    monkeypatch.setattr(memory, "version", lambda table: None)  # no version reuse: every fetch reads
+    first = sheets_sync.read_pilot_roster()
+    assert sheets_sync.read_pilot_roster().equals(first)
+    assert _reads(memory) == 1
+    first.at[0, "status"] = "changed by the caller"
+    assert sheets_sync.read_pilot_roster().at[0, "status"] == "Available"  # reads get copies
+    assert _reads(memory) == 1
+    time.sleep(0.25)
+    sheets_sync.read_pilot_roster()
+    sheets_sync.read_pilot_roster()
+    assert _reads(memory) == 2
+    sheets_sync.invalidate_cache("drones")
+    sheets_sync.read_pilot_roster()
+    assert _reads(memory) == 2
+    sheets_sync.invalidate_cache("pilots")
+    sheets_sync.read_pilot_roster()
+    assert _reads(memory) == 3
+    sheets_sync.invalidate_cache()
+    sheets_sync.read_pilot_roster()
+    assert _reads(memory) == 4
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 0.0)  # caching off
+    sheets_sync.read_pilot_roster()
+    sheets_sync.read_pilot_roster()
+    assert _reads(memory) == 6
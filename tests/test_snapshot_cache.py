@@ -0,0 +1,80 @@
+"""On-disk Arrow copies of fetched tables: types, source check and version check on cold start."""
+import pytest
+
+import config
+import sheets_sync
+import snapshot_cache
+
+pa = pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE", True)
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(snapshot_cache, "_saved", {})
+    return tmp_path
+
+def _schema(table):
+    return pa.ipc.open_file(pa.memory_map(str(snapshot_cache._path(table)), "r")).schema
+
+def test_round_trip_keeps_text_and_stores_types(cache_dir, memory):
+    pilots = memory.read_table("pilots")
+    pilots.at[1, "available_from"] = "–"
+    missions = memory.read_table("missions")
+    missions.at[0, "start_date"] = "06/02/2026"  # not ISO: the column stays text
+    snapshot_cache.save("pilots", pilots, "src", "v1")
+    snapshot_cache.save("missions", missions, "src", "v1")
+
+    schema = _schema("pilots")
+    assert pa.types.is_dictionary(schema.field("status").type)
+    assert pa.types.is_dictionary(schema.field("location").type)
+    assert schema.field("available_from").type == pa.date32()
+    assert schema.field("skills").type == pa.string()
+    assert _schema("missions").field("start_date").type == pa.string()
+    assert _schema("missions").field("end_date").type == pa.date32()
+
+    for table, df in (("pilots", pilots), ("missions", missions)):
+        loaded, version, saved_at = snapshot_cache.load(table, "src")
+        assert loaded.equals(df.astype(str))
+        assert version == "v1" and saved_at > 0
+
+def test_copy_from_another_source_is_ignored(cache_dir, memory):
+    snapshot_cache.save("drones", memory.read_table("drones"), "sheet-a/Sheet1", "v1")
+    assert snapshot_cache.load("drones", "sheet-b/Sheet1") is None
+    assert snapshot_cache.load("drones", "sheet-a/Sheet1") is not None
+
+def test_disabled_or_cleared_cache_loads_nothing(cache_dir, memory, monkeypatch):
+    snapshot_cache.save("drones", memory.read_table("drones"), "src")
+    snapshot_cache.clear()
+    assert snapshot_cache.load("drones", "src") is None
+    monkeypatch.setattr(config, "SNAPSHOT_CACHE", False)
+    assert not snapshot_cache.enabled()
+    snapshot_cache.save("drones", memory.read_table("drones"), "src")
+    assert not list(cache_dir.glob("*.arrow"))
+
+def _restart():
+    """Forget everything held in memory, as a new worker process would."""
+    sheets_sync.invalidate_cache()
+    sheets_sync._last_fetch.clear()
+
+def test_cold_start_serves_a_current_copy(cache_dir, memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = sheets_sync.read_pilot_roster()
+    _restart()
+    reads = memory.calls.count(("read_table", "pilots"))
+    assert sheets_sync.read_pilot_roster().equals(roster)
+    assert memory.calls.count(("read_table", "pilots")) == reads
+    assert sheets_sync.freshness()["pilots"]["source"] == "disk cache"
+
+def test_cold_start_rejects_a_copy_of_another_version(cache_dir, memory, monkeypatch):
+    monkeypatch.setattr(config, "SHEETS_CACHE_TTL", 60.0)
+    roster = sheets_sync.read_pilot_roster()
+    edited = roster.assign(status="Unavailable")
+    memory.write_table("pilots", edited)  # changed since the copy was saved
+    _restart()
+    reads = memory.calls.count(("read_table", "pilots"))
+    assert sheets_sync.read_pilot_roster().equals(edited)
+    assert memory.calls.count(("read_table", "pilots")) == reads + 1
+    assert sheets_sync.freshness()["pilots"]["source"] == "memory"
+    loaded, version, _ = snapshot_cache.load("pilots", sheets_sync._source("pilots"))
+    assert loaded.equals(edited) and version == memory.version("pilots")
@@ -0,0 +1,79 @@
+"""SQLite local storage: WAL mode, row-diff writes and filters pushed into SQL."""
+import sqlite3
+
+import pytest
+
+import config
+import ops
+import sheets_sync
+import sqlite_store
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    path = tmp_path / "skylark.db"
+    monkeypatch.setattr(config, "SQLITE_PATH", path)
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    return path
+
+def _statements(run):
+    """First words of the statements run on the pilots table by this thread during run()."""
+    seen = []
+    conn = sqlite_store._connect()
+    conn.set_trace_callback(lambda sql: seen.append(sql.split()[0].upper()) if '"pilots"' in sql else None)
+    try:
+        run()
+    finally:
+        conn.set_trace_callback(None)
+    return seen
+
+def test_database_runs_in_wal_mode(sqlite_db):
+    sheets_sync.read_pilot_roster()
+    assert sqlite3.connect(sqlite_db).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_status_change_is_one_update(sqlite_db):
+    roster = sheets_sync.read_pilot_roster()
+    version = sqlite_store.version("pilots")
+    roster.at[1, "status"] = "On Leave"
+    ran = _statements(lambda: sqlite_store.write_table("pilots", roster))
+    assert ran.count("UPDATE") == 1
+    assert not {"INSERT", "DELETE", "DROP", "CREATE"} & set(ran)
+    assert sqlite_store.version("pilots") != version
+    assert sqlite_store.read_table("pilots").equals(roster)
+
+    version = sqlite_store.version("pilots")
+    assert "UPDATE" not in _statements(lambda: sqlite_store.write_table("pilots", roster))
+    assert sqlite_store.version("pilots") == version
+
+def test_added_and_removed_rows_are_inserted_and_deleted(sqlite_db):
+    roster = sheets_sync.read_pilot_roster()
+    longer = roster.copy()
+    longer.loc[len(longer)] = roster.iloc[0].replace({"P001": "P005"})
+    ran = _statements(lambda: sqlite_store.write_table("pilots", longer))
+    assert ran.count("INSERT") == 1 and "UPDATE" not in ran
+    assert sqlite_store.read_table("pilots")["pilot_id"].tolist()[-1] == "P005"
+    ran = _statements(lambda: sqlite_store.write_table("pilots", roster))
+    assert ran.count("DELETE") == 1 and "UPDATE" not in ran
+    assert sqlite_store.read_table("pilots").equals(roster)
+
+FILTERS = [
+    {}, {"status": "Available"}, {"location": "bangalore"}, {"skill": "mapping"},
+    {"certification": "Night Ops"}, {"certification": "NightOps"}, {"certification": "night ops; BVLOS"},
+    {"skill": "Survey", "certification": "DGCA", "location": "Bangalore"},
+]
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_select_matches_the_in_memory_filters(sqlite_db, filters):
+    roster = sheets_sync.read_pilot_roster()
+    roster.loc[len(roster)] = ["P005", "Kiran", "Mapping", "NightOps;BVLOS", "Bangalore", "Available", ops.EMPTY, "2026-02-01"]
+    roster.loc[len(roster)] = ["P006", "Asha", " mapping ,Survey", "DGCA ,  Night Ops", "bangalore", "Available", ops.EMPTY, "2026-02-01"]
+    sheets_sync.write_pilot_roster(roster)
+    assert sheets_sync.query("pilots") is not None  # this backend filters in SQL
+    in_sql = ops.get_pilots(**filters)
+    in_memory = ops.get_pilots(**filters, snap=sheets_sync.load_snapshot())
+    assert in_sql["pilot_id"].tolist() == in_memory["pilot_id"].tolist()
+
+def test_drone_filters_match_in_memory(sqlite_db):
+    snap = sheets_sync.load_snapshot()
+    for capability in ["rgb", "Thermal", "LiDAR, thermal"]:
+        assert ops.get_drones(capability=capability).equals(ops.get_drones(capability=capability, snap=snap))
+    assert ops.get_maintenance_due()["drone_id"].tolist() == ops.get_maintenance_due(snap)["drone_id"].tolist()